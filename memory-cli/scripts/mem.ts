@@ -11,6 +11,8 @@ import { join } from 'path';
 const MEMORY_ROOT = '/home/workspace/Memory';
 const EXPLORATIONS_DIR = '/home/workspace/Memory/explorations';
 const INDEX_FILE = join(EXPLORATIONS_DIR, 'index.json');
+// entries appended by night-exploration/scripts/index-explorations.py, not yet compacted
+const INDEX_LOG = join(EXPLORATIONS_DIR, 'index.jsonl');
 
 // memory shortcuts mapping - customize these for your memory structure
 const MEMORY_PATHS: Record<string, string> = {
@@ -95,12 +97,28 @@ interface ExplorationIndex {
   lastUpdated: string;
 }
 
-// load or create index
+// load or create index, with pending log entries applied on top
 function getIndex(): ExplorationIndex {
-  if (existsSync(INDEX_FILE)) {
-    return JSON.parse(readFileSync(INDEX_FILE, 'utf-8'));
+  const index: ExplorationIndex = existsSync(INDEX_FILE)
+    ? JSON.parse(readFileSync(INDEX_FILE, 'utf-8'))
+    : { explorations: [], lastUpdated: new Date().toISOString() };
+
+  if (existsSync(INDEX_LOG)) {
+    for (const line of readFileSync(INDEX_LOG, 'utf-8').split('\n')) {
+      if (!line.trim()) continue;
+      let entry: Exploration & { loggedAt?: number };
+      try {
+        entry = JSON.parse(line);
+      } catch {
+        continue;  // torn last line
+      }
+      delete entry.loggedAt;
+      const i = index.explorations.findIndex(e => e.id === entry.id);
+      if (i >= 0) index.explorations[i] = { ...index.explorations[i], ...entry };
+      else index.explorations.push(entry);
+    }
   }
-  return { explorations: [], lastUpdated: new Date().toISOString() };
+  return index;
 }
 
 // save index
@@ -9,6 +9,8 @@ import json
 import os
 import re
 import subprocess
+import sys
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional
@@ -20,6 +22,84 @@ MEMORY_ROOT = Path("/home/workspace/Memory")
 MEMORY_TYPES = ["facts", "context", "patterns", "reflections", "soul"]
 QMD_COLLECTION = "memory"
 
+# local state that should not be indexed by qmd
+STATE_ROOT = Path("/home/.z/memory")
+
+# conversation ingestion
+CONVERSATIONS_DB = Path("/home/workspace/.zo/conversations/zo_conversations.duckdb")
+INGEST_DIR = STATE_ROOT / "ingest"
+INGEST_CHUNK_SIZE = 500
+INGEST_PART_KINDS = {"user-prompt": "user", "assistant-text": "assistant"}
+DIGEST_MAX_CHARS = 2000
+
+# memory directory for each format_memory_content type
+FORMAT_TYPE_DIRS = {
+    "preference": "facts",
+    "technical": "facts",
+    "decision": "facts",
+    "principle": "facts",
+    "project": "context",
+    "conversation_bridge": "context",
+    "pattern": "patterns",
+    "meta_pattern": "patterns",
+    "consciousness": "patterns",
+}
+
+# candidate extraction: keyword classifiers (format type, weight, phrases)
+# plus regex rules for shapes keywords can't express
+CANDIDATES_PATH = INGEST_DIR / "candidates.jsonl"
+CANDIDATE_MIN_SCORE = 2.0
+CANDIDATE_MAX_CHARS = 300
+CANDIDATE_KEYWORDS = [
+    ("preference", 3.0, ["i prefer", "i really prefer", "i like", "i really like", "i love", "i hate",
+                         "i dislike", "i want", "i'd rather", "i would rather"]),
+    ("preference", 1.5, ["always", "never", "please don't", "don't ever", "stop"]),
+    ("decision", 3.0, ["we decided", "i decided", "we chose", "i chose", "we picked", "we settled on", "we agreed"]),
+    ("decision", 2.5, ["let's go with", "let's use", "let's stick with", "let's switch to", "let's drop"]),
+    ("decision", 1.0, ["going with", "instead of", "tradeoff", "trade-off"]),
+    ("project", 2.0, ["working on", "started", "shipped", "launched", "released", "deployed", "finished"]),
+    ("project", 1.0, ["project", "repo", "milestone", "deadline", "roadmap", "mvp"]),
+    ("technical", 1.0, ["install", "installed", "configure", "configured", "config", "api", "endpoint",
+                        "version", "error", "traceback", "port"]),
+    ("pattern", 2.0, ["every time", "whenever", "usually", "tends to", "tend to", "keeps happening",
+                      "keeps doing", "again"]),
+    ("principle", 2.5, ["rule of thumb", "principle", "the lesson", "in general"]),
+]
+CANDIDATE_PATTERNS = [
+    ("technical", r"(?:/[\w.-]+){2,}|`[^`]+`", 1.0),  # paths and inline code
+]
+# explicit requests to remember boost whichever type matched
+CANDIDATE_BOOST = (["remember that", "remember to", "note that", "for future reference", "don't forget"], 2.0)
+CANDIDATE_ROLE_WEIGHTS = {"user": 1.0, "assistant": 0.5}
+
+# local tf-idf/lsa fallback for semantic search when qmd vsearch is unavailable
+SEMANTIC_INDEX_DIR = STATE_ROOT / "semantic"
+SEMANTIC_TIMEOUT = 20  # seconds before giving up on qmd vsearch
+LSA_COMPONENTS = 128
+LSA_MAX_TERMS = 10000
+LSA_REFIT_FRACTION = 0.2  # refit once this share of the corpus was folded in
+LSA_REFIT_UNTIMED_SECONDS = 30  # assumed refit time before one has been timed
+LSA_STORE_DTYPE = "int8"  # document vectors live in a memory-mapped vector_store
+
+# search results cached per query + options, dropped whenever a memory or the qmd index changes
+SEARCH_CACHE_PATH = STATE_ROOT / "search-cache.json"
+SEARCH_CACHE_MAX = 200
+QMD_INDEX_PATH = Path.home() / ".cache/qmd/index.sqlite"
+
+# pre-session warm-up: refresh indexes and fill the search cache with likely queries
+WARMUP_BUDGET = 60  # seconds
+WARMUP_MAX_QUERIES = 12
+WARMUP_BASE_QUERIES = ["current"]
+WARMUP_THREAD_FIELDS = ["next ideas", "explored"]  # exploration summary fields worth searching
+LSA_STOPWORDS = set("""
+a about above after again all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has
+have having he her here hers him his how i if in into is it its itself just me more most my no
+nor not now of off on once only or other our ours out over own same she should so some such
+than that the their theirs them then there these they this those through to too under until up
+very was we were what when where which while who whom why will with would you your yours
+""".split())
+
 def ensure_memory_dirs():
     """ensure all memory directories exist."""
     for mem_type in MEMORY_TYPES:
@@ -140,18 +220,94 @@ def create_memory_file(
     
     return filepath
 
+def corpus_fingerprint() -> str:
+    """hash of every memory file's path, mtime and size, plus the qmd index's mtime."""
+    import hashlib
+    digest = hashlib.sha1()
+    for path in sorted(iter_memory_files()):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        digest.update(f"{path}\0{stat.st_mtime_ns}\0{stat.st_size}\n".encode())
+    try:
+        digest.update(str(QMD_INDEX_PATH.stat().st_mtime_ns).encode())
+    except OSError:
+        pass
+    return digest.hexdigest()
+
+def search_cache_key(query, semantic, min_score, limit, show_scores, local) -> str:
+    return json.dumps([query, semantic, min_score, limit, show_scores, local])
+
+def load_search_cache(fingerprint: str) -> Dict:
+    """cached entries, or an empty cache if the corpus changed since they were stored."""
+    cache = load_json_file(SEARCH_CACHE_PATH, {})
+    if cache.get("fingerprint") != fingerprint:
+        return {"fingerprint": fingerprint, "entries": {}}
+    return cache
+
+def store_search_result(fingerprint: str, key: str, matches: List[Dict]):
+    """add a result, evicting the least recently stored entries past SEARCH_CACHE_MAX."""
+    cache = load_search_cache(fingerprint)
+    entries = cache["entries"]
+    entries.pop(key, None)
+    entries[key] = {"at": time.time(), "matches": matches}
+    while len(entries) > SEARCH_CACHE_MAX:
+        entries.pop(next(iter(entries)))
+    try:
+        write_json_atomic(SEARCH_CACHE_PATH, cache)
+    except OSError:
+        pass  # the cache is an optimization; searching still works without it
+
 def search_memories(
     query: str,
     semantic: bool = False,
     min_score: Optional[float] = None,
     limit: int = 5,
-    show_scores: bool = False
+    show_scores: bool = False,
+    local: bool = False,
+    cache: bool = True,
+    timeout: Optional[float] = None
 ) -> List[Dict]:
     """
     search memories using qmd.
 
+    semantic searches fall back to the local lsa index when qmd vsearch
+    fails or times out (or when local=True). successful results are cached
+    until any memory or the qmd index changes; `timeout` caps the qmd call.
+
     returns list of dicts with keys: path, score, context
     """
+    if not cache:
+        return run_search(query, semantic, min_score, limit, show_scores, local, timeout)[0] or []
+
+    fingerprint = corpus_fingerprint()
+    key = search_cache_key(query, semantic, min_score, limit, show_scores, local)
+    hit = load_search_cache(fingerprint)["entries"].get(key)
+    if hit is not None:
+        return hit["matches"]
+    matches, cacheable = run_search(query, semantic, min_score, limit, show_scores, local, timeout)
+    if matches is None:
+        return []
+    if cacheable:
+        store_search_result(fingerprint, key, matches)
+    return matches
+
+def run_search(query, semantic, min_score, limit, show_scores, local, timeout=None) -> tuple[Optional[List[Dict]], bool]:
+    """
+    one uncached search. returns (matches, cacheable): matches is None if the
+    search failed, and a fallback forced by a qmd timeout or error isn't worth caching.
+    a caller's `timeout` also bounds any lsa refit the local index would start.
+    """
+    deadline = time.monotonic() + timeout if timeout is not None else None
+
+    def local_search():
+        refit_budget = max(deadline - time.monotonic(), 0.0) if deadline is not None else None
+        return local_semantic_search(query, min_score=min_score, limit=limit, refit_budget=refit_budget)
+
+    if semantic and local:
+        return local_search(), True
+
     cmd = ["qmd"]
     if semantic:
         cmd.append("vsearch")
@@ -168,11 +324,29 @@ def search_memories(
     if show_scores or min_score is not None:
         cmd.append("--files")
 
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    try:
+        if semantic:
+            timeout = min(timeout, SEMANTIC_TIMEOUT) if timeout is not None else SEMANTIC_TIMEOUT
+        result = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+    except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+        if not semantic:
+            print(f"error searching: {e}")
+            return None, False
+        print(f"qmd vsearch unavailable ({type(e).__name__}), using local lsa index", file=sys.stderr)
+        timed_out = isinstance(e, subprocess.TimeoutExpired)
+        return local_search(), not timed_out
 
     if result.returncode != 0:
+        if semantic:
+            print("qmd vsearch failed, using local lsa index", file=sys.stderr)
+            return local_search(), False
         print(f"error searching: {result.stderr}")
-        return []
+        return None, False
 
     # parse output
     matches = []
@@ -197,26 +371,86 @@ def search_memories(
                 "context": ""
             })
 
-    return matches
+    return matches, True
+
+def resolve_memory_path(ref: str) -> Optional[Path]:
+    """
+    resolve a memory reference to a local file without calling qmd.
+
+    accepts absolute paths, paths relative to MEMORY_ROOT ("facts/x.md"),
+    the workspace ("Memory/facts/x.md") or cwd, and qmd://memory/... uris.
+    returns None for anything only qmd can resolve (e.g. "#docid").
+    """
+    if ref.startswith("#"):
+        return None
+    if ref.startswith("qmd://"):
+        collection, _, ref = ref[len("qmd://"):].partition("/")
+        if collection != QMD_COLLECTION:
+            return None
+
+    path = Path(ref).expanduser()
+    if path.is_absolute():
+        candidates = [path]
+    else:
+        candidates = [MEMORY_ROOT / path, MEMORY_ROOT.parent / path, Path.cwd() / path]
+    for candidate in candidates:
+        if candidate.suffix != ".md":
+            candidate = candidate.with_name(candidate.name + ".md")
+        if candidate.is_file():
+            return candidate
+    for candidate in candidates:
+        if candidate.is_file():
+            return candidate
+    return None
 
 def get_memory(filepath: str) -> str:
-    """retrieve full memory content."""
-    result = subprocess.run(
-        ["qmd", "get", filepath],
-        capture_output=True,
-        text=True
-    )
+    """retrieve full memory content, reading local files directly."""
+    local_path = resolve_memory_path(filepath)
+    if local_path:
+        return local_path.read_text()
+
+    # docids and anything else only qmd knows about
+    try:
+        result = subprocess.run(
+            ["qmd", "get", filepath],
+            capture_output=True,
+            text=True
+        )
+    except FileNotFoundError:
+        print(f"memory not found: {filepath}", file=sys.stderr)
+        return ""
     
     if result.returncode != 0:
-        print(f"error retrieving memory: {result.stderr}")
+        print(f"error retrieving memory: {result.stderr.strip()}", file=sys.stderr)
         return ""
     
     return result.stdout
 
+def get_memories(refs: List[str]) -> List[Dict]:
+    """
+    fetch many memories in one process.
+
+    returns dicts with keys: ref, path, frontmatter, body, content
+    (content is empty when the memory could not be found).
+    """
+    memories = []
+    for ref in refs:
+        local_path = resolve_memory_path(ref)
+        content = local_path.read_text() if local_path else get_memory(ref)
+        frontmatter, body = parse_frontmatter(content)
+        memories.append({
+            "ref": ref,
+            "path": str(local_path) if local_path else None,
+            "frontmatter": frontmatter,
+            "body": body.strip(),
+            "content": content,
+        })
+    return memories
+
 def update_memory(filepath: Path, updates: Dict):
     """update memory frontmatter."""
     if not filepath.exists():
-        print(f"memory not found: {filepath}")
+        print(f"memory not found: {filepath}", file=sys.stderr)
         return
     
     content = filepath.read_text()
@@ -419,6 +653,7 @@ def health_check() -> Dict:
         "collection_initialized": False,
         "embeddings_work": False,
         "disk_usage_mb": 0,
+        "semantic_index_docs": 0,
         "errors": []
     }
     
@@ -479,6 +714,10 @@ def health_check() -> Dict:
     except Exception as e:
         health["errors"].append(f"cannot check embeddings: {e}")
     
+    # check local semantic fallback index
+    semantic_meta = load_json_file(SEMANTIC_INDEX_DIR / "index.json", {})
+    health["semantic_index_docs"] = len(semantic_meta.get("docs", {}))
+
     # check disk usage
     try:
         result = subprocess.run(
@@ -494,6 +733,803 @@ def health_check() -> Dict:
     
     return health
 
+def load_json_file(path: Path, default):
+    """load json from a file, returning default if missing or unreadable."""
+    try:
+        return json.loads(path.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
+
+def write_json_atomic(path: Path, data):
+    """write json via temp file + rename so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text(json.dumps(data, indent=2, default=str))
+    os.replace(tmp_path, path)
+
+def part_text(value) -> str:
+    """pull plain text out of a decoded message_parts.content_json value."""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        for key in ("content", "text", "value"):
+            if key in value:
+                return part_text(value[key])
+        return ""
+    if isinstance(value, list):
+        return "\n".join(t for t in (part_text(v) for v in value) if t)
+    return ""
+
+def decode_content_json(content_json) -> str:
+    """decode a content_json column (json text or already-parsed value)."""
+    if content_json is None:
+        return ""
+    if isinstance(content_json, str):
+        try:
+            return part_text(json.loads(content_json))
+        except json.JSONDecodeError:
+            return content_json.strip()
+    return part_text(content_json)
+
+def fetch_message_chunk(con, watermark: Dict, limit: int) -> List[Dict]:
+    """
+    fetch the next chunk of messages strictly after the watermark.
+
+    messages are ordered by (timestamp, message_id) so the watermark is a
+    total order and a chunk boundary never splits or repeats a message.
+    """
+    rows = con.execute(
+        """
+        WITH batch AS (
+            SELECT message_id, conversation_id, kind, timestamp
+            FROM messages
+            WHERE timestamp > ?
+               OR (timestamp = ? AND message_id > ?)
+            ORDER BY timestamp, message_id
+            LIMIT ?
+        )
+        SELECT b.message_id, b.conversation_id, b.kind, b.timestamp, c.title,
+               mp.part_kind, mp.content_json
+        FROM batch b
+        LEFT JOIN conversations c ON c.conversation_id = b.conversation_id
+        LEFT JOIN message_parts mp
+               ON mp.message_id = b.message_id
+              AND mp.part_kind IN ('user-prompt', 'assistant-text')
+        ORDER BY b.timestamp, b.message_id
+        """,
+        [watermark["timestamp"], watermark["timestamp"], watermark["message_id"], limit],
+    ).fetchall()
+
+    messages = []
+    for message_id, conversation_id, kind, timestamp, title, part_kind, content_json in rows:
+        if not messages or messages[-1]["id"] != message_id:
+            messages.append({
+                "id": message_id,
+                "conversation_id": conversation_id,
+                "title": title or "",
+                "kind": kind,
+                "timestamp": timestamp,
+                "role": None,
+                "text": "",
+            })
+        message = messages[-1]
+        text = decode_content_json(content_json) if part_kind else ""
+        if text:
+            message["role"] = message["role"] or INGEST_PART_KINDS[part_kind]
+            message["text"] = f"{message['text']}\n{text}".strip()
+
+    return messages
+
+def digest_path(digest_dir: Path, conversation_id) -> Path:
+    """filesystem-safe digest path for a conversation id."""
+    safe_id = re.sub(r'[^\w.-]', '_', str(conversation_id))
+    return digest_dir / f"{safe_id}.json"
+
+def merge_into_digests(digest_dir: Path, messages: List[Dict]) -> List[str]:
+    """
+    merge messages into per-conversation digests.
+
+    merging is keyed by message id, so replaying a chunk after a crash
+    between digest write and checkpoint write leaves digests unchanged.
+    returns the conversation ids whose digest changed.
+    """
+    by_conversation: Dict[str, List[Dict]] = {}
+    for message in messages:
+        if message["text"]:
+            by_conversation.setdefault(message["conversation_id"], []).append(message)
+
+    now = datetime.now().isoformat(timespec="seconds")
+    touched = []
+    for conversation_id, new_messages in by_conversation.items():
+        path = digest_path(digest_dir, conversation_id)
+        digest = load_json_file(path, None) or {
+            "conversation_id": conversation_id,
+            "title": "",
+            "first_timestamp": None,
+            "last_timestamp": None,
+            "message_count": 0,
+            "messages": [],
+        }
+
+        seen = {m["id"] for m in digest["messages"]}
+        added = 0
+        for message in new_messages:
+            if message["id"] in seen:
+                continue
+            text = message["text"]
+            if len(text) > DIGEST_MAX_CHARS:
+                text = text[:DIGEST_MAX_CHARS] + " …"
+            digest["messages"].append({
+                "id": message["id"],
+                "timestamp": message["timestamp"].isoformat(),
+                "role": message["role"],
+                "text": text,
+            })
+            seen.add(message["id"])
+            added += 1
+
+        if not added:
+            continue
+
+        digest["title"] = new_messages[-1]["title"] or digest["title"]
+        digest["first_timestamp"] = digest["messages"][0]["timestamp"]
+        digest["last_timestamp"] = digest["messages"][-1]["timestamp"]
+        digest["message_count"] = len(digest["messages"])
+        digest["updated_at"] = now
+        write_json_atomic(path, digest)
+        touched.append(conversation_id)
+
+    return touched
+
+def ingest_conversations(
+    db_path: Path = CONVERSATIONS_DB,
+    out_dir: Path = INGEST_DIR,
+    chunk_size: int = INGEST_CHUNK_SIZE,
+    since: Optional[datetime] = None,
+    max_chunks: Optional[int] = None
+) -> Dict:
+    """
+    stream messages past the persisted watermark into conversation digests.
+
+    each chunk is merged into digests first and checkpointed second, so an
+    interrupted run resumes from the last completed chunk.
+    """
+    try:
+        import duckdb
+    except ImportError:
+        raise RuntimeError("duckdb is required for ingest. run: pip install duckdb")
+
+    checkpoint_path = out_dir / "checkpoint.json"
+    digest_dir = out_dir / "conversations"
+    checkpoint = load_json_file(checkpoint_path, {})
+
+    if checkpoint.get("timestamp"):
+        watermark = {
+            "timestamp": datetime.fromisoformat(checkpoint["timestamp"]),
+            "message_id": checkpoint["message_id"],
+        }
+    else:
+        watermark = {"timestamp": since or datetime(1970, 1, 1), "message_id": ""}
+
+    stats = {"chunks": 0, "messages": 0, "conversations": set(), "watermark": watermark["timestamp"]}
+
+    con = duckdb.connect(str(db_path), read_only=True)
+    try:
+        while max_chunks is None or stats["chunks"] < max_chunks:
+            messages = fetch_message_chunk(con, watermark, chunk_size)
+            if not messages:
+                break
+
+            touched = merge_into_digests(digest_dir, messages)
+
+            last = messages[-1]
+            watermark = {"timestamp": last["timestamp"], "message_id": last["id"]}
+            checkpoint.update({
+                "timestamp": last["timestamp"].isoformat(),
+                "message_id": last["id"],
+                "messages_ingested": checkpoint.get("messages_ingested", 0) + len(messages),
+                "updated_at": datetime.now().isoformat(timespec="seconds"),
+            })
+            write_json_atomic(checkpoint_path, checkpoint)
+
+            stats["chunks"] += 1
+            stats["messages"] += len(messages)
+            stats["conversations"].update(touched)
+            stats["watermark"] = last["timestamp"]
+            print(f"  chunk {stats['chunks']}: {len(messages)} messages, "
+                  f"{len(touched)} conversation(s) (watermark {last['timestamp']})")
+
+            if len(messages) < chunk_size:
+                break
+    finally:
+        con.close()
+
+    return stats
+
+# phrase -> rule index, matched against token n-grams
+_KEYWORD_RULES = {
+    phrase: rule
+    for rule, (_, _, phrases) in enumerate(CANDIDATE_KEYWORDS)
+    for phrase in phrases
+}
+_KEYWORD_RULES.update({phrase: "boost" for phrase in CANDIDATE_BOOST[0]})
+_KEYWORD_FIRST_TOKENS = {phrase.split()[0] for phrase in _KEYWORD_RULES}
+_KEYWORD_MAX_TOKENS = max(len(phrase.split()) for phrase in _KEYWORD_RULES)
+_CANDIDATE_REGEXES = [(t, re.compile(p), w) for t, p, w in CANDIDATE_PATTERNS]
+_TOKEN_PATTERN = re.compile(r"[a-z0-9'-]+")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+def classify_sentence(sentence: str) -> Optional[tuple[str, float, List[str]]]:
+    """
+    score a sentence against the keyword and regex rules.
+
+    each rule counts at most once. returns (format type, score, matched
+    signals) for the best-scoring type, or None when nothing matched.
+    """
+    tokens = _TOKEN_PATTERN.findall(sentence.lower().replace("\u2019", "'"))
+    matched = {}
+    for i, token in enumerate(tokens):
+        if token not in _KEYWORD_FIRST_TOKENS:
+            continue
+        for n in range(1, _KEYWORD_MAX_TOKENS + 1):
+            phrase = " ".join(tokens[i:i + n]) if n > 1 else token
+            rule = _KEYWORD_RULES.get(phrase)
+            if rule is not None and rule not in matched:
+                matched[rule] = phrase
+
+    scores: Dict[str, float] = {}
+    signals: List[str] = []
+    boost = matched.pop("boost", None)
+    for rule, phrase in matched.items():
+        mem_type, weight, _ = CANDIDATE_KEYWORDS[rule]
+        scores[mem_type] = scores.get(mem_type, 0.0) + weight
+        signals.append(phrase)
+
+    for mem_type, pattern, weight in _CANDIDATE_REGEXES:
+        match = pattern.search(sentence)
+        if match:
+            scores[mem_type] = scores.get(mem_type, 0.0) + weight
+            signals.append(match.group(0))
+
+    if not scores:
+        return None
+
+    best_type = max(scores, key=scores.get)
+    score = scores[best_type]
+    if boost:
+        score += CANDIDATE_BOOST[1]
+        signals.append(boost)
+
+    return best_type, score, signals
+
+def extract_candidates_from_digest(digest: Dict) -> List[Dict]:
+    """run the sentence classifiers over one conversation digest."""
+    topic = digest.get("title") or ""
+    candidates = []
+    for message in digest.get("messages", []):
+        role_weight = CANDIDATE_ROLE_WEIGHTS.get(message.get("role"), 0.5)
+        for sentence in _SENTENCE_SPLIT.split(message.get("text", "")):
+            sentence = sentence.strip()
+            if len(sentence) < 12:
+                continue
+            classified = classify_sentence(sentence)
+            if not classified:
+                continue
+            mem_type, score, signals = classified
+            score *= role_weight
+            if score < CANDIDATE_MIN_SCORE:
+                continue
+            candidates.append({
+                "type": mem_type,
+                "memory_dir": FORMAT_TYPE_DIRS.get(mem_type, mem_type),
+                "topic": topic or " ".join(sentence.split()[:6]),
+                "content": sentence[:CANDIDATE_MAX_CHARS],
+                "score": round(score, 2),
+                "signals": signals,
+                "conversation_id": digest.get("conversation_id"),
+                "message_id": message.get("id"),
+                "timestamp": message.get("timestamp"),
+                "role": message.get("role"),
+            })
+    return candidates
+
+def extract_candidates_from_files(paths: List[str]) -> tuple[List[Dict], int]:
+    """
+    process pool worker: classify a shard of digest files.
+
+    workers read the files themselves so only paths and results cross
+    the process boundary. returns (candidates, messages scanned).
+    """
+    candidates = []
+    message_count = 0
+    for path in paths:
+        digest = load_json_file(Path(path), None)
+        if not digest:
+            continue
+        message_count += len(digest.get("messages", []))
+        candidates.extend(extract_candidates_from_digest(digest))
+    # dedupe per shard so less crosses back to the parent
+    return rank_candidates(candidates), message_count
+
+def shard_paths(paths: List[Path], shard_count: int) -> List[List[str]]:
+    """split digests into shards of roughly equal total size."""
+    shards: List[List[str]] = [[] for _ in range(max(shard_count, 1))]
+    sizes = [0] * len(shards)
+    for path in sorted(paths, key=lambda p: p.stat().st_size, reverse=True):
+        smallest = sizes.index(min(sizes))
+        shards[smallest].append(str(path))
+        sizes[smallest] += path.stat().st_size
+    return [shard for shard in shards if shard]
+
+def rank_candidates(candidates: List[Dict]) -> List[Dict]:
+    """dedupe candidates by normalized content and sort by score."""
+    best: Dict[tuple, Dict] = {}
+    for candidate in candidates:
+        key = (candidate["type"], re.sub(r"\W+", " ", candidate["content"].lower()).strip())
+        if key not in best or candidate["score"] > best[key]["score"]:
+            best[key] = candidate
+    return sorted(best.values(), key=lambda c: (-c["score"], c["timestamp"] or ""))
+
+def load_candidates(path: Path) -> List[Dict]:
+    """candidates already in a jsonl file (skipping torn lines)."""
+    candidates = []
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    candidates.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return candidates
+
+def merge_candidates(existing: List[Dict], new: List[Dict]) -> List[Dict]:
+    """
+    add new candidates to ones not yet consumed, re-ranked.
+
+    a candidate re-extracted from the same message replaces the old copy.
+    """
+    merged = {(c.get("message_id"), c["content"]): c for c in existing}
+    merged.update({(c.get("message_id"), c["content"]): c for c in new})
+    return rank_candidates(list(merged.values()))
+
+def extract_candidates(
+    digest_dir: Path,
+    workers: int,
+    since: Optional[float] = None
+) -> tuple[List[Dict], int, int]:
+    """
+    shard digests across a process pool and collect ranked candidates.
+
+    only digests modified after `since` (epoch seconds) are scanned.
+    returns (ranked candidates, digests scanned, messages scanned).
+    """
+    paths = [
+        path for path in digest_dir.glob("*.json")
+        if since is None or path.stat().st_mtime > since
+    ]
+
+    if not paths:
+        return [], 0, 0
+
+    # a few shards per worker keeps the pool busy when digest sizes are skewed
+    shards = shard_paths(paths, workers * 4)
+    candidates: List[Dict] = []
+    message_count = 0
+
+    if workers <= 1:
+        results = map(extract_candidates_from_files, shards)
+        for shard_candidates, shard_messages in results:
+            candidates.extend(shard_candidates)
+            message_count += shard_messages
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for shard_candidates, shard_messages in pool.map(extract_candidates_from_files, shards):
+                candidates.extend(shard_candidates)
+                message_count += shard_messages
+
+    return rank_candidates(candidates), len(paths), message_count
+
+_LSA_TOKEN_PATTERN = re.compile(r"[a-z0-9]{2,}")
+
+def iter_memory_files():
+    """yield every memory markdown file across the type directories."""
+    for mem_type in MEMORY_TYPES:
+        type_dir = MEMORY_ROOT / mem_type
+        if type_dir.exists():
+            yield from type_dir.glob("*.md")
+
+def lsa_terms(text: str) -> Dict[str, int]:
+    """term counts for tf-idf, lowercased with stopwords dropped."""
+    counts: Dict[str, int] = {}
+    for token in _LSA_TOKEN_PATTERN.findall(text.lower()):
+        if token not in LSA_STOPWORDS:
+            counts[token] = counts.get(token, 0) + 1
+    return counts
+
+def memory_terms(filepath: Path) -> Dict[str, int]:
+    """term counts for a memory file (body + tags, frontmatter dates ignored)."""
+    frontmatter, body = parse_frontmatter(filepath.read_text())
+    tags = " ".join(normalize_tags(frontmatter.get("tags", [])))
+    return lsa_terms(f"{filepath.stem.replace('-', ' ')} {tags} {body}")
+
+def tfidf_matrix(np, term_counts: List[Dict[str, int]], vocab: Dict[str, int], idf):
+    """dense, l2-normalized sublinear tf-idf rows for the given documents."""
+    matrix = np.zeros((len(term_counts), len(vocab)), dtype=np.float32)
+    for row, counts in enumerate(term_counts):
+        for term, count in counts.items():
+            col = vocab.get(term)
+            if col is not None:
+                matrix[row, col] = 1.0 + np.log(count)
+    matrix *= idf
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def normalize_rows(np, vectors):
+    """l2-normalize rows so dot products are cosine similarities."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+def load_semantic_index(index_dir: Path = SEMANTIC_INDEX_DIR) -> tuple[Dict, Optional[Dict]]:
+    """load the persisted term statistics and lsa model (None if never fit)."""
+    import numpy as np
+
+    meta = load_json_file(index_dir / "index.json", {"docs": {}, "df": {}, "vocab": []})
+    model = None
+    model_path = index_dir / "model.npz"
+    if meta.get("vocab") and model_path.exists():
+        with np.load(model_path) as data:
+            model = {key: data[key] for key in data.files}
+    return meta, model
+
+def open_doc_store(index_dir: Path = SEMANTIC_INDEX_DIR, dim: Optional[int] = None):
+    """
+    open the quantized document vector store.
+
+    passing dim starts a fresh store (the svd basis changed on refit).
+    """
+    from vector_store import VectorStore
+
+    store_dir = index_dir / "vectors"
+    if dim is not None:
+        (store_dir / "table.json").unlink(missing_ok=True)
+        store = VectorStore(store_dir, dim=dim, dtype=LSA_STORE_DTYPE)
+        store.reset()
+        return store
+    return VectorStore(store_dir)
+
+def doc_store_ok(model: Optional[Dict], index_dir: Path = SEMANTIC_INDEX_DIR) -> bool:
+    """whether the document store exists, is readable and matches the model's dimensions."""
+    if model is None:
+        return False
+    try:
+        store = open_doc_store(index_dir)
+    except (ValueError, KeyError, OSError):
+        return False  # missing (indexes built before the store existed) or corrupt table
+    if store.dim != model["term_vectors"].shape[1]:
+        return False
+    return store.rows == 0 or (store.vectors_path.exists() and store.paths_path.exists())
+
+def save_semantic_index(meta: Dict, model: Dict, index_dir: Path = SEMANTIC_INDEX_DIR):
+    """persist term statistics and the lsa model."""
+    import numpy as np
+
+    index_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_dir / ".model.tmp.npz"
+    np.savez(tmp_path, **model)
+    os.replace(tmp_path, index_dir / "model.npz")
+    write_json_atomic(index_dir / "index.json", meta)
+
+def fit_lsa(np, meta: Dict, index_dir: Path = SEMANTIC_INDEX_DIR) -> Dict:
+    """fit tf-idf + truncated svd over every indexed document."""
+    paths = sorted(meta["docs"])
+    df = meta["df"]
+    # drop hapax terms once the corpus is big enough for them to be noise
+    min_df = 2 if len(paths) >= 50 else 1
+    terms = sorted(
+        (t for t, n in df.items() if n >= min_df),
+        key=lambda t: (-df[t], t)
+    )[:LSA_MAX_TERMS]
+    vocab = {term: col for col, term in enumerate(terms)}
+    meta["vocab"] = terms
+
+    started = time.monotonic()
+    n_docs = len(paths)
+    idf = np.array([np.log((1 + n_docs) / (1 + df[t])) + 1.0 for t in terms], dtype=np.float32)
+    matrix = tfidf_matrix(np, [meta["docs"][p]["terms"] for p in paths], vocab, idf)
+
+    k = max(1, min(LSA_COMPONENTS, n_docs - 1, len(terms)))
+    u, s, vt = np.linalg.svd(matrix, full_matrices=False)
+    term_vectors = vt[:k].T.astype(np.float32)
+
+    store = open_doc_store(index_dir, dim=k)
+    store.upsert(paths, normalize_rows(np, u[:, :k] * s[:k]))
+
+    meta["fit_seconds"] = round(time.monotonic() - started, 3)
+    meta["fitted_docs"] = n_docs
+    meta["fitted_at"] = datetime.now().isoformat(timespec="seconds")
+    meta["folded_docs"] = 0
+    return {"idf": idf, "term_vectors": term_vectors}
+
+def fold_in(np, meta: Dict, model: Dict, paths: List[str], index_dir: Path = SEMANTIC_INDEX_DIR):
+    """project new or changed documents into the existing lsa space."""
+    vocab = {term: col for col, term in enumerate(meta["vocab"])}
+    matrix = tfidf_matrix(np, [meta["docs"][p]["terms"] for p in paths], vocab, model["idf"])
+    open_doc_store(index_dir).upsert(paths, normalize_rows(np, matrix @ model["term_vectors"]))
+    meta["folded_docs"] = meta.get("folded_docs", 0) + len(paths)
+
+def estimate_refit_seconds(meta: Dict) -> float:
+    """expected refit time: the last fit's, scaled by how much the corpus grew since."""
+    fit_seconds = meta.get("fit_seconds")
+    if fit_seconds is None:
+        return LSA_REFIT_UNTIMED_SECONDS
+    return fit_seconds * max(len(meta["docs"]) / max(meta.get("fitted_docs", 1), 1), 1.0)
+
+def refresh_semantic_index(
+    rebuild: bool = False,
+    index_dir: Path = SEMANTIC_INDEX_DIR,
+    refit_budget: Optional[float] = None
+) -> tuple[Dict, Dict, Optional[Dict]]:
+    """
+    bring the local lsa index up to date with the memory corpus.
+
+    only files whose mtime changed are re-tokenized. changes are folded into
+    the existing svd basis until they exceed LSA_REFIT_FRACTION of the
+    fitted corpus, then the whole model is refit.
+
+    with `refit_budget` (seconds), a refit that the last one's timing says
+    won't fit is put off: changes are folded in if there is a model to fold
+    them into, otherwise nothing is written and the action is "deferred".
+    returns (summary of what changed, meta, model); the index as it now
+    stands, so callers don't have to load it again.
+    """
+    import numpy as np
+
+    meta, model = load_semantic_index(index_dir)
+    docs = meta["docs"]
+    df = meta["df"]
+
+    on_disk = {str(p): p.stat().st_mtime for p in iter_memory_files()}
+    removed = [p for p in docs if p not in on_disk]
+    changed = [p for p, mtime in on_disk.items() if docs.get(p, {}).get("mtime") != mtime]
+
+    for path in removed + changed:
+        for term in docs.get(path, {}).get("terms", {}):
+            df[term] -= 1
+            if df[term] <= 0:
+                del df[term]
+    for path in removed:
+        del docs[path]
+    for path in changed:
+        terms = memory_terms(Path(path))
+        docs[path] = {"mtime": on_disk[path], "terms": terms}
+        for term in terms:
+            df[term] = df.get(term, 0) + 1
+
+    summary = {"docs": len(docs), "changed": len(changed), "removed": len(removed), "action": "none"}
+    if not docs:
+        return summary, meta, model
+
+    dirty = len(changed) + len(removed) + meta.get("folded_docs", 0)
+    usable = doc_store_ok(model, index_dir)
+    refit = rebuild or not usable or dirty > LSA_REFIT_FRACTION * max(meta.get("fitted_docs", 0), 1)
+    if refit and refit_budget is not None and estimate_refit_seconds(meta) > refit_budget:
+        if not usable:
+            summary["action"] = "deferred"
+            return summary, meta, model
+        refit = False
+    if refit:
+        model = fit_lsa(np, meta, index_dir)
+        summary["action"] = "refit"
+    elif changed or removed:
+        if removed:
+            open_doc_store(index_dir).delete(removed)
+        if changed:
+            fold_in(np, meta, model, changed, index_dir)
+        summary["action"] = "fold-in"
+    else:
+        return summary, meta, model
+
+    save_semantic_index(meta, model, index_dir)
+    summary["terms"] = len(meta["vocab"])
+    summary["components"] = int(model["term_vectors"].shape[1])
+    return summary, meta, model
+
+def update_semantic_index(
+    rebuild: bool = False,
+    index_dir: Path = SEMANTIC_INDEX_DIR,
+    refit_budget: Optional[float] = None
+) -> Dict:
+    """bring the local lsa index up to date; returns a summary of what changed."""
+    return refresh_semantic_index(rebuild, index_dir, refit_budget)[0]
+
+def local_semantic_search(
+    query: str,
+    min_score: Optional[float] = None,
+    limit: int = 5,
+    refit_budget: Optional[float] = None
+) -> Optional[List[Dict]]:
+    """
+    semantic search over the local lsa index.
+
+    returns the same shape as search_memories: list of dicts with keys
+    path, score, context. returns None if the index needs a refit that
+    doesn't fit `refit_budget` (see update_semantic_index).
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        print("local semantic search needs numpy. run: pip install numpy")
+        return []
+
+    summary, meta, model = refresh_semantic_index(refit_budget=refit_budget)
+    if summary["action"] == "deferred":
+        return None
+    if model is None:
+        return []
+
+    vocab = {term: col for col, term in enumerate(meta["vocab"])}
+    query_vector = tfidf_matrix(np, [lsa_terms(query)], vocab, model["idf"]) @ model["term_vectors"]
+    query_vector = normalize_rows(np, query_vector)[0]
+    if not query_vector.any():
+        return []
+
+    try:
+        store = open_doc_store()
+    except (ValueError, KeyError, OSError):
+        return []
+
+    matches = []
+    for path_str, score in store.search(query_vector, limit=limit):
+        score = max(score, 0.0)
+        if min_score is not None and score < min_score:
+            break
+        path = Path(path_str)
+        _, body = parse_frontmatter(path.read_text()) if path.exists() else ({}, "")
+        matches.append({
+            "path": str(path),
+            "score": score,
+            "context": " ".join(body.split())[:100],
+        })
+    return matches
+
+def summary_threads(body: str, fields: List[str]) -> List[str]:
+    """comma/semicolon separated items (and bullet lines) under `**field:**` lines of a summary."""
+    threads = []
+    current = None
+    for line in body.splitlines():
+        line = line.strip()
+        match = re.match(r"\*\*([^*]+?):\*\*\s*(.*)", line)
+        if match:
+            current = match.group(1).strip().lower() in fields
+            text = match.group(2)
+        elif current and line.startswith(("-", "*")):
+            text = line[1:]
+        else:
+            current = current if not line else None
+            continue
+        if current:
+            threads.extend(part.strip(" .[]") for part in re.split(r"[,;]", text))
+    return [t for t in threads if t]
+
+def predict_queries(extra: Optional[List[str]] = None, limit: int = WARMUP_MAX_QUERIES) -> List[str]:
+    """
+    queries a session is likely to open with: explicit ones, the threads the
+    last exploration left open, and the names of recently touched context and
+    pattern memories.
+    """
+    def recent(paths):
+        return sorted(paths, key=lambda p: p.stat().st_mtime, reverse=True)
+
+    queries = list(extra or []) + WARMUP_BASE_QUERIES
+    explorations = recent((MEMORY_ROOT / "explorations").glob("*.md"))
+    if explorations:
+        _, body = parse_frontmatter(explorations[0].read_text())
+        queries.extend(summary_threads(body, WARMUP_THREAD_FIELDS))
+    for path in recent(p for t in ("context", "patterns") for p in (MEMORY_ROOT / t).glob("*.md"))[:5]:
+        queries.append(re.sub(r"^\d{4}-\d{2}(?:-\d{2})?-", "", path.stem).replace("-", " "))
+
+    seen = set()
+    unique = []
+    for query in queries:
+        query = " ".join(query.split())[:80]
+        if query and query.lower() not in seen:
+            seen.add(query.lower())
+            unique.append(query)
+    return unique[:limit]
+
+def run_qmd(args: List[str], timeout: float) -> tuple[str, str]:
+    """run a qmd maintenance command; returns (status, last line of output)."""
+    result = subprocess.run(["qmd", *args], capture_output=True, text=True, timeout=timeout)
+    output = (result.stdout if result.returncode == 0 else result.stderr).strip().splitlines()
+    return ("ok" if result.returncode == 0 else "failed"), (output[-1] if output else "")
+
+def warmup(budget: float = WARMUP_BUDGET, queries: Optional[List[str]] = None, use_qmd: bool = True) -> Dict:
+    """
+    pay a session's cold costs up front, within `budget` seconds: refresh the
+    qmd index and embeddings, fold dirty memories into the local lsa index,
+    then run the predicted queries (keyword and semantic) so their results
+    are cached. steps that don't fit in the budget are skipped.
+
+    returns {"steps": [{step, status, seconds, detail}], "queries": [...], "seconds": total}.
+    """
+    started = time.monotonic()
+    deadline = started + budget
+    steps = []
+    qmd_ok = use_qmd
+
+    def step(name, fn):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            steps.append({"step": name, "status": "skipped", "seconds": 0.0, "detail": "budget spent"})
+            return None
+        step_started = time.monotonic()
+        try:
+            status, detail = fn(remaining)
+        except subprocess.TimeoutExpired:
+            status, detail = "timeout", "ran out of budget"
+        except FileNotFoundError as e:
+            status, detail = "failed", f"not installed: {e.filename}"
+        except (OSError, ImportError) as e:
+            status, detail = "failed", str(e)
+        steps.append({"step": name, "status": status, "seconds": round(time.monotonic() - step_started, 2),
+                      "detail": detail})
+        return status
+
+    if use_qmd:
+        # the metadata index first: embed and search only see files qmd knows about
+        qmd_ok = step("qmd update", lambda remaining: run_qmd(["update"], remaining)) == "ok"
+        if qmd_ok:
+            step("qmd embed", lambda remaining: run_qmd(["embed"], remaining))
+
+    def semantic_index(remaining):
+        # tokenizing changed files is cheap; a refit is only started if it should fit what's left
+        summary = update_semantic_index(refit_budget=remaining)
+        status = "skipped" if summary["action"] == "deferred" else "ok"
+        return status, f"{summary['action']}, {summary['changed']} changed, {summary['removed']} removed"
+    step("local semantic index", semantic_index)
+
+    queries = predict_queries(queries)
+    def fill_cache(remaining):
+        filled = warm = uncached = 0
+        first_semantic = None
+        fingerprint = corpus_fingerprint()
+        # keyword search needs qmd; semantic search falls back to the local index by itself.
+        # keys match a plain `memory.py search [--semantic] QUERY`
+        modes = (False, True) if qmd_ok else (True,)
+        for query in queries:
+            for semantic in modes:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return "partial", f"{filled} filled, {warm} already cached, budget spent"
+                key = search_cache_key(query, semantic, None, 5, False, not use_qmd)
+                if key in load_search_cache(fingerprint)["entries"]:
+                    warm += 1
+                    continue
+                search_started = time.monotonic()
+                search_memories(query, semantic=semantic, local=not use_qmd, timeout=remaining)
+                if semantic and first_semantic is None:
+                    first_semantic = time.monotonic() - search_started
+                # fallbacks and deferred local searches aren't cached
+                if key in load_search_cache(fingerprint)["entries"]:
+                    filled += 1
+                else:
+                    uncached += 1
+        detail = f"{len(queries)} queries: {filled} filled, {warm} already cached"
+        if uncached:
+            detail += f", {uncached} not cacheable"
+        if first_semantic is not None:
+            # the first semantic search pays the embedding model load
+            detail += f", first semantic search {first_semantic:.1f}s"
+        return "ok", detail
+    step("search cache", fill_cache)
+
+    return {"steps": steps, "queries": queries, "seconds": round(time.monotonic() - started, 2)}
+
 def cmd_create(args):
     """create new memory."""
     tags = [t.strip() for t in args.tags.split(",")] if args.tags else []
@@ -517,7 +1553,9 @@ def cmd_search(args):
         semantic=args.semantic,
         min_score=args.min_score if hasattr(args, 'min_score') else None,
         limit=args.limit if hasattr(args, 'limit') else 5,
-        show_scores=args.show_scores if hasattr(args, 'show_scores') else False
+        show_scores=args.show_scores if hasattr(args, 'show_scores') else False,
+        local=args.local,
+        cache=not args.no_cache
     )
 
     if not results:
@@ -537,10 +1575,44 @@ def cmd_search(args):
             print(f"  {result['path']}")
 
 def cmd_get(args):
-    """retrieve memory."""
-    content = get_memory(args.path)
-    if content:
-        print(content)
+    """retrieve one or more memories."""
+    refs = list(args.paths)
+    if args.from_search:
+        results = search_memories(
+            query=args.from_search,
+            semantic=args.semantic,
+            limit=args.limit
+        )
+        refs.extend(r["path"] for r in results)
+
+    if not refs:
+        print("nothing to get (pass paths or --from-search)")
+        return
+
+    memories = get_memories(refs)
+
+    if args.json:
+        # unresolved refs stay in the list so callers can tell what is missing
+        print(json.dumps([
+            {k: m[k] for k in ("ref", "path", "frontmatter", "body")} if m["content"] or m["path"]
+            else {"ref": m["ref"], "path": None, "error": "memory not found"}
+            for m in memories
+        ], indent=2))
+        return
+
+    memories = [m for m in memories if m["content"] or m["path"]]
+
+    for i, memory in enumerate(memories):
+        if len(refs) > 1:
+            if i:
+                print()
+            print(f"==> {memory['path'] or memory['ref']} <==")
+        if args.body:
+            print(memory["body"])
+        elif args.frontmatter:
+            print(format_frontmatter(memory["frontmatter"]))
+        else:
+            print(memory["content"])
 
 def cmd_update(args):
     """update memory metadata."""
@@ -860,15 +1932,7 @@ def cmd_format(args):
 
     if args.create:
         # create the memory file
-        mem_type_dir = args.type
-        if args.type in ["preference", "technical", "decision", "principle"]:
-            mem_type_dir = "facts"
-        elif args.type == "project":
-            mem_type_dir = "context"
-        elif args.type in ["pattern", "meta_pattern", "consciousness"]:
-            mem_type_dir = "patterns"
-        elif args.type == "conversation_bridge":
-            mem_type_dir = "context"
+        mem_type_dir = FORMAT_TYPE_DIRS.get(args.type, args.type)
 
         # sanitize filename
         filename = re.sub(r'[^\w\s-]', '', args.topic.lower())
@@ -934,6 +1998,10 @@ def cmd_health(args):
     status = "✓" if health["embeddings_work"] else "✗"
     print(f"  {status} embeddings work: {health['embeddings_work']}")
     
+    # local semantic fallback
+    status = "✓" if health["semantic_index_docs"] else "–"
+    print(f"  {status} local semantic index: {health['semantic_index_docs']} docs")
+
     # disk usage
     print(f"  📊 disk usage: {health['disk_usage_mb']} MB")
     
@@ -945,6 +2013,142 @@ def cmd_health(args):
     else:
         print(f"\n  ✓ no errors detected")
 
+def cmd_ingest(args):
+    """ingest new conversation messages into per-conversation digests."""
+    db_path = Path(args.db)
+    out_dir = Path(args.out)
+
+    if not db_path.exists():
+        print(f"conversation database not found: {db_path}")
+        return
+
+    if args.reset:
+        (out_dir / "checkpoint.json").unlink(missing_ok=True)
+        print("✓ checkpoint cleared")
+
+    since = None
+    if args.since:
+        since = parse_date_str(args.since)
+        if not since:
+            print("invalid --since date (expected YYYY-MM-DD)")
+            return
+
+    print(f"📥 ingesting conversations from {db_path}\n")
+    started = time.monotonic()
+    try:
+        stats = ingest_conversations(
+            db_path=db_path,
+            out_dir=out_dir,
+            chunk_size=args.chunk_size,
+            since=since,
+            max_chunks=args.max_chunks
+        )
+    except RuntimeError as e:
+        print(f"error: {e}")
+        return
+    elapsed = time.monotonic() - started
+
+    if not stats["messages"]:
+        print(f"no new messages since {stats['watermark']}")
+        return
+
+    print(f"\n✓ ingested {stats['messages']} messages across "
+          f"{len(stats['conversations'])} conversation(s) in {elapsed:.1f}s")
+    print(f"  watermark: {stats['watermark']}")
+    print(f"  digests:   {out_dir / 'conversations'}")
+
+def cmd_extract(args):
+    """extract ranked candidate memories from ingested conversations."""
+    ingest_dir = Path(args.ingest_dir)
+    digest_dir = ingest_dir / "conversations"
+    checkpoint_path = ingest_dir / "extract-checkpoint.json"
+    out_path = Path(args.out) if args.out else ingest_dir / CANDIDATES_PATH.name
+
+    if not digest_dir.exists():
+        print(f"no digests found in {digest_dir}. run: python memory.py ingest")
+        return
+
+    checkpoint = load_json_file(checkpoint_path, {})
+    since = None if args.all else checkpoint.get("extracted_at")
+
+    run_started = time.time()
+    started = time.monotonic()
+    candidates, digest_count, message_count = extract_candidates(digest_dir, args.workers, since)
+    elapsed = time.monotonic() - started
+
+    if not digest_count:
+        print("no digests updated since last extract (use --all to rescan)")
+        return
+
+    # candidates from earlier runs stay until synthesis consumes the file
+    new_count = len(candidates)
+    candidates = merge_candidates(load_candidates(out_path), candidates)
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_name(f".{out_path.name}.tmp")
+    with open(tmp_path, "w") as f:
+        for candidate in candidates:
+            f.write(json.dumps(candidate) + "\n")
+    os.replace(tmp_path, out_path)
+
+    write_json_atomic(checkpoint_path, {
+        "extracted_at": run_started,
+        "digests": digest_count,
+        "messages": message_count,
+        "candidates": new_count,
+    })
+
+    rate = message_count / elapsed if elapsed > 0 else float("inf")
+    print(f"⛏️  scanned {message_count} messages in {digest_count} conversation(s) "
+          f"with {args.workers} worker(s)")
+    print(f"  {elapsed:.2f}s ({rate:,.0f} messages/sec)\n")
+
+    if not candidates:
+        print("no candidate memories found")
+        return
+
+    # --limit only trims the listing; the file keeps every candidate until it is consumed
+    shown = candidates[:args.limit or 10]
+    print(f"top candidates ({new_count} new, {len(candidates)} total):\n")
+    for candidate in shown:
+        print(f"  [{candidate['score']:.1f}] {candidate['type']} → {candidate['memory_dir']}/")
+        print(f"      {candidate['content'][:100]}")
+    print(f"\n✓ candidates written to {out_path}")
+
+def cmd_semantic_index(args):
+    """build or update the local semantic search index."""
+    try:
+        summary = update_semantic_index(rebuild=args.rebuild)
+    except ImportError:
+        print("local semantic index needs numpy. run: pip install numpy")
+        return
+
+    if not summary["docs"]:
+        print("no memories to index")
+        return
+
+    print(f"🧮 local semantic index: {summary['docs']} memories")
+    print(f"  changed: {summary['changed']}, removed: {summary['removed']}")
+    if summary["action"] == "none":
+        print("  ✓ already up to date")
+    else:
+        print(f"  ✓ {summary['action']} ({summary['terms']} terms, {summary['components']} components)")
+
+def cmd_warmup(args):
+    """warm indexes and the search cache before a session."""
+    report = warmup(budget=args.budget, queries=args.query, use_qmd=not args.no_qmd)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    icons = {"ok": "✓", "partial": "◐", "skipped": "⏭", "timeout": "⚠", "failed": "✗"}
+    print(f"🔥 warm-up (budget {args.budget:g}s)")
+    for step in report["steps"]:
+        print(f"  {icons.get(step['status'], '?')} {step['step']:<22} {step['seconds']:>6.1f}s  {step['detail']}")
+    if report["queries"]:
+        print(f"  queries: {', '.join(report['queries'])}")
+    print(f"✓ warmed in {report['seconds']:.1f}s")
+
 def main():
     parser = argparse.ArgumentParser(description="memory management cli")
     subparsers = parser.add_subparsers(dest="command", help="command")
@@ -968,11 +2172,20 @@ def main():
     search_parser.add_argument("--min-score", type=float, help="minimum similarity score (0.0-1.0, recommended >= 0.7)")
     search_parser.add_argument("--limit", type=int, default=5, help="number of results (default: 5)")
     search_parser.add_argument("--show-scores", action="store_true", help="display similarity scores")
+    search_parser.add_argument("--local", action="store_true", help="with --semantic, use the local lsa index instead of qmd")
+    search_parser.add_argument("--no-cache", action="store_true", help="skip the search result cache")
     search_parser.set_defaults(func=cmd_search)
     
     # get command
-    get_parser = subparsers.add_parser("get", help="retrieve memory")
-    get_parser.add_argument("path", help="memory path")
+    get_parser = subparsers.add_parser("get", help="retrieve memories")
+    get_parser.add_argument("paths", nargs="*", help="memory paths, qmd:// uris, or #docids")
+    get_parser.add_argument("--from-search", metavar="QUERY", help="also get every result of this search")
+    get_parser.add_argument("--semantic", action="store_true", help="with --from-search, use semantic search")
+    get_parser.add_argument("--limit", type=int, default=5, help="with --from-search, number of results (default: 5)")
+    get_output = get_parser.add_mutually_exclusive_group()
+    get_output.add_argument("--body", action="store_true", help="print body only")
+    get_output.add_argument("--frontmatter", action="store_true", help="print frontmatter only")
+    get_output.add_argument("--json", action="store_true", help="print json (ref, path, frontmatter, body)")
     get_parser.set_defaults(func=cmd_get)
     
     # update command
@@ -1037,6 +2250,38 @@ def main():
     health_parser = subparsers.add_parser("health", help="check memory system health")
     health_parser.set_defaults(func=cmd_health)
 
+    # semantic-index command
+    semantic_parser = subparsers.add_parser("semantic-index", help="update the local semantic search fallback index")
+    semantic_parser.add_argument("--rebuild", action="store_true", help="refit from scratch")
+    semantic_parser.set_defaults(func=cmd_semantic_index)
+
+    # ingest command
+    ingest_parser = subparsers.add_parser("ingest", help="ingest new conversations into digests")
+    ingest_parser.add_argument("--db", default=str(CONVERSATIONS_DB), help="conversation duckdb path")
+    ingest_parser.add_argument("--out", default=str(INGEST_DIR), help=f"digest + checkpoint directory (default: {INGEST_DIR})")
+    ingest_parser.add_argument("--chunk-size", type=int, default=INGEST_CHUNK_SIZE, help=f"messages per chunk (default: {INGEST_CHUNK_SIZE})")
+    ingest_parser.add_argument("--max-chunks", type=int, help="stop after N chunks (resume on next run)")
+    ingest_parser.add_argument("--since", help="start date for the first run (YYYY-MM-DD, default: everything)")
+    ingest_parser.add_argument("--reset", action="store_true", help="discard the checkpoint and re-ingest")
+    ingest_parser.set_defaults(func=cmd_ingest)
+
+    # extract command
+    extract_parser = subparsers.add_parser("extract", help="extract candidate memories from ingested conversations")
+    extract_parser.add_argument("--ingest-dir", default=str(INGEST_DIR), help=f"ingest output directory (default: {INGEST_DIR})")
+    extract_parser.add_argument("--out", help=f"candidates jsonl path (default: <ingest-dir>/{CANDIDATES_PATH.name})")
+    extract_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (default: cpu count)")
+    extract_parser.add_argument("--limit", type=int, help="top candidates to list (default: 10); the file always keeps all of them")
+    extract_parser.add_argument("--all", action="store_true", help="rescan all digests, not just ones updated since last extract")
+    extract_parser.set_defaults(func=cmd_extract)
+
+    # warmup command
+    warmup_parser = subparsers.add_parser("warmup", help="refresh indexes and pre-fill the search cache before a session")
+    warmup_parser.add_argument("--budget", type=float, default=WARMUP_BUDGET, help=f"seconds to spend (default: {WARMUP_BUDGET})")
+    warmup_parser.add_argument("--query", action="append", help="extra query to warm (repeatable)")
+    warmup_parser.add_argument("--no-qmd", action="store_true", help="skip qmd; warm only the local index")
+    warmup_parser.add_argument("--json", action="store_true", help="print the report as json")
+    warmup_parser.set_defaults(func=cmd_warmup)
+
     args = parser.parse_args()
     
     if not args.command:
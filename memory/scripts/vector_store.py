@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+quantized, memory-mapped vector store
+compact on-disk embeddings for memories: int8 or float16 rows opened with
+np.memmap, a path -> row table, and tombstones for deleted memories.
+
+layout of a store directory:
+  vectors.bin   raw row-major matrix (int8 or float16), rows x dim
+  scales.bin    float32 per-row scale (int8 only): vector = row * scale
+  paths.txt     one path per row, in row order
+  table.json    dtype, dim, row count, tombstoned rows
+
+opening a store reads only the small table; the path list is read on first
+lookup and vectors are paged in by the os as scans touch them, block by block.
+"""
+
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+STORE_DTYPES = {"int8": np.int8, "float16": np.float16}
+SCAN_BLOCK_ROWS = 8192
+COMPACT_TOMBSTONE_FRACTION = 0.25
+
+def quantize(vectors: np.ndarray, dtype: str) -> tuple[np.ndarray, np.ndarray]:
+    """quantize float rows; returns (quantized rows, per-row float32 scales)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "float16":
+        return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+
+    # symmetric per-row int8: the largest component maps to +-127
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+class VectorStore:
+    """append-friendly quantized vector store backed by np.memmap."""
+
+    def __init__(self, directory: Path, dim: Optional[int] = None, dtype: str = "int8"):
+        self.directory = Path(directory)
+        table = self._load_table()
+        if table:
+            self.dtype = table["dtype"]
+            self.dim = table["dim"]
+            self.rows = table["rows"]
+            self.paths_bytes = table["paths_bytes"]
+            self.tombstones = set(table["tombstones"])
+        else:
+            if dim is None:
+                raise ValueError(f"no vector store at {self.directory} and no dim given")
+            if dtype not in STORE_DTYPES:
+                raise ValueError(f"unsupported dtype: {dtype}")
+            self.dtype = dtype
+            self.dim = dim
+            self.rows = 0
+            self.paths_bytes = 0
+            self.tombstones = set()
+        self._row_paths: Optional[List[str]] = None
+        self._paths: Optional[Dict[str, int]] = None
+        self._vectors = None
+        self._scales = None
+
+    # -- persistence ---------------------------------------------------------
+
+    @property
+    def vectors_path(self) -> Path:
+        return self.directory / "vectors.bin"
+
+    @property
+    def scales_path(self) -> Path:
+        return self.directory / "scales.bin"
+
+    @property
+    def paths_path(self) -> Path:
+        return self.directory / "paths.txt"
+
+    @property
+    def table_path(self) -> Path:
+        return self.directory / "table.json"
+
+    def _load_table(self) -> Optional[Dict]:
+        try:
+            return json.loads(self.table_path.read_text())
+        except FileNotFoundError:
+            return None
+
+    def _save_table(self):
+        """write the table last: rows past table["rows"] are ignored on open."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.directory / ".table.json.tmp"
+        tmp_path.write_text(json.dumps({
+            "dtype": self.dtype,
+            "dim": self.dim,
+            "rows": self.rows,
+            "paths_bytes": self.paths_bytes,
+            "tombstones": sorted(self.tombstones),
+        }))
+        os.replace(tmp_path, self.table_path)
+
+    def _open_maps(self, mode: str = "r"):
+        """memory-map the matrix and scales (zero-copy)."""
+        if self.rows == 0:
+            return None, None
+        vectors = np.memmap(self.vectors_path, dtype=STORE_DTYPES[self.dtype], mode=mode,
+                            shape=(self.rows, self.dim))
+        scales = np.memmap(self.scales_path, dtype=np.float32, mode=mode, shape=(self.rows,))
+        return vectors, scales
+
+    @property
+    def vectors(self):
+        if self._vectors is None:
+            self._vectors, self._scales = self._open_maps()
+        return self._vectors
+
+    @property
+    def scales(self):
+        if self._scales is None:
+            self._vectors, self._scales = self._open_maps()
+        return self._scales
+
+    def _invalidate(self):
+        self._vectors = None
+        self._scales = None
+
+    def row_paths(self) -> List[str]:
+        """path for every row, including tombstoned ones."""
+        if self._row_paths is None:
+            if self.rows:
+                with open(self.paths_path, "rb") as f:
+                    data = f.read(self.paths_bytes)
+                self._row_paths = data.decode().split("\n")[:self.rows]
+            else:
+                self._row_paths = []
+        return self._row_paths
+
+    @property
+    def paths(self) -> Dict[str, int]:
+        """live path -> row table."""
+        if self._paths is None:
+            self._paths = {
+                path: row for row, path in enumerate(self.row_paths())
+                if row not in self.tombstones
+            }
+        return self._paths
+
+    # -- mutation ------------------------------------------------------------
+
+    def upsert(self, paths: List[str], vectors: np.ndarray):
+        """write vectors for paths: existing rows in place, new rows appended."""
+        if len(paths) == 0:
+            return
+        quantized, scales = quantize(vectors, self.dtype)
+        if quantized.shape[1] != self.dim:
+            raise ValueError(f"expected dim {self.dim}, got {quantized.shape[1]}")
+
+        existing = [(i, self.paths[p]) for i, p in enumerate(paths) if p in self.paths]
+        new = [i for i, p in enumerate(paths) if p not in self.paths]
+
+        if existing:
+            vector_map, scale_map = self._open_maps(mode="r+")
+            for i, row in existing:
+                vector_map[row] = quantized[i]
+                scale_map[row] = scales[i]
+            vector_map.flush()
+            scale_map.flush()
+            del vector_map, scale_map
+
+        if new:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            row_paths = self.row_paths()
+            live = self.paths
+            # truncate anything a crashed writer appended past the table
+            item_size = np.dtype(STORE_DTYPES[self.dtype]).itemsize
+            for path, size in ((self.vectors_path, self.rows * self.dim * item_size),
+                               (self.scales_path, self.rows * 4),
+                               (self.paths_path, self.paths_bytes)):
+                with open(path, "ab") as f:
+                    f.truncate(size)
+            new_paths = "".join(f"{paths[i]}\n" for i in new).encode()
+            with open(self.vectors_path, "ab") as f:
+                f.write(quantized[new].tobytes())
+            with open(self.scales_path, "ab") as f:
+                f.write(scales[new].tobytes())
+            with open(self.paths_path, "ab") as f:
+                f.write(new_paths)
+            for offset, i in enumerate(new):
+                live[paths[i]] = self.rows + offset
+                row_paths.append(paths[i])
+            self.rows += len(new)
+            self.paths_bytes += len(new_paths)
+
+        self._invalidate()
+        self._save_table()
+
+    def delete(self, paths: List[str]):
+        """tombstone rows; space is reclaimed by compact()."""
+        live = self.paths
+        for path in paths:
+            row = live.pop(path, None)
+            if row is not None:
+                self.tombstones.add(row)
+        if self.rows and len(self.tombstones) > COMPACT_TOMBSTONE_FRACTION * self.rows:
+            self.compact()
+        else:
+            self._save_table()
+
+    def compact(self):
+        """rewrite the store without tombstoned rows."""
+        live = sorted(self.paths.items(), key=lambda item: item[1])
+        rows = np.array([row for _, row in live], dtype=np.int64)
+        vectors, scales = self._open_maps()
+        kept_vectors = np.array(vectors[rows]) if len(rows) else np.empty((0, self.dim))
+        kept_scales = np.array(scales[rows]) if len(rows) else np.empty(0)
+        del vectors, scales
+        self._invalidate()
+
+        for path, data in ((self.vectors_path, kept_vectors), (self.scales_path, kept_scales)):
+            tmp_path = path.with_name(f".{path.name}.tmp")
+            tmp_path.write_bytes(data.astype(
+                STORE_DTYPES[self.dtype] if path == self.vectors_path else np.float32
+            ).tobytes())
+            os.replace(tmp_path, path)
+
+        paths_data = "".join(f"{path}\n" for path, _ in live).encode()
+        tmp_path = self.paths_path.with_name(f".{self.paths_path.name}.tmp")
+        tmp_path.write_bytes(paths_data)
+        os.replace(tmp_path, self.paths_path)
+
+        self._paths = {path: row for row, (path, _) in enumerate(live)}
+        self._row_paths = [path for path, _ in live]
+        self.rows = len(live)
+        self.paths_bytes = len(paths_data)
+        self.tombstones = set()
+        self._save_table()
+
+    def reset(self):
+        """drop every row (used when the embedding basis changes)."""
+        for path in (self.vectors_path, self.scales_path, self.paths_path):
+            path.unlink(missing_ok=True)
+        self.rows = 0
+        self.paths_bytes = 0
+        self.tombstones = set()
+        self._paths = {}
+        self._row_paths = []
+        self._invalidate()
+        self._save_table()
+
+    # -- queries -------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self.rows - len(self.tombstones)
+
+    def get(self, path: str) -> Optional[np.ndarray]:
+        """dequantized vector for a path."""
+        row = self.paths.get(path)
+        if row is None:
+            return None
+        return self.vectors[row].astype(np.float32) * self.scales[row]
+
+    def search(self, query: np.ndarray, limit: int = 5, block_rows: int = SCAN_BLOCK_ROWS) -> List[tuple[str, float]]:
+        """
+        top-k dot-product scan over the store, one block at a time.
+
+        only one dequantized block is materialized, so peak memory stays at
+        block_rows x dim float32 regardless of store size.
+        """
+        if not len(self):
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        vectors, scales = self.vectors, self.scales
+        tombstones = np.array(sorted(self.tombstones), dtype=np.int64)
+
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start in range(0, self.rows, block_rows):
+            end = min(start + block_rows, self.rows)
+            scores = (vectors[start:end].astype(np.float32) @ query) * scales[start:end]
+            if len(tombstones):
+                dead = tombstones[(tombstones >= start) & (tombstones < end)] - start
+                scores[dead] = -np.inf
+            rows = np.arange(start, end)
+            if len(scores) > limit:
+                top = np.argpartition(-scores, limit)[:limit]
+                rows, scores = rows[top], scores[top]
+            best_rows = np.concatenate([best_rows, rows])
+            best_scores = np.concatenate([best_scores, scores])
+
+        order = np.argsort(-best_scores)[:limit]
+        row_paths = self.row_paths()
+        return [
+            (row_paths[best_rows[i]], float(best_scores[i]))
+            for i in order
+            if np.isfinite(best_scores[i])
+        ]
+
+# -- benchmark ---------------------------------------------------------------
+
+def current_rss_mb() -> float:
+    """resident set size of this process in MB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def bench_load(fmt: str, path: str, dim: int):
+    """child process: load one format, run one query, print json metrics."""
+    query = np.random.default_rng(1).standard_normal(dim).astype(np.float32)
+    baseline = current_rss_mb()
+
+    started = time.perf_counter()
+    if fmt == "json":
+        with open(path) as f:
+            data = json.load(f)
+        paths, matrix = data["paths"], np.array(data["vectors"], dtype=np.float32)
+    elif fmt == "pickle":
+        with open(path, "rb") as f:
+            paths, matrix = pickle.load(f)
+    else:
+        store = VectorStore(Path(path))
+    load_seconds = time.perf_counter() - started
+    load_rss = current_rss_mb() - baseline
+
+    started = time.perf_counter()
+    if fmt in ("json", "pickle"):
+        scores = matrix @ query
+        top = np.argsort(-scores)[:10]
+        _ = [paths[i] for i in top]
+    else:
+        store.search(query, limit=10)
+    query_seconds = time.perf_counter() - started
+
+    print(json.dumps({
+        "load_ms": load_seconds * 1000,
+        "load_rss_mb": load_rss,
+        "query_ms": query_seconds * 1000,
+        "after_query_rss_mb": current_rss_mb() - baseline,
+    }))
+
+def run_bench(rows: int, dim: int):
+    """compare load time and rss of the store against float32 json/pickle."""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((rows, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    paths = [f"/home/workspace/Memory/facts/memory-{i}.md" for i in range(rows)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        targets = {}
+
+        json_path = tmp_dir / "vectors.json"
+        json_path.write_text(json.dumps({"paths": paths, "vectors": vectors.tolist()}))
+        targets["json float32"] = ("json", json_path)
+
+        pickle_path = tmp_dir / "vectors.pkl"
+        with open(pickle_path, "wb") as f:
+            pickle.dump((paths, vectors), f)
+        targets["pickle float32"] = ("pickle", pickle_path)
+
+        for dtype in ("float16", "int8"):
+            store = VectorStore(tmp_dir / dtype, dim=dim, dtype=dtype)
+            store.upsert(paths, vectors)
+            targets[f"memmap {dtype}"] = ("store", tmp_dir / dtype)
+
+        print(f"📏 vector store benchmark: {rows} rows x {dim} dims\n")
+        print(f"  {'format':16} {'disk MB':>8} {'load ms':>9} {'load RSS':>9} {'query ms':>9} {'query RSS':>10}")
+        for label, (fmt, path) in targets.items():
+            disk = sum(p.stat().st_size for p in Path(path).glob("*")) if path.is_dir() else path.stat().st_size
+            result = subprocess.run(
+                [sys.executable, __file__, "_load", fmt, str(path), str(dim)],
+                capture_output=True, text=True, check=True
+            )
+            m = json.loads(result.stdout)
+            print(f"  {label:16} {disk / 1e6:8.1f} {m['load_ms']:9.1f} {m['load_rss_mb']:8.1f}M "
+                  f"{m['query_ms']:9.1f} {m['after_query_rss_mb']:9.1f}M")
+        print("\n  RSS is the increase over the interpreter + numpy baseline.")
+        print("  memmap pages touched by a scan are file-backed and reclaimable.")
+
+def main():
+    parser = argparse.ArgumentParser(description="quantized memory-mapped vector store")
+    subparsers = parser.add_subparsers(dest="command", help="command")
+
+    bench_parser = subparsers.add_parser("bench", help="compare load time and rss against float32 json/pickle")
+    bench_parser.add_argument("--rows", type=int, default=50000, help="number of vectors (default: 50000)")
+    bench_parser.add_argument("--dim", type=int, default=128, help="vector dimensions (default: 128)")
+
+    stats_parser = subparsers.add_parser("stats", help="show store statistics")
+    stats_parser.add_argument("path", help="store directory")
+
+    load_parser = subparsers.add_parser("_load")
+    load_parser.add_argument("fmt")
+    load_parser.add_argument("path")
+    load_parser.add_argument("dim", type=int)
+
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        run_bench(args.rows, args.dim)
+    elif args.command == "stats":
+        store = VectorStore(Path(args.path))
+        size = sum(p.stat().st_size for p in Path(args.path).glob("*.bin"))
+        print(f"📦 {args.path}")
+        print(f"  dtype: {store.dtype}, dim: {store.dim}")
+        print(f"  live rows: {len(store)}, tombstones: {len(store.tombstones)}")
+        print(f"  size: {size / 1e6:.2f} MB")
+    elif args.command == "_load":
+        bench_load(args.fmt, args.path, args.dim)
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
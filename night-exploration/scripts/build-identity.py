@@ -4,6 +4,7 @@ build identity prompt from memories
 loads personality, context, and instructions for exploration sessions
 """
 
+import os
 import sys
 from pathlib import Path
 from datetime import datetime
@@ -12,7 +13,8 @@ from datetime import datetime
 MEMORY_DIR = Path("/home/workspace/Memory")
 SKILL_DIR = Path("/home/workspace/Skills/night-exploration")
 EXPLORER_FILE = SKILL_DIR / "scripts/explorer.md"
-OUTPUT_FILE = Path("/home/.z/workspaces/night-exploration/identity-prompt.txt")
+# the scheduler gives each session its own prompt file
+OUTPUT_FILE = Path(os.environ.get("IDENTITY_PROMPT", "/home/.z/workspaces/night-exploration/identity-prompt.txt"))
 
 def load_memory(path: Path) -> dict:
     """parse memory file (frontmatter + content)."""
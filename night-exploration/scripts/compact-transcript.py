@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+compact a raw tmux transcript into readable text
+
+tmux pipe-pane captures every byte the terminal saw: colors, spinner frames,
+cursor moves and full-screen redraws. this replays the log through a small
+virtual terminal that only keeps the last few screens, strips escape
+sequences, drops lines repeated by a redraw and collapses runs of identical
+lines. it streams: memory stays bounded however long the session runs.
+
+usage:
+  compact-transcript.py tmux.log --out transcript.txt.gz
+  compact-transcript.py tmux.log --follow --pid 1234    # tail until pid exits
+  cat tmux.log | compact-transcript.py - --out transcript.txt
+"""
+
+import argparse
+import codecs
+import gzip
+import os
+import re
+import signal
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_ROWS = 50
+MAX_LINE = 4096  # columns kept per line; anything wider is a runaway
+MAX_HELD_ESCAPE = 4096  # an unterminated escape longer than this is dropped
+FRAME_MEMORY = 2000  # lines of the previous frame remembered for redraw dedupe
+FOLLOW_INTERVAL = 0.5
+
+# CSI, OSC, DCS/SOS/PM/APC strings and two-character escapes
+ESCAPE = re.compile(r"""
+    \x1b\[ (?P<params>[0-?]*) [ -/]* (?P<final>[@-~])
+  | \x1b\] [^\x07\x1b]* (?:\x07|\x1b\\)
+  | \x1b[PX^_] [^\x1b]* \x1b\\
+  | \x1b (?P<short>[ -/]*[0-~])
+""", re.VERBOSE)
+CONTROL = re.compile(r"[\x00-\x1f\x7f]")
+
+class Line:
+    __slots__ = ('chars', 'frame')
+
+    def __init__(self, frame):
+        self.chars = []
+        self.frame = frame
+
+    def text(self):
+        return "".join(self.chars).rstrip()
+
+class Terminal:
+    """
+    the bottom of a terminal, just deep enough to apply redraws.
+
+    lines live in a window of `rows * 2` lines; once a line scrolls out of
+    it nothing can rewrite it anymore and it is handed to `emit` with the
+    frame it was drawn in. a clear screen starts a new frame.
+    """
+
+    def __init__(self, emit, rows=DEFAULT_ROWS):
+        self.emit = emit
+        self.rows = rows
+        self.window = rows * 2
+        self.lines = deque()
+        self.row = 0  # cursor, as an index into lines
+        self.col = 0
+        self.top = 0  # index of the screen's first row, for absolute moves
+        self.frame = 0
+        self.saved = (0, 0)
+
+    def _line(self):
+        while self.row >= len(self.lines):
+            self.lines.append(Line(self.frame))
+        return self.lines[self.row]
+
+    def _scroll(self):
+        if self.row - self.top >= self.rows:
+            self.top = self.row - self.rows + 1
+        while len(self.lines) > self.window and self.row > 0 and self.top > 0:
+            line = self.lines.popleft()
+            self.row -= 1
+            self.top -= 1
+            self.emit(line.text(), line.frame)
+
+    def write(self, text):
+        """plain text with control characters already split out."""
+        if self.col >= MAX_LINE:
+            return
+        text = text[:MAX_LINE - self.col]
+        chars = self._line().chars
+        if self.col > len(chars):
+            chars.extend(" " * (self.col - len(chars)))
+        chars[self.col:self.col + len(text)] = text
+        self.col += len(text)
+
+    def control(self, ch):
+        if ch == "\n":
+            self.row += 1
+            self.col = 0
+            self._scroll()
+        elif ch == "\r":
+            self.col = 0
+        elif ch == "\b":
+            self.col = max(0, self.col - 1)
+        elif ch == "\t":
+            self.col = (self.col // 8 + 1) * 8
+
+    def move(self, row=None, col=None):
+        if row is not None:
+            self.row = max(0, min(row, len(self.lines) + self.rows))
+            self._scroll()
+        if col is not None:
+            self.col = max(0, min(col, MAX_LINE))
+
+    def new_frame(self):
+        """clear screen: keep what was drawn, start a fresh screen below it."""
+        if self.row < len(self.lines) and self.lines[self.row].chars:
+            self.row += 1
+        self.row = self.top = max(self.row, len(self.lines))
+        self.col = 0
+        self.frame += 1
+        self._scroll()
+
+    def erase_line(self, mode):
+        chars = self._line().chars
+        if mode == 0:
+            del chars[self.col:]
+        elif mode == 1:
+            chars[:self.col + 1] = " " * min(len(chars), self.col + 1)
+        else:
+            chars.clear()
+
+    def erase_display(self, mode):
+        if mode in (2, 3):
+            self.new_frame()
+            return
+        if mode == 0:
+            self.erase_line(0)
+            while len(self.lines) > self.row + 1:
+                self.lines.pop()
+        else:
+            for line in list(self.lines)[self.top:self.row]:
+                line.chars.clear()
+            self.erase_line(1)
+
+    def csi(self, params, final):
+        private = params.startswith(("?", ">", "<", "="))
+        if private:
+            # alternate screen on/off redraws everything: a new frame
+            if final in "hl" and params[1:].split(";")[0] in ("47", "1047", "1049"):
+                self.new_frame()
+            return
+        args = [int(p) if p.isdigit() else 0 for p in params.split(";")] if params else []
+        n = args[0] if args and args[0] else 1
+        if final == "A":
+            self.move(row=self.row - n)
+        elif final in "Be":
+            self.move(row=self.row + n)
+        elif final in "Ca":
+            self.move(col=self.col + n)
+        elif final == "D":
+            self.move(col=self.col - n)
+        elif final == "E":
+            self.move(row=self.row + n, col=0)
+        elif final == "F":
+            self.move(row=self.row - n, col=0)
+        elif final in "G`":
+            self.move(col=n - 1)
+        elif final == "d":
+            self.move(row=self.top + n - 1)
+        elif final in "Hf":
+            row = args[0] if args and args[0] else 1
+            col = args[1] if len(args) > 1 and args[1] else 1
+            self.move(row=self.top + row - 1, col=col - 1)
+        elif final == "K":
+            self.erase_line(args[0] if args else 0)
+        elif final == "J":
+            self.erase_display(args[0] if args else 0)
+        elif final == "s":
+            self.saved = (self.row, self.col)
+        elif final == "u":
+            self.move(*self.saved)
+        # colors (m), scroll regions and everything else don't change the text
+
+    def escape(self, match):
+        if match.group("final"):
+            self.csi(match.group("params"), match.group("final"))
+        elif match.group("short") == "c":
+            self.new_frame()
+        elif match.group("short") == "7":
+            self.saved = (self.row, self.col)
+        elif match.group("short") == "8":
+            self.move(*self.saved)
+        # OSC titles, DCS strings and charset selects are dropped
+
+    def feed(self, text):
+        """feed decoded text. returns a trailing incomplete escape to prepend next time."""
+        pos = 0
+        for match in ESCAPE.finditer(text):
+            self._plain(text[pos:match.start()])
+            self.escape(match)
+            pos = match.end()
+        rest = text[pos:]
+        held = rest.find("\x1b")
+        if held >= 0 and len(rest) - held < MAX_HELD_ESCAPE:
+            self._plain(rest[:held])
+            return rest[held:]
+        self._plain(rest.replace("\x1b", ""))
+        return ""
+
+    def _plain(self, text):
+        pos = 0
+        for match in CONTROL.finditer(text):
+            if match.start() > pos:
+                self.write(text[pos:match.start()])
+            self.control(match.group())
+            pos = match.end()
+        if pos < len(text):
+            self.write(text[pos:])
+
+    def close(self):
+        """emit everything still on screen."""
+        while self.lines:
+            line = self.lines.popleft()
+            self.emit(line.text(), line.frame)
+
+class Compactor:
+    """
+    writes finished lines, dropping what the previous frame already showed
+    and collapsing runs of identical or blank lines.
+    """
+
+    def __init__(self, out):
+        self.out = out
+        self.frame = 0
+        self.previous = set()
+        self.current = set()
+        self.last = None
+        self.repeats = 0
+        self.lines_in = 0
+        self.lines_out = 0
+
+    def __call__(self, text, frame):
+        self.lines_in += 1
+        if frame != self.frame:
+            self.frame = frame
+            self.previous, self.current = self.current, set()
+        if text:
+            if len(self.current) < FRAME_MEMORY:
+                self.current.add(text)
+            if text in self.previous:
+                return
+
+        if text == self.last:
+            self.repeats += 1
+            return
+        self._flush_repeats()
+        self.last = text
+        self.out.write(text + "\n")
+        self.lines_out += 1
+
+    def _flush_repeats(self):
+        if self.repeats and self.last:
+            self.out.write(f"  [previous line repeated {self.repeats} more time(s)]\n")
+            self.lines_out += 1
+        self.repeats = 0
+
+    def close(self):
+        self._flush_repeats()
+
+def open_output(path, compress):
+    if path == "-":
+        return sys.stdout
+    if compress or path.endswith(".gz"):
+        return gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+    return open(path, "w", encoding="utf-8")
+
+def default_output(source, compress):
+    if source == "-":
+        return "-"
+    base = source[:-4] if source.endswith(".log") else source
+    return f"{base}.txt" + (".gz" if compress else "")
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def compact(source, out, rows=DEFAULT_ROWS, follow=False, pid=None):
+    """
+    stream `source` (a path, or "-" for stdin) through the terminal into `out`.
+
+    with `follow`, keeps reading as the file grows until SIGTERM/SIGINT, or
+    until `pid` exits, then drains what is left. returns (bytes read, Compactor).
+    """
+    stop = []
+    if follow:
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda *_: stop.append(True))
+
+    if source == "-":
+        stream = sys.stdin.buffer
+    else:
+        while follow and not os.path.exists(source) and not stop:
+            time.sleep(FOLLOW_INTERVAL)
+        stream = open(source, "rb")
+
+    compactor = Compactor(out)
+    terminal = Terminal(compactor, rows)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    held = ""
+    read = 0
+    draining = False
+    try:
+        while True:
+            chunk = stream.read1(CHUNK_SIZE)
+            if chunk:
+                read += len(chunk)
+                held = terminal.feed(held + decoder.decode(chunk))
+                continue
+            if not follow or source == "-" or draining:
+                break
+            # after a stop, one more pass picks up anything written just before it
+            draining = bool(stop) or bool(pid and not pid_alive(pid))
+            if not draining:
+                time.sleep(FOLLOW_INTERVAL)
+        terminal.feed(held + decoder.decode(b"", final=True))
+        terminal.close()
+        compactor.close()
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+    return read, compactor
+
+def format_size(n):
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
+    return f"{n:.1f}GB"
+
+def main():
+    parser = argparse.ArgumentParser(description="compact a raw tmux transcript")
+    parser.add_argument("source", help="raw log path, or - for stdin")
+    parser.add_argument("--out", help="output path, - for stdout (default: SOURCE with .txt[.gz])")
+    parser.add_argument("--gzip", action="store_true", help="gzip the output (implied by a .gz --out)")
+    parser.add_argument("--follow", action="store_true", help="keep tailing the log until SIGTERM or --pid exits")
+    parser.add_argument("--pid", type=int, help="with --follow, stop once this process exits")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help=f"terminal height (default: {DEFAULT_ROWS})")
+    args = parser.parse_args()
+
+    out_path = args.out or default_output(args.source, args.gzip)
+    started = time.monotonic()
+    out = open_output(out_path, args.gzip)
+    try:
+        read, compactor = compact(args.source, out, rows=args.rows, follow=args.follow, pid=args.pid)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    report = sys.stderr if out_path == "-" else sys.stdout
+    if out_path == "-":
+        print(f"compacted {format_size(read)}, {compactor.lines_in} → {compactor.lines_out} lines", file=report)
+        return
+    written = Path(out_path).stat().st_size
+    ratio = read / written if written else 0.0
+    print(
+        f"✓ compacted {format_size(read)} → {format_size(written)} ({ratio:.1f}x), "
+        f"{compactor.lines_in} → {compactor.lines_out} lines in {time.monotonic() - started:.1f}s",
+        file=report
+    )
+    print(f"  transcript: {out_path}", file=report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+keep the exploration index current and searchable
+
+each indexed session is appended to `Memory/explorations/index.jsonl`; the log
+is folded into `index.json` (the file `mem explore` reads) once it grows or
+ages past a threshold, so adding a session never rewrites the whole index.
+
+summaries and compacted transcripts also go into a sqlite fts5 index, split
+into chunks, so past sessions can be searched by topic and date without
+opening every file. files are only re-read when their size or mtime changes.
+
+usage:
+  index-explorations.py scan                          # pick up new/changed files
+  index-explorations.py add --since 1760000000 --transcript t.txt.gz
+  index-explorations.py search "vector store" --since 2026-09-01
+  index-explorations.py compact                       # fold the log into index.json
+"""
+
+import argparse
+import fcntl
+import gzip
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# configuration - adjust these paths as needed
+EXPLORATIONS_DIR = Path("/home/workspace/Memory/explorations")
+INDEX_PATH = EXPLORATIONS_DIR / "index.json"
+LOG_PATH = EXPLORATIONS_DIR / "index.jsonl"
+STATE_DIR = Path("/home/.z/workspaces/night-exploration")
+TRANSCRIPT_DIR = STATE_DIR / "transcripts"
+SEARCH_DB_PATH = STATE_DIR / "explorations.db"
+LOCK_PATH = STATE_DIR / "index.lock"
+
+COMPACT_EVERY = 50  # log entries before folding into index.json
+COMPACT_AGE = 24 * 3600  # or once the oldest entry is this old
+CHUNK_LINES = 200  # transcript lines per searchable chunk
+SUMMARY_MAX = 300
+SESSION_WINDOW = timedelta(hours=6)  # a summary this soon after a transcript starts belongs to it
+
+SUMMARY_NAME = re.compile(r"^(\d{4}-\d{2}-\d{2})-(\d{2})-(\d{2})$")
+TRANSCRIPT_NAME = re.compile(r"^tmux-(\d{4}-\d{2}-\d{2})_(\d{2})-(\d{2})-(\d{2})-(\w+)$")
+FIELD = re.compile(r"^\*\*([^*]+?):\*\*\s*(.*)$")
+
+@contextmanager
+def index_lock():
+    LOCK_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(LOCK_PATH, "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+def write_json_atomic(path: Path, data):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(data, indent=2) + "\n")
+    os.replace(tmp, path)
+
+def parse_frontmatter(content: str) -> tuple[dict, str]:
+    """minimal frontmatter parser (same shapes as mem.ts: scalars and [a, b] lists)."""
+    if not content.startswith("---"):
+        return {}, content
+    parts = content.split("---", 2)
+    if len(parts) < 3:
+        return {}, content
+    fm = {}
+    for line in parts[1].splitlines():
+        key, sep, value = line.partition(":")
+        if not sep or not key.strip():
+            continue
+        value = value.strip().strip("\"'")
+        if value.startswith("[") and value.endswith("]"):
+            fm[key.strip()] = [v.strip().strip("\"'") for v in value[1:-1].split(",") if v.strip()]
+        else:
+            fm[key.strip()] = value
+    return fm, parts[2]
+
+def summary_fields(body: str) -> dict:
+    """`**key:** value` fields from the session summary template, with list items folded in."""
+    fields = {}
+    current = None
+    for line in body.splitlines():
+        match = FIELD.match(line.strip())
+        if match:
+            current = match.group(1).strip().lower()
+            fields[current] = match.group(2).strip()
+        elif current and line.strip().startswith(("-", "*")):
+            item = line.strip()[1:].strip()
+            fields[current] = f"{fields[current]}; {item}" if fields[current] else item
+        elif line.strip():
+            current = None
+    return fields
+
+def summary_time(path: Path):
+    match = SUMMARY_NAME.match(path.stem)
+    if not match:
+        return None
+    return datetime.strptime("-".join(match.groups()), "%Y-%m-%d-%H-%M")
+
+def transcript_time(path: Path):
+    stem = path.name.split(".", 1)[0]
+    match = TRANSCRIPT_NAME.match(stem)
+    if not match:
+        return None
+    return datetime.strptime("-".join(match.groups()[:4]), "%Y-%m-%d-%H-%M-%S")
+
+def read_summary(path: Path) -> tuple[dict, str]:
+    """exploration entry (mem.ts schema) and the full text to index."""
+    fm, body = parse_frontmatter(path.read_text(errors="replace"))
+    fields = summary_fields(body)
+    heading = next((l[2:].strip() for l in body.splitlines() if l.startswith("# ")), None)
+    started = summary_time(path)
+
+    tags = fm.get("tags") or []
+    if isinstance(tags, str):
+        tags = [t.strip() for t in tags.split(",") if t.strip()]
+    summary = fm.get("summary") or fields.get("key findings") or fields.get("explored") or ""
+    if len(summary) > SUMMARY_MAX:
+        summary = summary[:SUMMARY_MAX - 1].rstrip() + "…"
+
+    entry = {
+        "id": fm.get("id") or path.stem,
+        "path": str(path),
+        "title": fm.get("title") or heading or path.stem,
+        "date": fm.get("date") or (started.strftime("%Y-%m-%d") if started else
+                                   datetime.fromtimestamp(path.stat().st_mtime).strftime("%Y-%m-%d")),
+        "tags": tags,
+        "summary": summary,
+    }
+    return entry, body
+
+def transcript_chunks(path: Path):
+    """yield blocks of CHUNK_LINES lines without loading the whole transcript."""
+    opener = gzip.open if path.suffix == ".gz" else open
+    lines = []
+    with opener(path, "rt", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            lines.append(line)
+            if len(lines) >= CHUNK_LINES:
+                yield "".join(lines)
+                lines = []
+    if lines:
+        yield "".join(lines)
+
+# --- append log + index.json ---
+
+def load_index() -> dict:
+    try:
+        return json.loads(INDEX_PATH.read_text())
+    except (OSError, json.JSONDecodeError):
+        return {"explorations": [], "lastUpdated": datetime.now().isoformat()}
+
+def read_log() -> list[dict]:
+    entries = []
+    try:
+        with open(LOG_PATH) as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # torn last line from a crashed writer
+    except FileNotFoundError:
+        pass
+    return entries
+
+def append_log(entries: list[dict]):
+    if not entries:
+        return
+    data = "".join(json.dumps(e) + "\n" for e in entries)
+    fd = os.open(LOG_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, data.encode())
+    finally:
+        os.close(fd)
+
+def merge_entries(index: dict, entries: list[dict]) -> dict:
+    """later log entries replace earlier ones with the same id; order is kept."""
+    by_id = {e["id"]: i for i, e in enumerate(index["explorations"])}
+    for entry in entries:
+        exp = {k: v for k, v in entry.items() if k != "loggedAt"}
+        if exp["id"] in by_id:
+            index["explorations"][by_id[exp["id"]]] = {**index["explorations"][by_id[exp["id"]]], **exp}
+        else:
+            by_id[exp["id"]] = len(index["explorations"])
+            index["explorations"].append(exp)
+    index["lastUpdated"] = datetime.now().isoformat()
+    return index
+
+def compact_log(force: bool = False) -> int:
+    """fold the log into index.json when due. call with the index lock held."""
+    entries = read_log()
+    if not entries:
+        return 0
+    oldest = min(e.get("loggedAt", time.time()) for e in entries)
+    if not force and len(entries) < COMPACT_EVERY and time.time() - oldest < COMPACT_AGE:
+        return 0
+    write_json_atomic(INDEX_PATH, merge_entries(load_index(), entries))
+    LOG_PATH.unlink()
+    return len(entries)
+
+# --- full-text index ---
+
+def open_search_db(path: Path = None) -> sqlite3.Connection:
+    path = path or SEARCH_DB_PATH
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            exploration_id TEXT,
+            date TEXT,
+            mtime REAL,
+            size INTEGER
+        );
+        CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5(
+            title, body,
+            path UNINDEXED, kind UNINDEXED, exploration_id UNINDEXED, date UNINDEXED, seq UNINDEXED,
+            tokenize = 'porter unicode61'
+        );
+    """)
+    return conn
+
+def is_current(conn, path: Path, stat) -> bool:
+    row = conn.execute("SELECT mtime, size FROM files WHERE path = ?", (str(path),)).fetchone()
+    return row is not None and row[0] == stat.st_mtime and row[1] == stat.st_size
+
+def replace_file(conn, path: Path, stat, kind: str, exploration_id, date: str, title: str, bodies):
+    conn.execute("DELETE FROM chunks WHERE path = ?", (str(path),))
+    conn.executemany(
+        "INSERT INTO chunks (title, body, path, kind, exploration_id, date, seq) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ((title, body, str(path), kind, exploration_id, date, seq) for seq, body in enumerate(bodies))
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO files (path, kind, exploration_id, date, mtime, size) VALUES (?, ?, ?, ?, ?, ?)",
+        (str(path), kind, exploration_id, date, stat.st_mtime, stat.st_size)
+    )
+
+def find_session_summary(started: datetime, summaries: list[Path]):
+    """the first summary written within SESSION_WINDOW after the transcript started."""
+    best = None
+    for path in summaries:
+        written = summary_time(path)
+        if written and started - timedelta(minutes=1) <= written <= started + SESSION_WINDOW:
+            if best is None or written < summary_time(best):
+                best = path
+    return best
+
+def index_files(conn, summaries: list[Path], transcripts: list[Path], link=None) -> tuple[list[dict], int]:
+    """
+    index changed summaries and transcripts. `link` pins every transcript to
+    that summary path; otherwise each is matched by timestamp.
+    returns (new or changed exploration entries, files skipped as unchanged).
+    """
+    entries = []
+    ids = {}
+    skipped = 0
+    for path in summaries:
+        stat = path.stat()
+        if is_current(conn, path, stat):
+            skipped += 1
+            continue
+        entry, body = read_summary(path)
+        ids[path] = entry
+        text = "\n".join([entry["summary"], body, " ".join(entry["tags"])])
+        replace_file(conn, path, stat, "summary", entry["id"], entry["date"], entry["title"], [text])
+        entries.append(entry)
+
+    all_summaries = sorted(EXPLORATIONS_DIR.glob("*.md")) if link is None else []
+    for path in transcripts:
+        stat = path.stat()
+        if is_current(conn, path, stat):
+            skipped += 1
+            continue
+        started = transcript_time(path) or datetime.fromtimestamp(stat.st_mtime)
+        owner = link or find_session_summary(started, all_summaries)
+        entry = None
+        if owner is not None:
+            entry = ids.get(owner) or read_summary(owner)[0]
+            ids[owner] = entry
+        exploration_id = entry["id"] if entry else None
+        title = entry["title"] if entry else path.name
+        replace_file(conn, path, stat, "transcript", exploration_id, started.strftime("%Y-%m-%d"), title,
+                     transcript_chunks(path))
+        if entry is not None:
+            linked = {**entry, "transcript": str(path)}
+            entries = [e for e in entries if e["id"] != linked["id"]] + [linked]
+    conn.commit()
+    return entries, skipped
+
+def record(entries: list[dict], force_compact: bool = False) -> int:
+    """append entries to the log, compacting if due. returns entries compacted."""
+    now = time.time()
+    with index_lock():
+        append_log([{**e, "loggedAt": now} for e in entries])
+        return compact_log(force=force_compact)
+
+def fts_query(text: str) -> str:
+    """plain words → fts5 terms (each quoted, all required); a trailing * keeps prefix search."""
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+def search(conn, query: str, since=None, until=None, kind=None, limit=10, raw=False) -> list[dict]:
+    """best chunk per file, ranked by bm25 (title weighted over body)."""
+    sql = """
+        SELECT path, kind, exploration_id, date, title,
+               snippet(chunks, 1, '[', ']', '…', 12) AS snippet,
+               bm25(chunks, 5.0, 1.0) AS score
+        FROM chunks WHERE chunks MATCH ?
+    """
+    params = [query if raw else fts_query(query)]
+    if since:
+        sql += " AND date >= ?"
+        params.append(since)
+    if until:
+        sql += " AND date <= ?"
+        params.append(until)
+    if kind:
+        sql += " AND kind = ?"
+        params.append(kind)
+    sql += " ORDER BY score, date DESC"
+
+    results = {}
+    for path, kind_, exploration_id, date, title, snippet, score in conn.execute(sql, params):
+        if path not in results:
+            results[path] = {
+                "path": path, "kind": kind_, "exploration_id": exploration_id, "date": date,
+                "title": title, "snippet": " ".join(snippet.split()), "score": round(-score, 3),
+            }
+            if len(results) >= limit:
+                break
+    return list(results.values())
+
+# --- commands ---
+
+def summary_paths(since=None) -> list[Path]:
+    if not EXPLORATIONS_DIR.exists():
+        return []
+    paths = sorted(EXPLORATIONS_DIR.glob("*.md"))
+    if since is not None:
+        paths = [p for p in paths if p.stat().st_mtime >= since]
+    return paths
+
+def transcript_paths() -> list[Path]:
+    if not TRANSCRIPT_DIR.exists():
+        return []
+    return sorted(p for p in TRANSCRIPT_DIR.iterdir() if p.name.endswith((".txt", ".txt.gz")))
+
+def report(entries, skipped, compacted, started):
+    print(f"✓ indexed {len(entries)} exploration(s), {skipped} unchanged in {time.monotonic() - started:.2f}s")
+    for entry in entries:
+        transcript = " (+ transcript)" if entry.get("transcript") else ""
+        print(f"  {entry['id']} - {entry['title']}{transcript}")
+    if compacted:
+        print(f"✓ compacted {compacted} log entries into {INDEX_PATH}")
+
+def cmd_scan(args):
+    started = time.monotonic()
+    conn = open_search_db()
+    entries, skipped = index_files(conn, summary_paths(), transcript_paths())
+    compacted = record(entries, force_compact=args.compact)
+    report(entries, skipped, compacted, started)
+
+def cmd_add(args):
+    started = time.monotonic()
+    summaries = [Path(p) for p in args.paths] or summary_paths(since=args.since)
+    transcripts = [Path(args.transcript)] if args.transcript else []
+    for path in summaries + transcripts:
+        if not path.exists():
+            print(f"✗ not found: {path}", file=sys.stderr)
+            sys.exit(1)
+    if transcripts and len(summaries) > 1:
+        print(f"⚠ {len(summaries)} summaries found; linking the transcript to {summaries[-1].name}", file=sys.stderr)
+    link = summaries[-1] if transcripts and summaries else None
+
+    conn = open_search_db()
+    entries, skipped = index_files(conn, summaries, transcripts, link=link)
+    compacted = record(entries, force_compact=args.compact)
+    report(entries, skipped, compacted, started)
+
+def cmd_compact(args):
+    with index_lock():
+        compacted = compact_log(force=True)
+    print(f"✓ compacted {compacted} log entries into {INDEX_PATH}" if compacted else "log is empty")
+
+def cmd_search(args):
+    if not SEARCH_DB_PATH.exists():
+        print("no search index yet; run: index-explorations.py scan", file=sys.stderr)
+        sys.exit(1)
+    conn = open_search_db()
+    try:
+        results = search(conn, args.query, since=args.since, until=args.until, kind=args.kind,
+                         limit=args.limit, raw=args.raw)
+    except sqlite3.OperationalError as e:
+        print(f"✗ bad query: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    if not results:
+        print(f"no results for: {args.query}")
+        return
+    print(f"{len(results)} result(s) for \"{args.query}\":")
+    for r in results:
+        label = r["exploration_id"] or Path(r["path"]).name
+        print(f"\n  {r['date']}  {r['kind']:<10}  {label} - {r['title']}")
+        print(f"    {r['snippet']}")
+        print(f"    {r['path']}")
+
+def cmd_stats(args):
+    conn = open_search_db()
+    for kind, files, dates in conn.execute(
+        "SELECT kind, count(*), min(date) || ' → ' || max(date) FROM files GROUP BY kind"
+    ):
+        print(f"{kind}: {files} file(s), {dates}")
+    chunks = conn.execute("SELECT count(*) FROM chunks").fetchone()[0]
+    print(f"chunks: {chunks}")
+    print(f"pending log entries: {len(read_log())}")
+    print(f"index.json explorations: {len(load_index()['explorations'])}")
+
+def cmd_rebuild(args):
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{SEARCH_DB_PATH}{suffix}").unlink(missing_ok=True)
+    args.compact = True
+    cmd_scan(args)
+
+def main():
+    parser = argparse.ArgumentParser(description="exploration index and full-text search")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("scan", help="index new or changed summaries and transcripts")
+    p.add_argument("--compact", action="store_true", help="fold the log into index.json now")
+    p.set_defaults(func=cmd_scan)
+
+    p = sub.add_parser("add", help="index specific summaries, optionally linking a transcript")
+    p.add_argument("paths", nargs="*", help="summary files (default: those modified since --since)")
+    p.add_argument("--since", type=float, help="epoch seconds: pick up summaries written after this")
+    p.add_argument("--transcript", help="transcript of the session that wrote these summaries")
+    p.add_argument("--compact", action="store_true", help="fold the log into index.json now")
+    p.set_defaults(func=cmd_add)
+
+    p = sub.add_parser("search", help="full-text search across summaries and transcripts")
+    p.add_argument("query")
+    p.add_argument("--since", help="YYYY-MM-DD")
+    p.add_argument("--until", help="YYYY-MM-DD")
+    p.add_argument("--kind", choices=["summary", "transcript"])
+    p.add_argument("--limit", type=int, default=10)
+    p.add_argument("--raw", action="store_true", help="pass the query to fts5 as-is (OR, NEAR, column filters)")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser("compact", help="fold the append log into index.json")
+    p.set_defaults(func=cmd_compact)
+
+    p = sub.add_parser("stats", help="show index size")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("rebuild", help="drop the search index and rescan everything")
+    p.set_defaults(func=cmd_rebuild)
+
+    args = parser.parse_args()
+    if not EXPLORATIONS_DIR.exists() and args.command in ("scan", "rebuild", "add"):
+        EXPLORATIONS_DIR.mkdir(parents=True, exist_ok=True)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
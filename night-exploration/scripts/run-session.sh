@@ -8,11 +8,16 @@ SKILL_DIR="/home/workspace/Skills/night-exploration"
 TRIGGER_ID="$1"
 MAX_MINUTES_RAW="${2:-120}"  # default: 2 hours
 MAX_MINUTES=$(printf "%.0f" "$MAX_MINUTES_RAW")  # convert to integer
-SESSION="night-${TRIGGER_ID:0:8}"
+SESSION="${NIGHT_SESSION:-night-${TRIGGER_ID:0:8}}"  # scheduler.py sets a unique name per job
 WORKSPACE="${3:-/home/workspace/Projects}"
-IDENTITY_PROMPT="/home/.z/workspaces/night-exploration/identity-prompt.txt"
+export IDENTITY_PROMPT="${IDENTITY_PROMPT:-/home/.z/workspaces/night-exploration/identity-prompt.txt}"
 TIMESTAMP=$(date +%Y-%m-%d_%H-%M-%S)
+SESSION_START=$(date +%s)
 TRANSCRIPT_DIR="/home/.z/workspaces/night-exploration/transcripts"
+RUN_DIR="/home/.z/workspaces/night-exploration/metrics/runs/${TIMESTAMP}-${TRIGGER_ID:0:8}"
+SESSIONS="$SKILL_DIR/scripts/sessions.py"
+MEMORY_SCRIPT="/home/workspace/Skills/memory/scripts/memory.py"
+WARMUP_BUDGET="${WARMUP_BUDGET:-90}"  # seconds
 
 if [ -z "$TRIGGER_ID" ]; then
   echo "usage: run-session.sh <trigger_id> [max_minutes] [workspace]"
@@ -23,6 +28,9 @@ fi
 mkdir -p "$TRANSCRIPT_DIR"
 mkdir -p "/home/workspace/Memory/explorations"
 
+# start the metrics clock and snapshot memories (metrics are never fatal)
+python3 "$SESSIONS" start "$RUN_DIR" || echo "⚠ failed to start session metrics"
+
 echo "=== autonomous exploration ==="
 echo "trigger_id: $TRIGGER_ID"
 echo "max_duration: ${MAX_MINUTES}m"
@@ -32,7 +40,7 @@ echo ""
 
 # build identity prompt from memories
 echo "✓ building identity from memories..."
-python3 "$SKILL_DIR/scripts/build-identity.py"
+python3 "$SESSIONS" exec "$RUN_DIR" identity -- python3 "$SKILL_DIR/scripts/build-identity.py"
 
 if [ ! -f "$IDENTITY_PROMPT" ]; then
   echo "✗ failed to build identity prompt"
@@ -41,6 +49,11 @@ fi
 
 echo "✓ identity loaded ($(wc -l < "$IDENTITY_PROMPT") lines)"
 
+# pay the cold costs (qmd index + model load, dirty memories, first searches) before code starts
+echo "✓ warming memory search (budget ${WARMUP_BUDGET}s)..."
+python3 "$SESSIONS" exec "$RUN_DIR" warmup -- python3 "$MEMORY_SCRIPT" warmup --budget "$WARMUP_BUDGET" \
+  || echo "⚠ warm-up failed, session starts cold"
+
 # create comprehensive exploration prompt
 echo "✓ preparing exploration prompt..."
 EXPLORATION_PROMPT="load your memory via /home/workspace/Memory/startup/startup.sh, then follow instructions at $SKILL_DIR/scripts/exploration.prompt.md for this ${MAX_MINUTES}m autonomous exploration session. begin exploring immediately."
@@ -53,9 +66,15 @@ tmux new-session -d -s "$SESSION" -c "/home/.z/workspaces/night-exploration"
 # enable tmux logging for complete capture
 tmux pipe-pane -t "$SESSION" -o "cat >> '$TMUX_LOG'"
 
+# compact the raw log as it grows: strips escapes and redraws, gzips the text
+TRANSCRIPT="${TMUX_LOG%.log}.txt.gz"
+PANE_ROWS=$(tmux display -p -t "$SESSION" '#{pane_height}' 2>/dev/null || echo 50)
+python3 "$SKILL_DIR/scripts/compact-transcript.py" "$TMUX_LOG" --out "$TRANSCRIPT" --follow --rows "$PANE_ROWS" &
+COMPACT_PID=$!
+
 # launch every/code auto drive with full permissions
 echo "✓ starting auto drive with full autonomy..."
-tmux send-keys -t "$SESSION" "export CODE_HOME=/home/.z/workspaces/night-exploration/.code && code exec --skip-git-repo-check --auto --dangerously-bypass-approvals-and-sandbox \"$EXPLORATION_PROMPT\"" C-m
+tmux send-keys -t "$SESSION" "export CODE_HOME=/home/.z/workspaces/night-exploration/.code && python3 $SESSIONS exec '$RUN_DIR' code -- code exec --skip-git-repo-check --auto --dangerously-bypass-approvals-and-sandbox \"$EXPLORATION_PROMPT\"" C-m
 sleep 5
 
 echo "✓ tmux logging to: $TMUX_LOG"
@@ -68,8 +87,9 @@ while [ $ELAPSED -lt $MAX_MINUTES ]; do
   echo "  exploring... (${ELAPSED}/${MAX_MINUTES}m elapsed)"
 
   # let code continue autonomously
-  sleep $((INTERVAL * 60))
-  ELAPSED=$((ELAPSED + INTERVAL))
+  STEP=$(( MAX_MINUTES - ELAPSED < INTERVAL ? MAX_MINUTES - ELAPSED : INTERVAL ))
+  sleep $((STEP * 60))
+  ELAPSED=$((ELAPSED + STEP))
 done
 
 echo "✓ time limit reached, wrapping up..."
@@ -86,9 +106,35 @@ tmux send-keys -t "$SESSION" "exit" C-m
 sleep 2
 tmux kill-session -t "$SESSION" 2>/dev/null || true
 
+# the exec wrapper writes code's metrics once code exits after the hangup
+for _ in $(seq 15); do
+  [ -f "$RUN_DIR/code.json" ] && break
+  sleep 1
+done
+
+# stop the compactor; it drains the rest of the log before exiting
+kill -TERM "$COMPACT_PID" 2>/dev/null || true
+COMPACTED=0
+wait "$COMPACT_PID" && COMPACTED=1
+RAW_BYTES=$(stat -c %s "$TMUX_LOG" 2>/dev/null || echo 0)
+if [ "$COMPACTED" = 1 ]; then
+  [ -n "$KEEP_RAW_TRANSCRIPT" ] || rm -f "$TMUX_LOG"
+else
+  TRANSCRIPT="$TMUX_LOG"
+fi
+
+python3 "$SESSIONS" record "$RUN_DIR" --trigger-id "$TRIGGER_ID" --session "$SESSION" \
+  --max-minutes "$MAX_MINUTES" --identity "$IDENTITY_PROMPT" --transcript "$TRANSCRIPT" \
+  --raw-bytes "$RAW_BYTES" --workspace "$WORKSPACE" \
+  || echo "⚠ failed to record session metrics"
+
+# index the new summary and its transcript for `mem explore` and full-text search
+python3 "$SKILL_DIR/scripts/index-explorations.py" add --since "$SESSION_START" --transcript "$TRANSCRIPT" \
+  || echo "⚠ indexing failed; run: python3 $SKILL_DIR/scripts/index-explorations.py scan"
+
 echo ""
 echo "=== exploration complete ==="
-echo "transcript: $TMUX_LOG"
+echo "transcript: $TRANSCRIPT"
 echo "summary should be in: /home/workspace/Memory/explorations/"
 echo "session: $SESSION (terminated)"
 echo ""
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+queued, concurrency-capped scheduler for exploration sessions
+
+every trigger (whoop webhook, cron, manual) is submitted here instead of
+calling run-session.sh directly. jobs live in a sqlite queue:
+- a trigger id is only ever run once while a job for it is queued, running or done
+- at most MAX_SESSIONS sessions run at a time, and never two on one workspace
+- each job gets its own tmux session name and identity prompt file
+- the max_minutes budget is enforced here: past the budget plus a wrap-up
+  grace, the session's process group and tmux session are killed
+
+there is no daemon: whichever `submit --wait` or `work` process finds a free
+slot claims the oldest queued job and supervises it, and a runner that died
+mid-job is noticed by the next one.
+
+usage:
+  scheduler.py submit <trigger_id> [--max-minutes 120] [--workspace DIR] [--wait]
+  scheduler.py status [--all]
+  scheduler.py cancel <job id | trigger id>
+  scheduler.py work                    # drain the queue, then exit
+"""
+
+import argparse
+import json
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# configuration - adjust these paths as needed
+SKILL_DIR = Path("/home/workspace/Skills/night-exploration")
+RUN_SESSION = SKILL_DIR / "scripts/run-session.sh"
+STATE_DIR = Path("/home/.z/workspaces/night-exploration")
+QUEUE_PATH = STATE_DIR / "scheduler.db"
+JOBS_DIR = STATE_DIR / "jobs"
+
+DEFAULT_MAX_MINUTES = 120
+DEFAULT_WORKSPACE = "/home/workspace/Projects"
+MAX_SESSIONS = int(os.environ.get("NIGHT_MAX_SESSIONS", "1"))
+WRAPUP_GRACE = 5 * 60  # run-session.sh needs a little past max_minutes to shut down cleanly
+KILL_GRACE = 10  # seconds between SIGTERM and SIGKILL
+POLL_INTERVAL = 2.0
+
+ACTIVE = ("queued", "running", "cancelling")
+FINAL = ("done", "failed", "timeout", "cancelled")
+EXIT_DUPLICATE = 3  # submit: trigger already has a job
+
+def open_queue():
+    """open the job queue."""
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(QUEUE_PATH, timeout=10, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            trigger_id TEXT NOT NULL,
+            state TEXT NOT NULL,
+            max_minutes REAL NOT NULL,
+            workspace TEXT NOT NULL,
+            session TEXT,
+            submitted_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            runner_pid INTEGER,
+            pid INTEGER,
+            exit_code INTEGER,
+            error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS jobs_trigger ON jobs(trigger_id);
+        CREATE INDEX IF NOT EXISTS jobs_state ON jobs(state, id);
+    """)
+    return conn
+
+def pid_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    # a killed runner can linger as a zombie where nothing reaps orphans (containers)
+    try:
+        return Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()[0] != "Z"
+    except (OSError, IndexError):
+        return True
+
+def job_dir(job_id) -> Path:
+    return JOBS_DIR / str(job_id)
+
+def session_name(job_id) -> str:
+    return f"night-{job_id}"
+
+def kill_session(pid, session):
+    """stop a run-session.sh process group and its tmux session."""
+    subprocess.run(["tmux", "kill-session", "-t", session],
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    if not pid:
+        return
+    try:
+        os.killpg(pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        return
+    deadline = time.monotonic() + KILL_GRACE
+    while time.monotonic() < deadline:
+        try:
+            os.killpg(pid, 0)
+        except ProcessLookupError:
+            return
+        time.sleep(0.2)
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+def finish(conn, job_id, state, exit_code=None, error=None):
+    conn.execute(
+        "UPDATE jobs SET state = ?, finished_at = ?, exit_code = ?, error = ? WHERE id = ?",
+        (state, time.time(), exit_code, error, job_id)
+    )
+
+def submit(conn, trigger_id, max_minutes, workspace):
+    """queue a job. returns (job row, created); an active or finished job for the trigger is reused."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        existing = conn.execute(
+            "SELECT * FROM jobs WHERE trigger_id = ? AND state NOT IN ('failed', 'timeout', 'cancelled') "
+            "ORDER BY id DESC LIMIT 1",
+            (trigger_id,)
+        ).fetchone()
+        if existing:
+            conn.execute("COMMIT")
+            return existing, False
+        cursor = conn.execute(
+            "INSERT INTO jobs (trigger_id, state, max_minutes, workspace, submitted_at) VALUES (?, 'queued', ?, ?, ?)",
+            (trigger_id, max_minutes, workspace, time.time())
+        )
+        job = conn.execute("SELECT * FROM jobs WHERE id = ?", (cursor.lastrowid,)).fetchone()
+        conn.execute("COMMIT")
+        return job, True
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+def reap(conn):
+    """
+    fail running jobs whose runner died. call inside a transaction; returns
+    their (pid, session) pairs to pass to kill_session once it is committed.
+    """
+    orphans = []
+    for job in conn.execute("SELECT * FROM jobs WHERE state IN ('running', 'cancelling')").fetchall():
+        if pid_alive(job["runner_pid"]):
+            continue
+        state = "cancelled" if job["state"] == "cancelling" else "failed"
+        finish(conn, job["id"], state, error="runner exited before the session finished")
+        orphans.append((job["pid"], job["session"]))
+    return orphans
+
+def claim(conn):
+    """
+    take the oldest queued job that fits: under MAX_SESSIONS running and not
+    on a workspace that is already in use. returns the job row or None.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        orphans = reap(conn)
+        running = conn.execute("SELECT workspace FROM jobs WHERE state IN ('running', 'cancelling')").fetchall()
+        busy = [row["workspace"] for row in running]
+        job = None
+        if len(running) < MAX_SESSIONS:
+            job = conn.execute(
+                f"SELECT * FROM jobs WHERE state = 'queued' AND workspace NOT IN ({','.join('?' * len(busy))}) "
+                "ORDER BY id LIMIT 1",
+                busy
+            ).fetchone()
+        if job is not None:
+            conn.execute(
+                "UPDATE jobs SET state = 'running', started_at = ?, runner_pid = ?, session = ? WHERE id = ?",
+                (time.time(), os.getpid(), session_name(job["id"]), job["id"])
+            )
+            job = conn.execute("SELECT * FROM jobs WHERE id = ?", (job["id"],)).fetchone()
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    for pid, session in orphans:
+        kill_session(pid, session)
+    return job
+
+def run_job(conn, job, echo=False):
+    """run one claimed job to completion, enforcing its budget and watching for cancellation."""
+    directory = job_dir(job["id"])
+    directory.mkdir(parents=True, exist_ok=True)
+    env = {
+        **os.environ,
+        "NIGHT_SESSION": job["session"],
+        "IDENTITY_PROMPT": str(directory / "identity-prompt.txt"),
+    }
+    log_path = directory / "run.log"
+    with open(log_path, "ab") as log:
+        try:
+            proc = subprocess.Popen(
+                ["bash", str(RUN_SESSION), job["trigger_id"], f"{job['max_minutes']:g}", job["workspace"]],
+                stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, env=env,
+                start_new_session=True
+            )
+        except OSError as e:
+            finish(conn, job["id"], "failed", error=str(e))
+            return "failed"
+    conn.execute("UPDATE jobs SET pid = ? WHERE id = ?", (proc.pid, job["id"]))
+    if echo:
+        print(f"▶ job {job['id']} running as {job['session']} (log: {log_path})")
+
+    deadline = time.monotonic() + job["max_minutes"] * 60 + WRAPUP_GRACE
+    state = error = None
+    try:
+        while True:
+            try:
+                code = proc.wait(timeout=POLL_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            if time.monotonic() > deadline:
+                state, error = "timeout", f"exceeded {job['max_minutes']:g}m budget"
+            elif conn.execute("SELECT state FROM jobs WHERE id = ?", (job["id"],)).fetchone()[0] == "cancelling":
+                state, error = "cancelled", "cancelled while running"
+            if state:
+                kill_session(proc.pid, job["session"])
+                code = proc.wait()
+                break
+    except BaseException:
+        # the runner itself is going away: take the session down with it
+        kill_session(proc.pid, job["session"])
+        finish(conn, job["id"], "failed", error="runner interrupted")
+        raise
+
+    if state is None:
+        state = "done" if code == 0 else "failed"
+        error = None if code == 0 else f"run-session.sh exited {code}"
+    finish(conn, job["id"], state, exit_code=code, error=error)
+    if echo:
+        print(f"{'✓' if state == 'done' else '✗'} job {job['id']} {state}" + (f": {error}" if error else ""))
+    return state
+
+def get_job(conn, ref):
+    """a job by id, or the newest job for a trigger id."""
+    if str(ref).isdigit():
+        job = conn.execute("SELECT * FROM jobs WHERE id = ?", (int(ref),)).fetchone()
+        if job:
+            return job
+    return conn.execute("SELECT * FROM jobs WHERE trigger_id = ? ORDER BY id DESC LIMIT 1", (ref,)).fetchone()
+
+def work(conn, until=None, echo=False):
+    """
+    run queued jobs while slots are free. with `until` (a job id), keep
+    polling until that job is final and return its state; otherwise return
+    once nothing can be claimed.
+    """
+    # turn SIGTERM into an exception so a running job's session is torn down
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(128 + signal.SIGTERM))
+    while True:
+        if until is not None:
+            state = conn.execute("SELECT state FROM jobs WHERE id = ?", (until,)).fetchone()[0]
+            if state in FINAL:
+                return state
+        job = claim(conn)
+        if job is not None:
+            run_job(conn, job, echo=echo)
+            continue
+        if until is None:
+            return None
+        time.sleep(POLL_INTERVAL)
+
+def spawn_worker():
+    """drain the queue in a detached process."""
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "work"],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+
+def format_time(ts):
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M") if ts else "-"
+
+def format_duration(seconds):
+    if seconds is None:
+        return "-"
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}m{seconds:02d}s" if minutes < 60 else f"{minutes // 60}h{minutes % 60:02d}m"
+
+def job_dict(job):
+    return {key: job[key] for key in job.keys()}
+
+def cmd_submit(args):
+    conn = open_queue()
+    job, created = submit(conn, args.trigger_id, args.max_minutes, args.workspace)
+    if not created:
+        print(f"⚠ trigger {args.trigger_id} already has job {job['id']} ({job['state']}), not queued again")
+        sys.exit(EXIT_DUPLICATE)
+
+    ahead = conn.execute("SELECT COUNT(*) FROM jobs WHERE state = 'queued' AND id < ?", (job["id"],)).fetchone()[0]
+    print(f"✓ queued job {job['id']} for {args.trigger_id} ({args.max_minutes:g}m, {ahead} ahead)")
+    if not args.wait:
+        spawn_worker()
+        return
+    state = work(conn, until=job["id"], echo=True)
+    sys.exit(0 if state == "done" else 1)
+
+def cmd_work(args):
+    conn = open_queue()
+    work(conn, echo=True)
+
+def cmd_status(args):
+    conn = open_queue()
+    conn.execute("BEGIN IMMEDIATE")
+    orphans = reap(conn)
+    conn.execute("COMMIT")
+    for pid, session in orphans:
+        kill_session(pid, session)
+    if args.all:
+        jobs = conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (args.limit,)).fetchall()
+    else:
+        jobs = conn.execute(
+            f"SELECT * FROM jobs WHERE state IN ({','.join('?' * len(ACTIVE))}) ORDER BY id", ACTIVE
+        ).fetchall()
+
+    if args.json:
+        print(json.dumps([job_dict(job) for job in jobs], indent=2))
+        return
+    if not jobs:
+        print("no active jobs" + ("" if args.all else " (--all for history)"))
+        return
+    now = time.time()
+    for job in jobs:
+        if job["started_at"]:
+            elapsed = (job["finished_at"] or now) - job["started_at"]
+        else:
+            elapsed = None
+        line = (f"  {job['id']:>4}  {job['state']:<10} {job['trigger_id']:<24} "
+                f"{format_time(job['submitted_at'])}  {format_duration(elapsed)}/{job['max_minutes']:g}m")
+        if job["error"]:
+            line += f"  ({job['error']})"
+        print(line)
+    print(f"\nmax concurrent sessions: {MAX_SESSIONS}")
+
+def cmd_cancel(args):
+    conn = open_queue()
+    conn.execute("BEGIN IMMEDIATE")
+    job = get_job(conn, args.job)
+    if job is None:
+        conn.execute("ROLLBACK")
+        print(f"✗ no job {args.job}", file=sys.stderr)
+        sys.exit(1)
+    if job["state"] == "queued":
+        finish(conn, job["id"], "cancelled", error="cancelled before start")
+    elif job["state"] == "running":
+        conn.execute("UPDATE jobs SET state = 'cancelling' WHERE id = ?", (job["id"],))
+    conn.execute("COMMIT")
+
+    if job["state"] in FINAL:
+        print(f"job {job['id']} already {job['state']}")
+    elif job["state"] == "queued":
+        print(f"✓ cancelled job {job['id']}")
+    else:
+        print(f"✓ job {job['id']} will be stopped by its runner (pid {job['runner_pid']})")
+
+def main():
+    parser = argparse.ArgumentParser(description="night exploration session scheduler")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("submit", help="queue an exploration session for a trigger")
+    p.add_argument("trigger_id")
+    p.add_argument("--max-minutes", type=float, default=DEFAULT_MAX_MINUTES)
+    p.add_argument("--workspace", default=DEFAULT_WORKSPACE)
+    p.add_argument("--wait", action="store_true",
+                   help=f"run or wait for the job; exit 0 if it completed (exit {EXIT_DUPLICATE} on a duplicate)")
+    p.set_defaults(func=cmd_submit)
+
+    p = sub.add_parser("status", help="show queued and running jobs")
+    p.add_argument("--all", action="store_true", help="include finished jobs")
+    p.add_argument("--limit", type=int, default=20)
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=cmd_status)
+
+    p = sub.add_parser("cancel", help="cancel a queued or running job")
+    p.add_argument("job", help="job id or trigger id")
+    p.set_defaults(func=cmd_cancel)
+
+    p = sub.add_parser("work", help="run queued jobs until none can start")
+    p.set_defaults(func=cmd_work)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+per-session resource and timing metrics for night exploration
+
+run-session.sh collects a session's numbers in a run directory as it goes,
+then `record` folds them into one line of an append-only jsonl time series.
+`report` aggregates percentiles across sessions for capacity planning.
+
+usage:
+  sessions.py start RUN_DIR                       # snapshot memories, start the clock
+  sessions.py exec RUN_DIR code -- code exec ...  # run + time a command (wall, cpu, rss)
+  sessions.py record RUN_DIR --trigger-id ID --workspace DIR --transcript T
+  sessions.py report --last 30
+"""
+
+import argparse
+import json
+import os
+import resource
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# configuration - adjust these paths as needed
+MEMORY_DIR = Path("/home/workspace/Memory")
+METRICS_DIR = Path("/home/.z/workspaces/night-exploration/metrics")
+SESSIONS_LOG = METRICS_DIR / "sessions.jsonl"
+
+EXEC_GRACE = 10  # seconds between forwarding a hangup and SIGKILL
+WORKSPACE_SCAN_LIMIT = 200_000  # directory entries looked at before giving up
+PRUNE_DIRS = {".git", "node_modules", ".venv", "venv", "__pycache__", ".cache", "target", "dist", "build"}
+
+# (key, label, unit) in report order
+REPORT_METRICS = [
+    ("session_seconds", "session wall", "s"),
+    ("identity_seconds", "identity build", "s"),
+    ("identity_bytes", "identity prompt", "B"),
+    ("warmup_seconds", "memory warm-up", "s"),
+    ("code_wall_seconds", "code wall", "s"),
+    ("code_cpu_seconds", "code cpu", "s"),
+    ("code_max_rss_mb", "code max rss", "MB"),
+    ("transcript_raw_bytes", "raw transcript", "B"),
+    ("transcript_bytes", "transcript", "B"),
+    ("workspace_files_touched", "files touched", ""),
+    ("memories_created", "memories created", ""),
+    ("memories_updated", "memories updated", ""),
+]
+
+def write_json_atomic(path: Path, data):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(data, indent=2) + "\n")
+    os.replace(tmp, path)
+
+def load_json(path: Path, default=None):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, json.JSONDecodeError):
+        return default
+
+def memory_files() -> dict:
+    """relative path → mtime for every memory except exploration summaries."""
+    files = {}
+    if not MEMORY_DIR.exists():
+        return files
+    for path in MEMORY_DIR.rglob("*.md"):
+        rel = path.relative_to(MEMORY_DIR)
+        if rel.parts[0] == "explorations":
+            continue
+        try:
+            files[str(rel)] = path.stat().st_mtime
+        except FileNotFoundError:
+            continue
+    return files
+
+def files_touched(root: Path, since: float) -> tuple[int, bool]:
+    """files under root modified since `since`, skipping vendored/build dirs. returns (count, truncated)."""
+    touched = 0
+    seen = 0
+    stack = [root]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                seen += 1
+                if seen > WORKSPACE_SCAN_LIMIT:
+                    return touched, True
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in PRUNE_DIRS:
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_mtime >= since:
+                        touched += 1
+                except OSError:
+                    continue
+    return touched, False
+
+def file_size(path) -> int:
+    try:
+        return os.path.getsize(path) if path else 0
+    except OSError:
+        return 0
+
+def percentile(values: list[float], p: float) -> float:
+    """linear interpolation between closest ranks."""
+    values = sorted(values)
+    if len(values) == 1:
+        return values[0]
+    k = (len(values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+def format_value(value: float, unit: str) -> str:
+    if unit == "B":
+        for suffix in ("B", "KB", "MB", "GB"):
+            if value < 1024 or suffix == "GB":
+                return f"{value:.0f}{suffix}" if suffix == "B" else f"{value:.1f}{suffix}"
+            value /= 1024
+    if unit == "s":
+        return f"{value:.1f}s" if value < 120 else f"{value / 60:.1f}m"
+    if unit == "MB":
+        return f"{value:.0f}MB"
+    return f"{value:.0f}" if value == int(value) else f"{value:.1f}"
+
+def cmd_start(args):
+    run_dir = Path(args.run_dir)
+    run_dir.mkdir(parents=True, exist_ok=True)
+    write_json_atomic(run_dir / "start.json", {"started": time.time(), "memories": memory_files()})
+
+def cmd_exec(args):
+    """
+    run a command and save its wall time, cpu time and peak rss to RUN_DIR/NAME.json.
+    exits with the command's status. a hangup (tmux kill-session) is forwarded
+    to the command, which gets EXEC_GRACE seconds before SIGKILL; the metrics
+    are written either way, and failing to write them only warns.
+    """
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if not command:
+        print("✗ no command given", file=sys.stderr)
+        sys.exit(2)
+
+    hangup = []
+
+    def forward(sig, frame):
+        if not hangup:
+            hangup.append(time.monotonic())
+        try:
+            proc.send_signal(sig)
+        except ProcessLookupError:
+            pass
+
+    started = time.monotonic()
+    proc = subprocess.Popen(command)
+    for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, forward)
+    while True:
+        try:
+            status = proc.wait(timeout=1)
+            break
+        except subprocess.TimeoutExpired:
+            if hangup and time.monotonic() - hangup[0] > EXEC_GRACE:
+                proc.kill()
+    wall = time.monotonic() - started
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    run_dir = Path(args.run_dir)
+    try:
+        run_dir.mkdir(parents=True, exist_ok=True)
+        write_json_atomic(run_dir / f"{args.name}.json", {
+            "wall_seconds": round(wall, 3),
+            "cpu_user": round(usage.ru_utime, 3),
+            "cpu_system": round(usage.ru_stime, 3),
+            "max_rss_mb": round(usage.ru_maxrss / 1024, 1),  # ru_maxrss is KB on linux
+            "exit_code": status,
+            "hangup": bool(hangup),
+        })
+    except OSError as e:
+        # the command already ran; losing its metrics must not change the outcome
+        print(f"⚠ could not write {args.name} metrics: {e}", file=sys.stderr)
+    sys.exit(status if status >= 0 else 128 - status)
+
+def cmd_record(args):
+    run_dir = Path(args.run_dir)
+    start = load_json(run_dir / "start.json")
+    if start is None:
+        print(f"✗ no start.json in {run_dir}; run: sessions.py start {run_dir}", file=sys.stderr)
+        sys.exit(1)
+    started = start["started"]
+    before = start.get("memories", {})
+    after = memory_files()
+
+    entry = {
+        "ts": datetime.fromtimestamp(started).isoformat(timespec="seconds"),
+        "trigger_id": args.trigger_id,
+        "session": args.session,
+        "max_minutes": args.max_minutes,
+        "session_seconds": round(time.time() - started, 1),
+    }
+
+    identity = load_json(run_dir / "identity.json", {})
+    entry["identity_seconds"] = identity.get("wall_seconds")
+    if args.identity:
+        try:
+            text = Path(args.identity).read_text(errors="replace")
+            entry["identity_bytes"] = len(text.encode())
+            entry["identity_lines"] = text.count("\n")
+        except OSError:
+            pass
+
+    warmup = load_json(run_dir / "warmup.json")
+    if warmup:
+        entry["warmup_seconds"] = warmup["wall_seconds"]
+
+    code = load_json(run_dir / "code.json")
+    if code:
+        entry.update({
+            "code_wall_seconds": code["wall_seconds"],
+            "code_cpu_seconds": round(code["cpu_user"] + code["cpu_system"], 3),
+            "code_cpu_user": code["cpu_user"],
+            "code_cpu_system": code["cpu_system"],
+            "code_max_rss_mb": code["max_rss_mb"],
+            "code_exit_code": code["exit_code"],
+            "code_hangup": code["hangup"],
+        })
+
+    entry["transcript_raw_bytes"] = args.raw_bytes
+    entry["transcript_bytes"] = file_size(args.transcript)
+
+    if args.workspace:
+        touched, truncated = files_touched(Path(args.workspace), started)
+        entry["workspace_files_touched"] = touched
+        if truncated:
+            entry["workspace_scan_truncated"] = True
+
+    entry["memories_created"] = sum(1 for path in after if path not in before)
+    entry["memories_updated"] = sum(1 for path, mtime in after.items() if path in before and mtime > before[path])
+
+    SESSIONS_LOG.parent.mkdir(parents=True, exist_ok=True)
+    with open(SESSIONS_LOG, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+    for path in run_dir.glob("*.json"):
+        path.unlink()
+    try:
+        run_dir.rmdir()
+    except OSError:
+        pass
+
+    code_part = f", code {format_value(entry['code_wall_seconds'], 's')} wall / {format_value(entry['code_cpu_seconds'], 's')} cpu" if code else ""
+    print(f"✓ metrics recorded{code_part}, {entry.get('workspace_files_touched', 0)} files touched, "
+          f"{entry['memories_created']} memories created")
+
+def load_sessions(since=None, last=None) -> list[dict]:
+    entries = []
+    try:
+        with open(SESSIONS_LOG) as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    except FileNotFoundError:
+        pass
+    if since:
+        entries = [e for e in entries if e.get("ts", "") >= since]
+    if last:
+        entries = entries[-last:]
+    return entries
+
+def aggregate(entries: list[dict]) -> dict:
+    stats = {}
+    for key, _, _ in REPORT_METRICS:
+        values = [e[key] for e in entries if isinstance(e.get(key), (int, float))]
+        if not values:
+            continue
+        stats[key] = {
+            "n": len(values),
+            "p50": percentile(values, 50),
+            "p90": percentile(values, 90),
+            "p99": percentile(values, 99),
+            "max": max(values),
+            "mean": sum(values) / len(values),
+            "total": sum(values),
+        }
+    return stats
+
+def cmd_report(args):
+    entries = load_sessions(since=args.since, last=args.last)
+    stats = aggregate(entries)
+    if args.json:
+        print(json.dumps({"sessions": len(entries), "metrics": stats}, indent=2))
+        return
+    if not entries:
+        print(f"no sessions recorded in {SESSIONS_LOG}")
+        return
+
+    dates = sorted(e["ts"][:10] for e in entries if e.get("ts"))
+    print(f"{len(entries)} session(s), {dates[0]} → {dates[-1]}" if dates else f"{len(entries)} session(s)")
+    # a hangup is the normal end of a session (tmux kill-session); anything else non-zero is a crash
+    failed = sum(1 for e in entries if e.get("code_exit_code") not in (None, 0) and not e.get("code_hangup"))
+    if failed:
+        print(f"⚠ {failed} session(s) where code exited with an error before the time limit")
+    print()
+    print(f"{'metric':<18} {'n':>4} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9} {'mean':>9}")
+    for key, label, unit in REPORT_METRICS:
+        if key not in stats:
+            continue
+        s = stats[key]
+        cells = " ".join(f"{format_value(s[col], unit):>9}" for col in ("p50", "p90", "p99", "max", "mean"))
+        print(f"{label:<18} {s['n']:>4} {cells}")
+
+    if "transcript_bytes" in stats:
+        print(f"\ntranscripts on disk: {format_value(stats['transcript_bytes']['total'], 'B')}")
+
+def main():
+    parser = argparse.ArgumentParser(description="night exploration session metrics")
+    sub = parser.add_subparsers(dest="command_name", required=True)
+
+    p = sub.add_parser("start", help="snapshot memories and start the session clock")
+    p.add_argument("run_dir")
+    p.set_defaults(func=cmd_start)
+
+    p = sub.add_parser("exec", help="run a command, saving its wall/cpu time and peak rss")
+    p.add_argument("run_dir")
+    p.add_argument("name", help="metrics name, e.g. identity or code")
+    p.add_argument("command", nargs=argparse.REMAINDER, help="-- command [args...]")
+    p.set_defaults(func=cmd_exec)
+
+    p = sub.add_parser("record", help="append the session's metrics to the time series")
+    p.add_argument("run_dir")
+    p.add_argument("--trigger-id")
+    p.add_argument("--session")
+    p.add_argument("--max-minutes", type=int)
+    p.add_argument("--identity", help="identity prompt path (size is recorded)")
+    p.add_argument("--transcript", help="compacted transcript path")
+    p.add_argument("--raw-bytes", type=int, default=0, help="raw tmux log size")
+    p.add_argument("--workspace", help="count files modified here during the session")
+    p.set_defaults(func=cmd_record)
+
+    p = sub.add_parser("report", help="percentiles across recorded sessions")
+    p.add_argument("--since", help="YYYY-MM-DD")
+    p.add_argument("--last", type=int, help="only the last N sessions")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=cmd_report)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,15 @@
 
 import { spawn } from "child_process";
 
-const TRIGGER_ID = process.argv[2] || `manual-${Date.now()}`;
+// the scheduler runs each trigger id once: cron gets one id per day, manual/test runs a fresh one each time
+const RAW_TRIGGER = process.argv[2] || "manual";
+const TRIGGER_ID =
+  RAW_TRIGGER === "scheduled" ? `scheduled-${new Date().toISOString().slice(0, 10)}` :
+  RAW_TRIGGER === "manual" || RAW_TRIGGER === "test" ? `${RAW_TRIGGER}-${Date.now()}` :
+  RAW_TRIGGER;
 const SKILL_DIR = "/home/workspace/Skills/night-exploration";
+const SCHEDULER = `${SKILL_DIR}/scripts/scheduler.py`;
+const EXIT_DUPLICATE = 3;  // scheduler.py: this trigger already has a job
 const EXPLORATION_INSTRUCTIONS = `${SKILL_DIR}/scripts/explorer.md`;
 
 // configuration
@@ -22,7 +29,7 @@ console.log(`timestamp: ${new Date().toISOString()}\n`);
 // validate trigger (for whoop integration)
 const validateSleepTrigger = async (sleepId: string): Promise<boolean> => {
   // skip validation for manual/scheduled triggers
-  if (sleepId.startsWith("manual") || sleepId.startsWith("scheduled") || sleepId === "test") {
+  if (sleepId.startsWith("manual") || sleepId.startsWith("scheduled") || sleepId.startsWith("test")) {
     return true;
   }
   
@@ -71,16 +78,19 @@ const explore = async () => {
   const summaryPath = `${SUMMARY_DIR}/${timestamp}.md`;
   
   console.log(`exploration summary: ${summaryPath}`);
-  console.log("\nstarting autonomous exploration session...");
+  console.log("\nqueueing autonomous exploration session...");
 
-  // launch exploration runner and wait for completion
-  const explorationProcess = spawn("bash", [
-    `${SKILL_DIR}/scripts/run-session.sh`,
+  // the scheduler dedupes triggers, caps concurrent sessions and enforces
+  // MAX_MINUTES; --wait returns once this trigger's session has finished
+  const explorationProcess = spawn("python3", [
+    SCHEDULER,
+    "submit",
     TRIGGER_ID,
-    MAX_MINUTES.toString(),
-    WORKSPACE
+    "--max-minutes", MAX_MINUTES.toString(),
+    "--workspace", WORKSPACE,
+    "--wait"
   ], {
-    stdio: "pipe"
+    stdio: ["ignore", "inherit", "inherit"]
   });
 
   console.log("exploration mode: ACTIVE");
@@ -91,6 +101,10 @@ const explore = async () => {
 
   // when exploration completes, send summary via SMS
   explorationProcess.on("close", async (code) => {
+    if (code === EXIT_DUPLICATE) {
+      console.log("\nthis trigger was already handled, no new session");
+      return;
+    }
     console.log(`\nexploration session ended (exit code: ${code})`);
 
     try {
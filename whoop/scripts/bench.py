@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+whoop bench - concurrency and performance checks for whoop.py
+
+runs whoop.py in subprocesses against local fake endpoints, with
+WHOOP_HOME and WHOOP_BASE_URL pointed at a throwaway directory and server.
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from fake_server import FakeConfig, start_fake_server
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+WHOOP_SCRIPT = SCRIPT_DIR / "whoop.py"
+
+IMPORT_BUDGET_MS = 40.0
+# modules that must stay off the import path of `import whoop`
+LAZY_MODULES = ("requests", "sqlite3", "http.server", "webbrowser", "urllib3")
+
+HTTP_STATS_LINE = re.compile(
+    r"http: (?P<requests>\d+) request\(s\), (?P<retries>\d+) retries, (?P<errors>\d+) error\(s\) "
+    r"\| latency p50 (?P<p50>\d+)ms p95 (?P<p95>\d+)ms p99 (?P<p99>\d+)ms max (?P<max>\d+)ms"
+)
+
+def make_home(tokens=None):
+    """throwaway WHOOP_HOME with fake credentials and optional tokens."""
+    home = Path(tempfile.mkdtemp(prefix="whoop-bench-"))
+    (home / "credentials.json").write_text(json.dumps({
+        'client_id': 'bench', 'client_secret': 'bench'
+    }))
+    if tokens:
+        (home / "tokens.json").write_text(json.dumps(tokens))
+    return home
+
+def valid_tokens():
+    return {'access_token': 'access-0', 'refresh_token': 'refresh-0', 'expires_at': time.time() + 86400}
+
+def whoop_env(home, server):
+    env = dict(os.environ)
+    env['WHOOP_HOME'] = str(home)
+    env['WHOOP_BASE_URL'] = f"http://127.0.0.1:{server.server_port}"
+    return env
+
+def fake_config(args, **overrides):
+    """FakeConfig from the shared server options."""
+    options = dict(
+        nights=args.nights, latency_ms=args.latency, jitter_ms=args.jitter,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+        rate_limit=args.rate_limit, rate_window=args.rate_window,
+        retry_after=args.retry_after
+    )
+    options.update(overrides)
+    return FakeConfig(**options)
+
+def run_whoop(home, server, *argv, env=None):
+    """run `whoop.py --verbose ARGV`. returns (seconds, stdout, client http stats)."""
+    started = time.monotonic()
+    result = subprocess.run(
+        [sys.executable, str(WHOOP_SCRIPT), "--verbose", *argv],
+        env={**whoop_env(home, server), **(env or {})}, capture_output=True, text=True
+    )
+    elapsed = time.monotonic() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"whoop.py {' '.join(argv)} failed:\n{result.stderr.strip()}")
+    
+    stats = {}
+    match = HTTP_STATS_LINE.search(result.stderr)
+    if match:
+        stats = {key: int(value) for key, value in match.groupdict().items()}
+    return elapsed, result.stdout, stats
+
+def report(name, elapsed, records, stats, fake):
+    """print throughput, retries and latency percentiles for one run."""
+    rate = records / elapsed if elapsed > 0 else 0.0
+    print(f"{name}: {records} records in {elapsed:.2f}s ({rate:.1f} records/s)")
+    if stats:
+        print(f"  client: {stats['requests']} requests, {stats['retries']} retries, {stats['errors']} errors")
+        print(f"  latency: p50 {stats['p50']}ms, p95 {stats['p95']}ms, p99 {stats['p99']}ms, max {stats['max']}ms")
+    else:
+        print("  client: no http requests")
+    statuses = ", ".join(f"{code}×{n}" for code, n in sorted(fake.stats['by_status'].items()))
+    print(f"  server: {fake.stats['requests']} requests ({statuses or 'none'})")
+
+def count_records(stdout, verb):
+    """sum N from "✓ <verb> N ... record(s)" lines."""
+    return sum(int(m.group(1)) for m in re.finditer(rf"{verb} (\d+) \w+ record", stdout))
+
+def bench_refresh(args):
+    """run N processes that all find the token expired at once."""
+    server, fake = start_fake_server(FakeConfig(nights=1, token_delay=0.2))
+    home = make_home({
+        'access_token': 'expired',
+        'refresh_token': fake.refresh_token,
+        'expires_at': 0
+    })
+    code = (
+        "import sys; sys.path.insert(0, %r); import whoop; "
+        "print('TOKEN', whoop.refresh_token_if_needed())" % str(SCRIPT_DIR)
+    )
+    
+    started = time.monotonic()
+    procs = [
+        subprocess.Popen([sys.executable, "-c", code], env=whoop_env(home, server),
+                         stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        for _ in range(args.workers)
+    ]
+    tokens = []
+    for proc in procs:
+        out, _ = proc.communicate()
+        line = next((l for l in out.splitlines() if l.startswith("TOKEN ")), "TOKEN None")
+        tokens.append(line.split(" ", 1)[1])
+    elapsed = time.monotonic() - started
+    server.shutdown()
+    
+    saved = json.loads((home / "tokens.json").read_text())
+    posts = fake.stats['refresh_posts']
+    ok = (
+        posts == 1
+        and len(set(tokens)) == 1
+        and tokens[0] == saved['access_token']
+        and saved['refresh_token'] == fake.refresh_token
+    )
+    
+    print(f"refresh: {args.workers} processes in {elapsed:.2f}s")
+    print(f"  refresh posts: {posts} (rejected: {fake.stats['rejected_refreshes']})")
+    print(f"  distinct access tokens: {len(set(tokens))}")
+    print(f"  saved refresh token current: {saved['refresh_token'] == fake.refresh_token}")
+    print("✓ single-flight refresh" if ok else "✗ refresh raced")
+    return 0 if ok else 1
+
+def bench_sync(args):
+    """incremental sync from an empty cache, then a near no-op resync."""
+    server, fake = start_fake_server(fake_config(args))
+    home = make_home(valid_tokens())
+    try:
+        for label in ("cold", "warm"):
+            fake.reset_stats()
+            elapsed, out, stats = run_whoop(home, server, "sync")
+            report(f"sync ({label})", elapsed, count_records(out, "synced"), stats, fake)
+    except RuntimeError as e:
+        print(f"✗ {e}")
+        return 1
+    finally:
+        server.shutdown()
+    return 0
+
+def bench_backfill(args):
+    """full-history backfill of sleeps and recoveries."""
+    server, fake = start_fake_server(fake_config(args))
+    home = make_home(valid_tokens())
+    since = (datetime.now(timezone.utc) - timedelta(days=args.nights + 1)).strftime('%Y-%m-%d')
+    try:
+        elapsed, out, stats = run_whoop(home, server, "backfill", "--since", since)
+    except RuntimeError as e:
+        print(f"✗ {e}")
+        return 1
+    finally:
+        server.shutdown()
+    report("backfill", elapsed, count_records(out, "backfilled"), stats, fake)
+    return 0
+
+def bench_details(args):
+    """concurrent sleep-details for many ids, cold and then from the scored cache."""
+    server, fake = start_fake_server(fake_config(args))
+    home = make_home(valid_tokens())
+    ids = [s['id'] for s in fake.sleeps[:args.ids]]
+    try:
+        for label in ("cold", "cached"):
+            fake.reset_stats()
+            elapsed, out, stats = run_whoop(home, server, "sleep-details", *ids, "--workers", str(args.workers))
+            report(f"details ({label}, {args.workers} workers)", elapsed, out.count("sleep details:"), stats, fake)
+    except RuntimeError as e:
+        print(f"✗ {e}")
+        return 1
+    finally:
+        server.shutdown()
+    return 0
+
+def bench_users(args):
+    """sync --all-users over N accounts, one worker and then --workers at a time."""
+    server, fake = start_fake_server(fake_config(args))
+    try:
+        for workers in (1, args.workers):
+            home = make_home(valid_tokens())
+            for n in range(1, args.users):
+                user_dir = home / "users" / str(1000 + n)
+                user_dir.mkdir(parents=True)
+                (user_dir / "tokens.json").write_text(json.dumps(valid_tokens()))
+            fake.reset_stats()
+            elapsed, out, _ = run_whoop(home, server, "sync", "--all-users", "--workers", str(workers))
+            report(f"sync --all-users ({args.users} accounts, {workers} worker(s))", elapsed,
+                   count_records(out, "synced"), {}, fake)
+    except RuntimeError as e:
+        print(f"✗ {e}")
+        return 1
+    finally:
+        server.shutdown()
+    return 0
+
+def bench_rate(args):
+    """
+    a rate-limited backfill with interactive is-sleeping probes alongside,
+    once through the shared rate limiter and once without it.
+    """
+    ok = True
+    for label, limiter in (("limited", "1"), ("unlimited", "0")):
+        server, fake = start_fake_server(fake_config(args))
+        home = make_home(valid_tokens())
+        env = {'WHOOP_RATE_LIMIT': limiter}
+        since = (datetime.now(timezone.utc) - timedelta(days=args.nights + 1)).strftime('%Y-%m-%d')
+        probes = []
+        try:
+            started = time.monotonic()
+            backfill = subprocess.Popen(
+                [sys.executable, str(WHOOP_SCRIPT), "backfill", "--since", since],
+                env={**whoop_env(home, server), **env},
+                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+            )
+            while backfill.poll() is None and len(probes) < args.probes:
+                time.sleep(args.probe_interval)
+                elapsed, _, _ = run_whoop(home, server, "is-sleeping", "--max-age", "0", env=env)
+                probes.append(elapsed)
+            out, _ = backfill.communicate()
+            elapsed = time.monotonic() - started
+        except RuntimeError as e:
+            print(f"✗ {e}")
+            return 1
+        finally:
+            server.shutdown()
+        
+        throttled = fake.stats['by_status'].get('429', 0)
+        probes.sort()
+        print(f"rate ({label}): backfilled {count_records(out, 'backfilled')} records in {elapsed:.2f}s")
+        print(f"  server: {fake.stats['requests']} requests, {throttled} throttled (429)")
+        if probes:
+            print(f"  is-sleeping probes: {len(probes)}, p50 {probes[len(probes) // 2] * 1000:.0f}ms, max {probes[-1] * 1000:.0f}ms")
+        if limiter == "1" and throttled > args.max_throttled:
+            ok = False
+    
+    print("✓ rate limiter kept the api under its limit" if ok else "✗ limited run was throttled")
+    return 0 if ok else 1
+
+def parse_importtime(stderr):
+    """{module: cumulative microseconds} from `python -X importtime` output."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+def bench_import_time(args):
+    """measure `import whoop` with -X importtime and check it against a budget."""
+    # no credentials in this home: importing must not need them
+    home = make_home()
+    env = dict(os.environ, WHOOP_HOME=str(home))
+    
+    samples = []
+    leaked = set()
+    for _ in range(args.runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import whoop"],
+            cwd=SCRIPT_DIR, env=env, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            print(result.stderr.strip().splitlines()[-1])
+            print("✗ import failed")
+            return 1
+        times = parse_importtime(result.stderr)
+        samples.append(times["whoop"] / 1000)
+        leaked |= {m for m in LAZY_MODULES if m in times}
+    
+    samples.sort()
+    median = samples[len(samples) // 2]
+    ok = median <= args.budget and not leaked
+    
+    print(f"import-time: {args.runs} runs")
+    print(f"  import whoop: median {median:.1f}ms, min {samples[0]:.1f}ms, max {samples[-1]:.1f}ms (budget {args.budget:.0f}ms)")
+    if leaked:
+        print(f"  eagerly imported: {', '.join(sorted(leaked))}")
+    print("✓ within budget" if ok else "✗ over budget")
+    return 0 if ok else 1
+
+def make_server_options(nights=365, rate_limit=0, rate_window=60.0):
+    """
+    shared fake server options for the load scenarios. parents share their
+    actions, so each distinct set of defaults needs its own parser.
+    """
+    options = argparse.ArgumentParser(add_help=False)
+    options.add_argument("--nights", type=int, default=nights, help=f"nights of synthetic history (default: {nights})")
+    options.add_argument("--latency", type=float, default=20.0, help="server latency per request in ms (default: 20)")
+    options.add_argument("--jitter", type=float, default=10.0, help="± latency jitter in ms (default: 10)")
+    options.add_argument("--error-rate", type=float, default=0.0, help="fraction of 500 responses")
+    options.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of 429 responses")
+    options.add_argument("--rate-limit", type=int, default=rate_limit, help=f"server requests per window, 0 = unlimited (default: {rate_limit})")
+    options.add_argument("--rate-window", type=float, default=rate_window, help=f"server rate limit window in seconds (default: {rate_window:g})")
+    options.add_argument("--retry-after", type=float, default=0.0, help="Retry-After seconds on injected 429s")
+    return options
+
+def main():
+    parser = argparse.ArgumentParser(description="whoop bench - concurrency and performance checks")
+    subparsers = parser.add_subparsers(dest="command", help="scenario")
+    
+    # refresh scenario
+    refresh_parser = subparsers.add_parser("refresh", help="parallel token refresh against a fake token endpoint")
+    refresh_parser.add_argument("--workers", type=int, default=8, help="parallel processes (default: 8)")
+    refresh_parser.set_defaults(func=bench_refresh)
+    
+    server_options = make_server_options()
+    
+    sync_parser = subparsers.add_parser("sync", parents=[server_options], help="cold and warm sync against the fake api")
+    sync_parser.set_defaults(func=bench_sync)
+    
+    backfill_parser = subparsers.add_parser("backfill", parents=[server_options], help="full-history backfill against the fake api")
+    backfill_parser.set_defaults(func=bench_backfill)
+    
+    details_parser = subparsers.add_parser("details", parents=[server_options], help="concurrent sleep-details against the fake api")
+    details_parser.add_argument("--ids", type=int, default=100, help="sleep ids to fetch (default: 100)")
+    details_parser.add_argument("--workers", type=int, default=8, help="details thread pool size (default: 8)")
+    details_parser.set_defaults(func=bench_details)
+    
+    users_parser = subparsers.add_parser("users", parents=[server_options], help="sync --all-users, sequential vs concurrent")
+    users_parser.add_argument("--users", type=int, default=6, help="accounts, including the default one (default: 6)")
+    users_parser.add_argument("--workers", type=int, default=4, help="concurrent account syncs (default: 4)")
+    users_parser.set_defaults(func=bench_users)
+    
+    rate_options = make_server_options(nights=730, rate_limit=20, rate_window=5.0)
+    rate_parser = subparsers.add_parser("rate", parents=[rate_options], help="backfill under a rate limit with interactive probes")
+    rate_parser.add_argument("--probes", type=int, default=5, help="is-sleeping probes during the backfill (default: 5)")
+    rate_parser.add_argument("--probe-interval", type=float, default=1.0, help="seconds between probes (default: 1)")
+    rate_parser.add_argument("--max-throttled", type=int, default=2, help="429s tolerated with the limiter on (default: 2)")
+    rate_parser.set_defaults(func=bench_rate)
+    
+    # import-time scenario
+    import_parser = subparsers.add_parser("import-time", help="check `import whoop` against a time budget")
+    import_parser.add_argument("--runs", type=int, default=7, help="samples to take (default: 7)")
+    import_parser.add_argument("--budget", type=float, default=IMPORT_BUDGET_MS, help=f"budget in ms (default: {IMPORT_BUDGET_MS:.0f})")
+    import_parser.set_defaults(func=bench_import_time)
+    
+    args = parser.parse_args()
+    
+    if not args.command:
+        parser.print_help()
+        return 1
+    
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
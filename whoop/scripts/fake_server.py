@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+fake whoop api - local stand-in for the whoop endpoints whoop.py uses
+
+serves a deterministic synthetic history with configurable latency, error
+rate, random 429s and a windowed rate limit. point whoop.py at it with
+WHOOP_BASE_URL=http://127.0.0.1:PORT.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+SLEEP_PATH = "/developer/v2/activity/sleep"
+RECOVERY_PATH = "/developer/v2/recovery"
+TOKEN_PATH = "/oauth/oauth2/token"
+STATS_PATH = "/_stats"
+PAGE_LIMIT = 25
+
+@dataclass
+class FakeConfig:
+    nights: int = 90
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0  # fraction of api requests answered with 500
+    throttle_rate: float = 0.0  # fraction of api requests answered with 429
+    rate_limit: int = 0  # requests per rate window, 0 = unlimited
+    rate_window: float = 60.0  # seconds
+    retry_after: float = 1.0
+    token_delay: float = 0.0
+    seed: int = 7
+
+def api_time(dt):
+    return dt.strftime('%Y-%m-%dT%H:%M:%S.') + f"{dt.microsecond // 1000:03d}Z"
+
+def make_history(nights, seed, now=None):
+    """
+    synthetic (sleeps, recoveries), newest first.
+
+    one main sleep per night ending before `now`, plus an occasional nap;
+    the most recent night is left pending so score-state handling gets exercised.
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now(timezone.utc)
+    base = now.replace(hour=4, minute=0, second=0, microsecond=0)
+    if base + timedelta(hours=9) > now:
+        base -= timedelta(days=1)
+
+    sleeps, recoveries = [], []
+    for night in range(nights):
+        start = base - timedelta(days=night, minutes=rng.gauss(0, 40))
+        hours = max(3.0, rng.gauss(7.4, 0.8))
+        end = start + timedelta(hours=hours)
+        in_bed = hours * 3_600_000
+        awake = in_bed * rng.uniform(0.04, 0.12)
+        asleep = in_bed - awake
+        cycle_id = 1_000_000 + nights - night
+        sleep_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        scored = night > 0
+
+        sleeps.append({
+            'id': sleep_id,
+            'cycle_id': cycle_id,
+            'user_id': 1,
+            'created_at': api_time(end),
+            'updated_at': api_time(end + timedelta(minutes=30)),
+            'start': api_time(start),
+            'end': api_time(end),
+            'timezone_offset': '-05:00',
+            'nap': False,
+            'score_state': 'SCORED' if scored else 'PENDING_SCORE',
+            'score': {
+                'stage_summary': {
+                    'total_in_bed_time_milli': int(in_bed),
+                    'total_awake_time_milli': int(awake),
+                    'total_no_data_time_milli': 0,
+                    'total_light_sleep_time_milli': int(asleep * 0.52),
+                    'total_slow_wave_sleep_time_milli': int(asleep * 0.22),
+                    'total_rem_sleep_time_milli': int(asleep * 0.26),
+                    'sleep_cycle_count': rng.randint(3, 6),
+                    'disturbance_count': rng.randint(2, 15),
+                },
+                'sleep_needed': {
+                    'baseline_milli': 27_000_000,
+                    'need_from_sleep_debt_milli': rng.randint(0, 3_600_000),
+                    'need_from_recent_strain_milli': rng.randint(0, 1_800_000),
+                    'need_from_recent_nap_milli': 0,
+                },
+                'respiratory_rate': round(rng.gauss(15, 0.6), 2),
+                'sleep_performance_percentage': rng.randint(60, 100),
+                'sleep_consistency_percentage': rng.randint(50, 95),
+                'sleep_efficiency_percentage': round(100 * asleep / in_bed, 1),
+            } if scored else None,
+        })
+        recoveries.append({
+            'cycle_id': cycle_id,
+            'sleep_id': sleep_id,
+            'user_id': 1,
+            'created_at': api_time(end + timedelta(minutes=5)),
+            'updated_at': api_time(end + timedelta(minutes=35)),
+            'score_state': 'SCORED',
+            'score': {
+                'user_calibrating': False,
+                'recovery_score': rng.randint(20, 99),
+                'resting_heart_rate': rng.randint(45, 65),
+                'hrv_rmssd_milli': round(rng.gauss(55, 12), 2),
+                'spo2_percentage': round(rng.uniform(94, 99), 1),
+                'skin_temp_celsius': round(rng.gauss(33.7, 0.4), 2),
+            },
+        })
+
+        if rng.random() < 0.1:
+            nap_start = start + timedelta(hours=12)
+            if nap_start < now - timedelta(hours=1):
+                sleeps.append({
+                    **sleeps[-1],
+                    'id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                    'start': api_time(nap_start),
+                    'end': api_time(nap_start + timedelta(minutes=40)),
+                    'nap': True,
+                })
+
+    sleeps.sort(key=lambda s: s['start'], reverse=True)
+    return sleeps, recoveries
+
+class FakeWhoop:
+    """shared state behind the handler: history, tokens, limits and counters."""
+
+    def __init__(self, config):
+        self.config = config
+        self.sleeps, self.recoveries = make_history(config.nights, config.seed)
+        self.sleeps_by_id = {s['id']: s for s in self.sleeps}
+        self.rng = random.Random(config.seed + 1)
+        self.lock = threading.Lock()
+        self.refresh_token = "refresh-0"
+        self.access_tokens = {"access-0"}
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {'requests': 0, 'refresh_posts': 0, 'rejected_refreshes': 0, 'by_status': {}, 'by_path': {}}
+
+    def count(self, path, status):
+        with self.lock:
+            self.stats['requests'] += 1
+            self.stats['by_status'][str(status)] = self.stats['by_status'].get(str(status), 0) + 1
+            self.stats['by_path'][path] = self.stats['by_path'].get(path, 0) + 1
+
+    def admit(self):
+        """None if the request may proceed, else (status, retry_after)."""
+        config = self.config
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window_start >= config.rate_window:
+                self.window_start, self.window_count = now, 0
+            self.window_count += 1
+            if config.rate_limit and self.window_count > config.rate_limit:
+                return 429, max(1.0, config.rate_window - (now - self.window_start))
+            roll = self.rng.random()
+        if roll < config.throttle_rate:
+            return 429, config.retry_after
+        if roll < config.throttle_rate + config.error_rate:
+            return 500, None
+        return None
+
+    def rate_headers(self):
+        if not self.config.rate_limit:
+            return {}
+        with self.lock:
+            remaining = max(0, self.config.rate_limit - self.window_count)
+            reset = max(0, int(self.config.rate_window - (time.monotonic() - self.window_start)))
+        window = f"{self.config.rate_window:g}"
+        return {
+            'X-RateLimit-Limit': f"{self.config.rate_limit}, {self.config.rate_limit};window={window}",
+            'X-RateLimit-Remaining': str(remaining),
+            'X-RateLimit-Reset': str(reset),
+        }
+
+    def page(self, records, field, query):
+        """filter records by `field` in [start, end) and slice one page."""
+        start = query.get('start', [''])[0]
+        end = query.get('end', ['9999'])[0]
+        limit = min(int(query.get('limit', [PAGE_LIMIT])[0]), PAGE_LIMIT)
+        offset = int(query.get('nextToken', ['0'])[0] or 0)
+        matching = [r for r in records if start <= r[field] < end]
+        chunk = matching[offset:offset + limit]
+        next_offset = offset + limit
+        return {
+            'records': chunk,
+            'next_token': str(next_offset) if next_offset < len(matching) else None,
+        }
+
+    def refresh(self, form):
+        """rotate tokens; a spent refresh token is rejected like the real api."""
+        time.sleep(self.config.token_delay)
+        with self.lock:
+            self.stats['refresh_posts'] += 1
+            if form.get('grant_type', [None])[0] == 'refresh_token' and form.get('refresh_token', [None])[0] != self.refresh_token:
+                self.stats['rejected_refreshes'] += 1
+                return 400, {'error': 'invalid_grant'}
+            n = self.stats['refresh_posts']
+            self.refresh_token = f"refresh-{n}"
+            self.access_tokens.add(f"access-{n}")
+            return 200, {
+                'access_token': f"access-{n}",
+                'refresh_token': self.refresh_token,
+                'expires_in': 3600,
+                'token_type': 'bearer',
+            }
+
+def make_handler(fake):
+    """request handler class bound to one FakeWhoop."""
+
+    class FakeWhoopHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def reply(self, status, body=None, headers=None):
+            data = json.dumps(body).encode() if body is not None else b""
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            form = parse_qs(self.rfile.read(length).decode())
+            path = urlparse(self.path).path
+            if path != TOKEN_PATH:
+                fake.count(path, 404)
+                self.reply(404, {'error': 'not found'})
+                return
+            status, body = fake.refresh(form)
+            fake.count(path, status)
+            self.reply(status, body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            path, query = url.path, parse_qs(url.query)
+
+            if path == STATS_PATH:
+                with fake.lock:
+                    self.reply(200, fake.stats)
+                return
+
+            config = fake.config
+            delay = config.latency_ms + (random.uniform(-config.jitter_ms, config.jitter_ms) if config.jitter_ms else 0)
+            if delay > 0:
+                time.sleep(delay / 1000)
+
+            label = f"{SLEEP_PATH}/{{id}}" if path.startswith(SLEEP_PATH + "/") else path
+            auth = self.headers.get('Authorization', '')
+            if not auth.startswith('Bearer ') or auth[7:] not in fake.access_tokens:
+                fake.count(label, 401)
+                self.reply(401, {'error': 'unauthorized'})
+                return
+
+            rejected = fake.admit()
+            if rejected:
+                status, retry_after = rejected
+                headers = fake.rate_headers()
+                if retry_after is not None:
+                    headers['Retry-After'] = str(int(round(retry_after)))
+                fake.count(label, status)
+                self.reply(status, {'error': 'injected'}, headers)
+                return
+
+            if path == SLEEP_PATH:
+                status, body = 200, fake.page(fake.sleeps, 'start', query)
+            elif path == RECOVERY_PATH:
+                status, body = 200, fake.page(fake.recoveries, 'created_at', query)
+            elif label != path:
+                record = fake.sleeps_by_id.get(path.rsplit("/", 1)[1])
+                status, body = (200, record) if record else (404, {'error': 'not found'})
+            else:
+                status, body = 404, {'error': 'not found'}
+
+            fake.count(label, status)
+            self.reply(status, body, fake.rate_headers())
+
+        def log_message(self, format, *args):
+            pass  # suppress logs
+
+    return FakeWhoopHandler
+
+def start_fake_server(config=None, port=0):
+    """start a fake api on localhost in a daemon thread. returns (server, fake)."""
+    fake = FakeWhoop(config or FakeConfig())
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(fake))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, fake
+
+def main():
+    parser = argparse.ArgumentParser(description="fake whoop api for local testing")
+    parser.add_argument("--port", type=int, default=8089, help="port (default: 8089)")
+    parser.add_argument("--nights", type=int, default=90, help="nights of synthetic history (default: 90)")
+    parser.add_argument("--latency", type=float, default=0.0, help="added latency per api request in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="± random latency in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of api requests that return 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of api requests that return 429")
+    parser.add_argument("--rate-limit", type=int, default=0, help="requests per window before 429 (0 = unlimited)")
+    parser.add_argument("--rate-window", type=float, default=60.0, help="rate limit window in seconds (default: 60)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on injected 429s")
+    parser.add_argument("--seed", type=int, default=7, help="history/randomness seed")
+    args = parser.parse_args()
+
+    config = FakeConfig(
+        nights=args.nights, latency_ms=args.latency, jitter_ms=args.jitter,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+        rate_limit=args.rate_limit, rate_window=args.rate_window,
+        retry_after=args.retry_after, seed=args.seed
+    )
+    server, fake = start_fake_server(config, args.port)
+    print(f"fake whoop api on http://127.0.0.1:{server.server_port} ({len(fake.sleeps)} sleeps, {len(fake.recoveries)} recoveries)")
+    print(f"  WHOOP_BASE_URL=http://127.0.0.1:{server.server_port}")
+    print(f"  access token: access-0, refresh token: refresh-0")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
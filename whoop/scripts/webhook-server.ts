@@ -1,17 +1,20 @@
 #!/usr/bin/env bun
 /**
  * whoop webhook receiver
- * receives sleep.updated webhooks and triggers exploration
+ * receives sleep.updated webhooks and queues them for `whoop.py process-events`
  * includes watchdog timer to prevent hangs
  */
 
 import { createHmac } from "crypto";
 import { spawn } from "child_process";
 import { writeFileSync } from "fs";
+import { Database } from "bun:sqlite";
 
 const PORT = 8081;
 const CREDS_PATH = "/home/.z/whoop/credentials.json";
-const EXPLORATION_AGENT_PATH = "/home/workspace/Skills/night-exploration/scripts/trigger.ts";
+const WHOOP_CLI_PATH = "/home/workspace/Skills/whoop/scripts/whoop.py";
+const EVENTS_DB_PATH = "/home/.z/whoop/events.db";
+const CONSUMER_DEBOUNCE = 120; // seconds a sleep's events must be quiet before processing
 const HEARTBEAT_FILE = "/dev/shm/whoop-webhook-heartbeat";
 const HEARTBEAT_INTERVAL = 5000; // 5s
 const HEARTBEAT_TIMEOUT = 30000; // 30s - restart if no heartbeat for 30s
@@ -48,18 +51,84 @@ function validateSignature(
   return calculated === signature;
 }
 
-async function triggerExploration(sleepId: string) {
-  console.log(`triggering exploration for sleep ${sleepId}`);
+// durable event queue, shared with whoop.py (same schema there)
+function openQueue(): Database {
+  const db = new Database(EVENTS_DB_PATH, { create: true });
+  db.exec("PRAGMA journal_mode=WAL");
+  db.exec("PRAGMA busy_timeout=5000");
+  db.exec(`
+    CREATE TABLE IF NOT EXISTS events (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      sleep_id TEXT NOT NULL,
+      type TEXT NOT NULL,
+      trace_id TEXT UNIQUE,
+      received_at REAL NOT NULL,
+      processed_at REAL,
+      user_id TEXT
+    );
+    CREATE INDEX IF NOT EXISTS events_pending ON events(processed_at, sleep_id);
+    CREATE TABLE IF NOT EXISTS triggered (
+      sleep_id TEXT PRIMARY KEY,
+      triggered_at REAL NOT NULL,
+      events INTEGER NOT NULL,
+      lag REAL NOT NULL
+    );
+  `);
+  // queues created before accounts existed have no user_id column
+  const columns = db.query("PRAGMA table_info(events)").all() as { name: string }[];
+  if (!columns.some((column) => column.name === "user_id")) {
+    db.exec("ALTER TABLE events ADD COLUMN user_id TEXT");
+  }
+  return db;
+}
+
+const queue = openQueue();
+
+// redelivered webhooks carry the same trace_id and are ignored.
+// user_id routes the event to that account's tokens and cache
+function enqueueEvent(payload: WebhookPayload) {
+  queue
+    .query("INSERT OR IGNORE INTO events (sleep_id, type, trace_id, received_at, user_id) VALUES (?, ?, ?, ?, ?)")
+    .run(String(payload.id), payload.type, payload.trace_id ?? null, Date.now() / 1000, String(payload.user_id));
+}
+
+function pendingEvents(): number {
+  const row = queue.query("SELECT COUNT(*) AS n FROM events WHERE processed_at IS NULL").get() as { n: number };
+  return row.n;
+}
+
+let consumerTimer: ReturnType<typeof setTimeout> | null = null;
+let consumerRunning = false;
+
+// run the consumer once the queue has been quiet for the debounce window
+function scheduleConsumer(delaySeconds = CONSUMER_DEBOUNCE + 1) {
+  if (consumerTimer) clearTimeout(consumerTimer);
+  consumerTimer = setTimeout(runConsumer, delaySeconds * 1000);
+}
+
+function runConsumer() {
+  consumerTimer = null;
+  if (consumerRunning) {
+    scheduleConsumer();
+    return;
+  }
   
-  // spawn exploration agent with timeout
-  const proc = spawn("bun", [EXPLORATION_AGENT_PATH, sleepId], {
-    detached: true,
-    stdio: "ignore",
-    timeout: 60000 // 60s timeout
+  consumerRunning = true;
+  const proc = spawn("python3", [WHOOP_CLI_PATH, "process-events", "--debounce", String(CONSUMER_DEBOUNCE)], {
+    stdio: ["ignore", "inherit", "inherit"],
+    timeout: 300000
   });
   
-  proc.unref();
-  console.log(`exploration agent spawned (pid: ${proc.pid})`);
+  const done = () => {
+    consumerRunning = false;
+    // events still settling, or a failed fetch: try again after another window
+    if (pendingEvents() > 0 && !consumerTimer) scheduleConsumer();
+  };
+  proc.on("close", done);
+  proc.on("error", (error) => {
+    console.error("process-events failed to start:", error);
+    done();
+  });
 }
 
 // heartbeat monitoring
@@ -132,9 +201,10 @@ const server = Bun.serve({
         const payload: WebhookPayload = JSON.parse(body);
         console.log(`received webhook: ${payload.type} for user ${payload.user_id}`);
         
-        // handle sleep.updated events
+        // queue sleep.updated events; the consumer coalesces them per sleep
         if (payload.type === "sleep.updated") {
-          await triggerExploration(payload.id);
+          enqueueEvent(payload);
+          scheduleConsumer();
         }
         
         return new Response("ok", { status: 200 });
@@ -154,3 +224,9 @@ console.log(`health check: http://localhost:${PORT}/health`);
 
 startHeartbeat();
 startWatchdog();
+
+// drain whatever arrived before a restart
+if (pendingEvents() > 0) {
+  console.log(`${pendingEvents()} queued event(s) pending, starting consumer`);
+  runConsumer();
+}
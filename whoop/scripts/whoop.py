@@ -3,53 +3,129 @@
 whoop cli - sleep tracking and status monitoring
 """
 
+# heavy modules (requests, sqlite3, http.server, webbrowser) are imported
+# inside the functions that use them: is-sleeping and status get polled by
+# automation and should not pay for an http stack they never touch.
 import argparse
 import json
 import os
-import requests
-import webbrowser
-from datetime import datetime, timedelta
+import sys
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
 
-WHOOP_BASE_URL = "https://api.prod.whoop.com"
+from whoop_client import (
+    DEFAULT_BASE_URL, DEFAULT_HOME, RECOVERY_ENDPOINT, SLEEP_ENDPOINT,
+    PRIORITY_BULK, AuthError, WhoopClient, WhoopError, account_dir, accounts,
+    format_api_time, parse_api_time,
+)
+
+WHOOP_BASE_URL = os.environ.get("WHOOP_BASE_URL", DEFAULT_BASE_URL)
 AUTH_URL = f"{WHOOP_BASE_URL}/oauth/oauth2/auth"
 TOKEN_URL = f"{WHOOP_BASE_URL}/oauth/oauth2/token"
 REDIRECT_URI = "https://polaris.zo.computer/oauth-callback"
 
-TOKEN_PATH = Path("/home/.z/whoop/tokens.json")
-CREDS_PATH = Path("/home/.z/whoop/credentials.json")
+WHOOP_HOME = Path(os.environ.get("WHOOP_HOME", DEFAULT_HOME))
+CREDS_PATH = WHOOP_HOME / "credentials.json"
+MEMORY_SCRIPT = Path(os.environ.get("MEMORY_SCRIPT", "/home/workspace/Skills/memory/scripts/memory.py"))
+EVENTS_PATH = WHOOP_HOME / "events.db"
+EVENTS_LOCK_PATH = WHOOP_HOME / "events.lock"
+EXPLORATION_TRIGGER = Path(os.environ.get("EXPLORATION_TRIGGER", "/home/workspace/Skills/night-exploration/scripts/trigger.ts"))
+
+SYNC_OVERLAP = timedelta(hours=48)  # re-fetch recent nights to pick up late score updates
+SYNC_INITIAL_DAYS = 30
+SLEEP_STATE_MAX_AGE = 900  # seconds before is-sleeping refreshes the state live
+DETAILS_WORKERS = 8
+SYNC_USER_WORKERS = 4
+EVENT_DEBOUNCE = 120  # seconds a sleep's events must be quiet before they are processed
+
+TREND_WINDOWS = (7, 30, 90)
+DEFAULT_SLEEP_NEED_HOURS = 8.0
+SLEEP_DEBT_DAYS = 14  # debt older than this is considered repaid or irrelevant
+STAGE_FIELDS = (
+    ('light', 'total_light_sleep_time_milli'),
+    ('deep', 'total_slow_wave_sleep_time_milli'),
+    ('rem', 'total_rem_sleep_time_milli'),
+    ('awake', 'total_awake_time_milli'),
+)
+
+_client = None
 
-def load_credentials():
-    """load client credentials from file."""
-    with open(CREDS_PATH) as f:
-        return json.load(f)
+def get_client():
+    """the process-wide api client: one session, one token, shared stats."""
+    global _client
+    if _client is None:
+        _client = WhoopClient(home=WHOOP_HOME, base_url=WHOOP_BASE_URL, token_path=TOKEN_PATH, user_id=WHOOP_USER)
+    return _client
 
-CREDS = load_credentials()
-CLIENT_ID = CREDS["client_id"]
-CLIENT_SECRET = CREDS["client_secret"]
+def use_account(user_id):
+    """
+    point the per-account paths and the client at `user_id`.
 
-# oauth callback handler
-class OAuthCallbackHandler(BaseHTTPRequestHandler):
-    auth_code = None
+    None is the default account, whose files sit directly in WHOOP_HOME as
+    they did before accounts existed. http stats carry over to the new client.
+    """
+    global WHOOP_USER, ACCOUNT_DIR, TOKEN_PATH, CACHE_PATH, EXPORT_DIR, SLEEP_STATE_PATH, SLEEP_INDEX_PATH, _client
+    WHOOP_USER = str(user_id) if user_id else None
+    ACCOUNT_DIR = account_dir(WHOOP_HOME, WHOOP_USER)
+    TOKEN_PATH = ACCOUNT_DIR / "tokens.json"
+    CACHE_PATH = ACCOUNT_DIR / "cache.db"
+    EXPORT_DIR = ACCOUNT_DIR / "exports"
+    SLEEP_STATE_PATH = ACCOUNT_DIR / "sleep-state.json"
+    SLEEP_INDEX_PATH = ACCOUNT_DIR / "sleep-index.json"
+    if _client is not None:
+        stats = _client.stats
+        _client.close()
+        _client = None
+        get_client().stats = stats
+
+use_account(os.environ.get("WHOOP_USER"))
+
+def make_callback_handler():
+    """oauth callback handler class; built on demand to keep http.server off the import path."""
+    from http.server import BaseHTTPRequestHandler
+    from urllib.parse import urlparse, parse_qs
     
-    def do_GET(self):
-        query = urlparse(self.path).query
-        params = parse_qs(query)
+    class OAuthCallbackHandler(BaseHTTPRequestHandler):
+        auth_code = None
         
-        if 'code' in params:
-            OAuthCallbackHandler.auth_code = params['code'][0]
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            self.wfile.write(b'<html><body><h1>Authorization successful!</h1><p>You can close this window.</p></body></html>')
-        else:
-            self.send_response(400)
-            self.end_headers()
+        def do_GET(self):
+            query = urlparse(self.path).query
+            params = parse_qs(query)
+            
+            if 'code' in params:
+                OAuthCallbackHandler.auth_code = params['code'][0]
+                self.send_response(200)
+                self.send_header('Content-type', 'text/html')
+                self.end_headers()
+                self.wfile.write(b'<html><body><h1>Authorization successful!</h1><p>You can close this window.</p></body></html>')
+            else:
+                self.send_response(400)
+                self.end_headers()
+        
+        def log_message(self, format, *args):
+            pass  # suppress logs
     
-    def log_message(self, format, *args):
-        pass  # suppress logs
+    return OAuthCallbackHandler
+
+def print_http_stats():
+    """print request count, retries and latency percentiles to stderr."""
+    stats = get_client().stats
+    latencies = sorted(stats['latencies'])
+    if not latencies:
+        print("http: no requests", file=sys.stderr)
+        return
+    
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+    
+    print(
+        f"http: {stats['requests']} request(s), {stats['retries']} retries, "
+        f"{stats['errors']} error(s) | latency p50 {pct(50):.0f}ms "
+        f"p95 {pct(95):.0f}ms p99 {pct(99):.0f}ms max {latencies[-1] * 1000:.0f}ms"
+        f" | rate wait {stats['rate_wait']:.1f}s",
+        file=sys.stderr
+    )
 
 def ensure_token_dir():
     """ensure token directory exists."""
@@ -57,82 +133,961 @@ def ensure_token_dir():
 
 def load_tokens():
     """load tokens from file."""
-    if not TOKEN_PATH.exists():
-        return None
-    with open(TOKEN_PATH) as f:
-        return json.load(f)
+    return get_client().load_tokens()
 
 def save_tokens(tokens):
-    """save tokens to file."""
-    ensure_token_dir()
-    with open(TOKEN_PATH, 'w') as f:
-        json.dump(tokens, f, indent=2)
+    """save tokens to file atomically, so readers never see a partial write."""
+    get_client().save_tokens(tokens)
     print(f"✓ tokens saved to {TOKEN_PATH}")
 
+def report_api_error(e):
+    """print a WhoopError the way the cli always has."""
+    print(e if isinstance(e, AuthError) else f"api error: {e}")
+
 def refresh_token_if_needed():
-    """refresh access token if expired."""
-    tokens = load_tokens()
-    if not tokens:
-        print("no tokens found. run: python whoop.py auth")
+    """return a valid access token, refreshing it if expired. None (with a message) on failure."""
+    try:
+        return get_client().access_token()
+    except WhoopError as e:
+        report_api_error(e)
         return None
+
+def make_api_request(endpoint, params=None):
+    """make authenticated api request."""
+    try:
+        return get_client().request(endpoint, params)
+    except WhoopError as e:
+        report_api_error(e)
+        return None
+
+def open_cache():
+    """open the local sleep/recovery cache, creating tables on first use."""
+    import sqlite3
+    ensure_token_dir()
+    # writers hold the lock only briefly (syncs fetch before they write), so wait for them
+    conn = sqlite3.connect(CACHE_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS sleeps (
+            id TEXT PRIMARY KEY,
+            start TEXT NOT NULL,
+            end TEXT,
+            updated_at TEXT,
+            score_state TEXT,
+            nap INTEGER NOT NULL DEFAULT 0,
+            record TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS sleeps_start ON sleeps(start);
+        -- sleeps whose interval changed, read by the sleep index to update incrementally
+        CREATE TABLE IF NOT EXISTS sleep_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id TEXT NOT NULL
+        );
+        CREATE TRIGGER IF NOT EXISTS sleeps_inserted AFTER INSERT ON sleeps BEGIN
+            INSERT INTO sleep_changes (id) VALUES (new.id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS sleeps_moved AFTER UPDATE ON sleeps
+        WHEN old.start IS NOT new.start OR old.end IS NOT new.end OR old.nap IS NOT new.nap BEGIN
+            INSERT INTO sleep_changes (id) VALUES (new.id);
+        END;
+        CREATE TABLE IF NOT EXISTS recoveries (
+            cycle_id INTEGER PRIMARY KEY,
+            sleep_id TEXT,
+            created_at TEXT,
+            updated_at TEXT,
+            score_state TEXT,
+            record TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS recoveries_sleep ON recoveries(sleep_id);
+        CREATE TABLE IF NOT EXISTS sync_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """)
+    return conn
+
+def get_sync_state(conn, key):
+    row = conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+def set_sync_state(conn, key, value):
+    conn.execute(
+        "INSERT INTO sync_state (key, value) VALUES (?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (key, value)
+    )
+
+def upsert_sleeps(conn, records):
+    """insert or update sleep records by id. returns number of new ids."""
+    if not records:
+        return 0
+    ids = [r['id'] for r in records]
+    placeholders = ",".join("?" * len(ids))
+    existing = {row[0] for row in conn.execute(f"SELECT id FROM sleeps WHERE id IN ({placeholders})", ids)}
+
+    conn.executemany("""
+        INSERT INTO sleeps (id, start, end, updated_at, score_state, nap, record)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            start = excluded.start,
+            end = excluded.end,
+            updated_at = excluded.updated_at,
+            score_state = excluded.score_state,
+            nap = excluded.nap,
+            record = excluded.record
+        WHERE sleeps.updated_at IS NULL OR excluded.updated_at >= sleeps.updated_at
+    """, [
+        (r['id'], r['start'], r.get('end'), r.get('updated_at'), r.get('score_state'),
+         int(bool(r.get('nap'))), json.dumps(r))
+        for r in records
+    ])
+    return len(set(ids) - existing)
+
+def upsert_recoveries(conn, records):
+    """insert or update recovery records by cycle id. returns number of new ids."""
+    if not records:
+        return 0
+    ids = [r['cycle_id'] for r in records]
+    placeholders = ",".join("?" * len(ids))
+    existing = {row[0] for row in conn.execute(f"SELECT cycle_id FROM recoveries WHERE cycle_id IN ({placeholders})", ids)}
+
+    conn.executemany("""
+        INSERT INTO recoveries (cycle_id, sleep_id, created_at, updated_at, score_state, record)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(cycle_id) DO UPDATE SET
+            sleep_id = excluded.sleep_id,
+            created_at = excluded.created_at,
+            updated_at = excluded.updated_at,
+            score_state = excluded.score_state,
+            record = excluded.record
+        WHERE recoveries.updated_at IS NULL OR excluded.updated_at >= recoveries.updated_at
+    """, [
+        (r['cycle_id'], r.get('sleep_id'), r.get('created_at'), r.get('updated_at'),
+         r.get('score_state'), json.dumps(r))
+        for r in records
+    ])
+    return len(set(ids) - existing)
+
+# per record kind: endpoint, upsert, sync watermark key, watermark field, backfill state prefix
+RECORD_KINDS = {
+    'sleep': (SLEEP_ENDPOINT, upsert_sleeps, "sleep_last_end", 'end', "backfill"),
+    'recovery': (RECOVERY_ENDPOINT, upsert_recoveries, "recovery_last_created", 'created_at', "recovery_backfill"),
+}
+
+def iter_pages(endpoint, start, end, next_token=None):
+    """yield (records, next_token) per page; raises WhoopError if a page fails."""
+    return get_client().iter_pages(endpoint, start, end, next_token)
+
+def latest_time(records, field, current=None):
+    """latest api timestamp in `field` among records and an existing value."""
+    times = [r[field] for r in records if r.get(field)]
+    if current:
+        times.append(current)
+    return max(times, key=parse_api_time) if times else None
+
+def sync_sleeps(conn, initial_days=SYNC_INITIAL_DAYS):
+    """
+    fetch sleep records newer than the last synced end into the cache.
+    the first sync reaches back `initial_days`.
+
+    re-requests SYNC_OVERLAP before the last end so score updates that land
+    after a night was first synced still get picked up. every page is fetched
+    before anything is written, then all of them commit together: a failed
+    sync leaves the previous state untouched, and the cache is not locked
+    while waiting on the api.
+    returns (records fetched, new records) or None on api failure.
+    """
+    now = datetime.now(timezone.utc)
+    last_end = get_sync_state(conn, "sleep_last_end")
+    if last_end:
+        start = parse_api_time(last_end) - SYNC_OVERLAP
+    else:
+        start = now - timedelta(days=initial_days)
+
+    try:
+        pages = [records for records, _ in iter_pages(SLEEP_ENDPOINT, start, now)]
+    except WhoopError as e:
+        report_api_error(e)
+        return None
+
+    fetched = new = 0
+    with conn:
+        for records in pages:
+            fetched += len(records)
+            new += upsert_sleeps(conn, records)
+            last_end = latest_time(records, 'end', last_end)
+        if last_end:
+            set_sync_state(conn, "sleep_last_end", last_end)
+        set_sync_state(conn, "sleep_synced_at", format_api_time(now))
+
+    write_sleep_state(latest_cached_sleep(conn), "sync")
+    return fetched, new
+
+def sync_recoveries(conn):
+    """
+    fetch recoveries created since the last synced one into the cache.
+
+    same overlap and fetch-then-commit as sync_sleeps.
+    returns (records fetched, new records) or None on api failure.
+    """
+    now = datetime.now(timezone.utc)
+    last_created = get_sync_state(conn, "recovery_last_created")
+    if last_created:
+        start = parse_api_time(last_created) - SYNC_OVERLAP
+    else:
+        start = now - timedelta(days=SYNC_INITIAL_DAYS)
+
+    try:
+        pages = [records for records, _ in iter_pages(RECOVERY_ENDPOINT, start, now)]
+    except WhoopError as e:
+        report_api_error(e)
+        return None
+
+    fetched = new = 0
+    with conn:
+        for records in pages:
+            fetched += len(records)
+            new += upsert_recoveries(conn, records)
+            last_created = latest_time(records, 'created_at', last_created)
+        if last_created:
+            set_sync_state(conn, "recovery_last_created", last_created)
+        set_sync_state(conn, "recovery_synced_at", format_api_time(now))
+
+    return fetched, new
+
+def backfill_records(conn, kind, since, progress=None):
+    """
+    pull every `kind` record since `since` into the cache, one page at a time.
+
+    each page is committed together with the cursor for the next one, so an
+    interrupted run resumes from the last stored page. a run for the same
+    `since` reuses the original end time to keep the cursor valid.
+    returns (records fetched, new records, resumed) or None on api failure.
+    """
+    endpoint, upsert, watermark_key, watermark_field, prefix = RECORD_KINDS[kind]
+    since_key = format_api_time(since)
+    cursor = None
+    if get_sync_state(conn, f"{prefix}_since") == since_key:
+        cursor = get_sync_state(conn, f"{prefix}_cursor")
     
-    # check expiration
-    expires_at = tokens.get('expires_at', 0)
-    if datetime.now().timestamp() < expires_at - 300:  # 5 min buffer
-        return tokens['access_token']
-    
-    # refresh
-    response = requests.post(TOKEN_URL, data={
-        'grant_type': 'refresh_token',
-        'refresh_token': tokens['refresh_token'],
-        'client_id': CLIENT_ID,
-        'client_secret': CLIENT_SECRET,
-        'scope': 'offline read:sleep read:recovery'
-    })
+    resumed = cursor is not None
+    if resumed:
+        end = parse_api_time(get_sync_state(conn, f"{prefix}_end"))
+    else:
+        end = datetime.now(timezone.utc)
+        with conn:
+            set_sync_state(conn, f"{prefix}_since", since_key)
+            set_sync_state(conn, f"{prefix}_end", format_api_time(end))
+            set_sync_state(conn, f"{prefix}_cursor", None)
     
-    if response.status_code != 200:
-        print(f"failed to refresh token: {response.text}")
+    fetched = new = 0
+    watermark = None
+    try:
+        for records, next_token in iter_pages(endpoint, since, end, cursor):
+            with conn:
+                new += upsert(conn, records)
+                set_sync_state(conn, f"{prefix}_cursor", next_token)
+            fetched += len(records)
+            watermark = latest_time(records, watermark_field, watermark)
+            if progress:
+                progress(fetched)
+    except WhoopError as e:
+        report_api_error(e)
         return None
     
-    new_tokens = response.json()
-    tokens.update({
-        'access_token': new_tokens['access_token'],
-        'refresh_token': new_tokens.get('refresh_token', tokens['refresh_token']),
-        'expires_at': datetime.now().timestamp() + new_tokens['expires_in']
-    })
+    # only a completed backfill may move the sync watermark forward
+    with conn:
+        watermark = latest_time([{watermark_field: watermark}], watermark_field, get_sync_state(conn, watermark_key))
+        if watermark:
+            set_sync_state(conn, watermark_key, watermark)
+        set_sync_state(conn, f"{prefix}_completed_at", format_api_time(datetime.now(timezone.utc)))
     
-    save_tokens(tokens)
-    return tokens['access_token']
+    return fetched, new, resumed
 
-def make_api_request(endpoint, params=None):
-    """make authenticated api request."""
-    access_token = refresh_token_if_needed()
-    if not access_token:
+def cached_sleeps(conn, since):
+    """cached sleep records starting at or after `since`, newest first."""
+    rows = conn.execute(
+        "SELECT record FROM sleeps WHERE start >= ? ORDER BY start DESC",
+        (format_api_time(since),)
+    )
+    return [json.loads(row[0]) for row in rows]
+
+def latest_cached_sleep(conn):
+    """most recent cached sleep by start, or None."""
+    row = conn.execute("SELECT record FROM sleeps ORDER BY start DESC LIMIT 1").fetchone()
+    return json.loads(row[0]) if row else None
+
+def write_sleep_state(sleep, source):
+    """
+    record the latest sleep in SLEEP_STATE_PATH for is-sleeping.
+
+    stores the interval rather than a sleeping flag, so readers can evaluate
+    it against the current time. written via rename so watchers see one event.
+    """
+    state = {
+        'sleep_id': sleep['id'] if sleep else None,
+        'start': sleep['start'] if sleep else None,
+        'end': sleep.get('end') if sleep else None,
+        'updated_at': time.time(),
+        'source': source
+    }
+    ensure_token_dir()
+    tmp_path = SLEEP_STATE_PATH.with_name(f".{SLEEP_STATE_PATH.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, SLEEP_STATE_PATH)
+    return state
+
+def read_sleep_state():
+    """the stored sleep state, or None if missing or unreadable."""
+    try:
+        with open(SLEEP_STATE_PATH) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
         return None
+
+def state_is_sleeping(state, now=None):
+    """true if `now` falls inside the state's sleep. a sleep without an end is ongoing."""
+    if not state or not state.get('start'):
+        return False
+    now = now or datetime.now(timezone.utc)
+    if now < parse_api_time(state['start']):
+        return False
+    return state.get('end') is None or now <= parse_api_time(state['end'])
+
+class SleepIntervalIndex:
+    """
+    cached sleeps as intervals sorted by start, for point and range queries.
+
+    any finished sleep containing t starts in [t - max_duration, t], so a
+    query is a bisect plus a scan of that window instead of the whole
+    history. naps and overlapping records are ordinary intervals. sleeps
+    without an end are ongoing and tracked apart, having no duration bound.
+    times are epoch seconds; an interval is (start, end or None, id, nap).
+    """
+
+    def __init__(self, intervals=(), seq=0):
+        self.intervals = []  # sorted by start
+        self.starts = []
+        self.by_id = {}
+        self.ongoing = set()
+        self.max_duration = 0.0
+        self.seq = seq  # last sleep_changes row applied
+        self.update(intervals)
+
+    def update(self, intervals):
+        """insert or replace intervals by id."""
+        import bisect
+        for start, end, sleep_id, nap in intervals:
+            old = self.by_id.pop(sleep_id, None)
+            if old:
+                i = bisect.bisect_left(self.starts, old[0])
+                while self.intervals[i][2] != sleep_id:
+                    i += 1
+                del self.intervals[i], self.starts[i]
+                self.ongoing.discard(sleep_id)
+            
+            interval = (start, end, sleep_id, bool(nap))
+            i = bisect.bisect_right(self.starts, start)
+            self.intervals.insert(i, interval)
+            self.starts.insert(i, start)
+            self.by_id[sleep_id] = interval
+            if end is None:
+                self.ongoing.add(sleep_id)
+            else:
+                # only grows: a stale bound widens the scan but never misses a match
+                self.max_duration = max(self.max_duration, end - start)
+
+    def _candidates(self, lo, hi):
+        """finished intervals starting in [lo - max_duration, hi], plus ongoing ones starting by hi."""
+        import bisect
+        window = self.intervals[
+            bisect.bisect_left(self.starts, lo - self.max_duration):bisect.bisect_right(self.starts, hi)
+        ]
+        early = [self.by_id[i] for i in self.ongoing if self.by_id[i][0] < lo - self.max_duration]
+        return sorted(early) + window
+
+    def at(self, moment):
+        """intervals containing `moment`."""
+        return [iv for iv in self._candidates(moment, moment) if iv[1] is None or moment <= iv[1]]
+
+    def overlapping(self, start, end):
+        """intervals overlapping [start, end]."""
+        return [iv for iv in self._candidates(start, end) if iv[1] is None or start <= iv[1]]
+
+def sleep_intervals(rows):
+    """index intervals from (id, start, end, nap) cache rows."""
+    return [
+        (parse_api_time(start).timestamp(), parse_api_time(end).timestamp() if end else None, sleep_id, nap)
+        for sleep_id, start, end, nap in rows
+    ]
+
+def load_sleep_index(conn):
+    """
+    the sleep interval index, brought up to date with the cache.
+
+    loads SLEEP_INDEX_PATH and replays only sleeps changed since its seq,
+    rebuilding from scratch when the file is missing or unreadable. saves
+    the index back when anything changed.
+    """
+    try:
+        with open(SLEEP_INDEX_PATH) as f:
+            saved = json.load(f)
+        index = SleepIntervalIndex([tuple(iv) for iv in saved['intervals']], saved['seq'])
+    except (FileNotFoundError, ValueError, KeyError, TypeError):
+        index = None
     
-    headers = {'Authorization': f'Bearer {access_token}'}
-    response = requests.get(f"{WHOOP_BASE_URL}{endpoint}", headers=headers, params=params)
+    # read the seq first: a write racing this load is replayed next time
+    seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM sleep_changes").fetchone()[0]
+    if index is None:
+        rows = conn.execute("SELECT id, start, end, nap FROM sleeps").fetchall()
+        index = SleepIntervalIndex(sleep_intervals(rows))
+    elif seq > index.seq:
+        rows = conn.execute("""
+            SELECT id, start, end, nap FROM sleeps
+            WHERE id IN (SELECT id FROM sleep_changes WHERE seq > ? AND seq <= ?)
+        """, (index.seq, seq)).fetchall()
+        index.update(sleep_intervals(rows))
+    else:
+        return index
     
-    if response.status_code != 200:
-        print(f"api error: {response.status_code} - {response.text}")
+    index.seq = seq
+    ensure_token_dir()
+    tmp_path = SLEEP_INDEX_PATH.with_name(f".{SLEEP_INDEX_PATH.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump({'seq': index.seq, 'intervals': index.intervals}, f)
+    os.replace(tmp_path, SLEEP_INDEX_PATH)
+    return index
+
+class FileWatcher:
+    """
+    block until a file is replaced or rewritten.
+
+    uses inotify on the parent directory (so atomic renames are seen) and
+    falls back to polling the file's mtime where inotify is unavailable.
+    """
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO = 0x080
+    IN_CLOEXEC = 0o2000000
+    POLL_INTERVAL = 1.0
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.fd = None
+        self.mtime = self._mtime()
+        try:
+            import ctypes
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(self.IN_CLOEXEC)
+            if fd < 0:
+                return
+            wd = libc.inotify_add_watch(fd, str(self.path.parent).encode(), self.IN_CLOSE_WRITE | self.IN_MOVED_TO)
+            if wd < 0:
+                os.close(fd)
+                return
+            self.fd = fd
+        except (OSError, AttributeError):
+            self.fd = None
+    
+    def _mtime(self):
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+    
+    def wait(self, timeout):
+        """wait up to `timeout` seconds (None = forever). true if the file changed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if self.fd is None:
+            return self._poll(deadline)
+        
+        import select
+        import struct
+        name = self.path.name.encode()
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if not ready:
+                return False
+            buf = os.read(self.fd, 64 * 1024)
+            offset = 0
+            while offset < len(buf):
+                _, _, _, length = struct.unpack_from("iIII", buf, offset)
+                event_name = buf[offset + 16:offset + 16 + length].rstrip(b"\0")
+                offset += 16 + length
+                if event_name == name:
+                    return True
+    
+    def _poll(self, deadline):
+        while deadline is None or time.monotonic() < deadline:
+            time.sleep(self.POLL_INTERVAL if deadline is None else min(self.POLL_INTERVAL, max(0.0, deadline - time.monotonic())))
+            mtime = self._mtime()
+            if mtime != self.mtime:
+                self.mtime = mtime
+                return True
+        return False
+    
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+def print_sleep(sleep):
+    """print one sleep record summary."""
+    start_time = parse_api_time(sleep['start'])
+    end_time = parse_api_time(sleep['end'])
+    duration = (end_time - start_time).total_seconds() / 3600
+    
+    score = sleep.get('score') or {}
+    sleep_efficiency = score.get('sleep_efficiency_percentage', 0)
+    
+    print(f"  {start_time.strftime('%Y-%m-%d %H:%M')} - {end_time.strftime('%H:%M')}")
+    print(f"    duration: {duration:.1f}h")
+    print(f"    efficiency: {sleep_efficiency}%")
+    print(f"    id: {sleep['id']}")
+    print()
+
+def load_sleep_columns(conn, include_naps=False):
+    """
+    cached sleeps as numpy column arrays, oldest first.
+
+    fields are pulled out of the stored json by sqlite, so no per-record
+    python parsing happens. returns None if nothing is cached.
+    """
+    import numpy as np
+    
+    stage_columns = ",\n            ".join(
+        f"json_extract(record, '$.score.stage_summary.{field}')" for _, field in STAGE_FIELDS
+    )
+    rows = conn.execute(f"""
+        SELECT
+            replace(start, 'Z', ''),
+            replace(end, 'Z', ''),
+            coalesce(json_extract(record, '$.timezone_offset'), '+00:00'),
+            json_extract(record, '$.score.sleep_efficiency_percentage'),
+            json_extract(record, '$.score.sleep_needed.baseline_milli'),
+            {stage_columns}
+        FROM sleeps
+        WHERE end IS NOT NULL {"" if include_naps else "AND nap = 0"}
+        ORDER BY start
+    """).fetchall()
+    if not rows:
         return None
     
-    return response.json()
+    cols = list(zip(*rows))
+    # offsets repeat heavily, so parse each distinct one once
+    offsets, inverse = np.unique(np.array(cols[2]), return_inverse=True)
+    offset_minutes = np.array([
+        (1 if o[0] != '-' else -1) * (int(o[1:3]) * 60 + int(o[4:6])) for o in offsets
+    ])[inverse]
+    
+    return {
+        'start': np.array(cols[0], dtype='datetime64[ms]'),
+        'end': np.array(cols[1], dtype='datetime64[ms]'),
+        'offset': offset_minutes.astype('timedelta64[m]'),
+        'efficiency': np.array(cols[3], dtype=float),
+        'need_ms': np.array(cols[4], dtype=float),
+        'stages': np.array(cols[5:], dtype=float).reshape(len(STAGE_FIELDS), -1),
+    }
+
+def trailing_sums(np, daily, window):
+    """sum of `daily` over the trailing `window` days ending at each day."""
+    totals = np.concatenate((np.zeros(daily.shape[:-1] + (1,)), np.cumsum(daily, axis=-1)), axis=-1)
+    upper = np.arange(1, daily.shape[-1] + 1)
+    return totals[..., upper] - totals[..., np.maximum(upper - window, 0)]
+
+def sleep_trends(cols, windows=TREND_WINDOWS, need_hours=None):
+    """
+    rolling sleep statistics over daily bins, computed with cumulative sums.
+
+    each sleep is binned to the local date it ended on. for every window the
+    trailing totals at the last day give mean/variance of duration and
+    efficiency, circular mean/spread of bedtime and stage proportions. sleep
+    debt follows the lindley recursion d[t] = max(0, d[t-1] + need - slept)
+    over the last SLEEP_DEBT_DAYS, solved in closed form as
+    S - min(0, cummin(S)) over the deficit cumsum.
+    """
+    import numpy as np
+    
+    local_start = cols['start'] + cols['offset']
+    local_end = cols['end'] + cols['offset']
+    day = local_end.astype('datetime64[D]')
+    first_day = day.min()
+    today = (np.datetime64(int(time.time() * 1000), 'ms') + cols['offset'][-1]).astype('datetime64[D]')
+    index = (day - first_day).astype(int)
+    n_days = max(int(index.max()), int((today - first_day).astype(int))) + 1
+    
+    def daily(values):
+        return np.bincount(index, weights=values, minlength=n_days)
+    
+    in_bed_hours = (cols['end'] - cols['start']).astype(float) / 3_600_000
+    stages = np.nan_to_num(cols['stages'])
+    asleep_hours = stages[:3].sum(axis=0) / 3_600_000
+    has_stages = stages.sum(axis=0) > 0
+    slept = np.where(has_stages, asleep_hours, in_bed_hours)
+    
+    eff = cols['efficiency']
+    eff_ok = ~np.isnan(eff)
+    eff0 = np.where(eff_ok, eff, 0.0)
+    
+    seconds_of_day = (local_start - local_start.astype('datetime64[D]')).astype(float) / 1000
+    angle = 2 * np.pi * seconds_of_day / 86400
+    
+    daily_stack = np.stack([
+        daily(np.ones_like(in_bed_hours)),
+        daily(in_bed_hours), daily(in_bed_hours ** 2),
+        daily(eff_ok.astype(float)), daily(eff0), daily(eff0 ** 2),
+        daily(np.cos(angle)), daily(np.sin(angle)),
+        *(daily(stage) for stage in stages),
+    ])
+    
+    results = []
+    for window in windows:
+        n, dur, dur2, n_eff, e, e2, cos, sin, *stage_sums = trailing_sums(np, daily_stack, window)[:, -1]
+        row = {'window': window, 'nights': int(n)}
+        if n:
+            row['duration_mean'] = dur / n
+            row['duration_sd'] = float(np.sqrt(max(dur2 / n - (dur / n) ** 2, 0.0)))
+            r = np.hypot(cos, sin) / n
+            row['bedtime_mean_hours'] = float(np.arctan2(sin, cos) % (2 * np.pi) * 24 / (2 * np.pi))
+            row['bedtime_sd_hours'] = float(np.sqrt(-2 * np.log(r)) * 24 / (2 * np.pi)) if r > 0 else None
+        if n_eff:
+            row['efficiency_mean'] = e / n_eff
+            row['efficiency_sd'] = float(np.sqrt(max(e2 / n_eff - (e / n_eff) ** 2, 0.0)))
+        stage_total = sum(stage_sums)
+        if stage_total:
+            row['stages'] = {name: float(v / stage_total) for (name, _), v in zip(STAGE_FIELDS, stage_sums)}
+        results.append(row)
+    
+    if need_hours is None:
+        need_ms = cols['need_ms'][~np.isnan(cols['need_ms'])]
+        need_hours = float(np.median(need_ms)) / 3_600_000 if need_ms.size else DEFAULT_SLEEP_NEED_HOURS
+    
+    # days without data neither add nor repay debt
+    nights = daily(np.ones_like(slept)) > 0
+    deficit = np.where(nights, need_hours - daily(slept), 0.0)
+    
+    def debt(deficits):
+        if not deficits.size:
+            return 0.0
+        cumulative = np.cumsum(deficits)
+        return float(cumulative[-1] - min(0.0, cumulative.min()))
+    
+    return {
+        'nights': int(len(slept)),
+        'first_day': str(first_day),
+        'last_day': str(day.max()),
+        'windows': results,
+        'need_hours': need_hours,
+        'debt_hours': debt(deficit[-SLEEP_DEBT_DAYS:]),
+        'debt_hours_7d_ago': debt(deficit[max(0, n_days - 7 - SLEEP_DEBT_DAYS):max(0, n_days - 7)]),
+    }
+
+def format_clock(hours):
+    """hours since midnight as HH:MM."""
+    minutes = int(round(hours * 60)) % (24 * 60)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def cmd_trends(args):
+    """rolling sleep statistics over the cached history."""
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        print("error: trends needs numpy (pip install numpy)")
+        return
+    
+    conn = open_cache()
+    try:
+        cols = load_sleep_columns(conn, include_naps=args.naps)
+    finally:
+        conn.close()
+    if cols is None:
+        print("no cached sleep history. run: python whoop.py sync (or backfill --since DATE)")
+        return
+    
+    trends = sleep_trends(cols, need_hours=args.need)
+    if args.json:
+        print(json.dumps(trends, indent=2))
+        return
+    
+    print(f"📈 sleep trends ({trends['nights']} nights, {trends['first_day']} → {trends['last_day']}):\n")
+    print(f"  {'window':<7} {'nights':>6}  {'duration':<12} {'efficiency':<11} {'bedtime':<13} stages (light/deep/rem/awake)")
+    for row in trends['windows']:
+        label = f"{row['window']}d"
+        if not row['nights']:
+            print(f"  {label:<7} {0:>6}  no data")
+            continue
+        duration = f"{row['duration_mean']:.1f}h ±{row['duration_sd']:.1f}"
+        efficiency = f"{row['efficiency_mean']:.0f}% ±{row['efficiency_sd']:.0f}" if 'efficiency_mean' in row else "-"
+        bedtime = format_clock(row['bedtime_mean_hours'])
+        if row['bedtime_sd_hours'] is not None:
+            bedtime += f" ±{row['bedtime_sd_hours'] * 60:.0f}m"
+        stages = "/".join(f"{v * 100:.0f}%" for v in row['stages'].values()) if 'stages' in row else "-"
+        print(f"  {label:<7} {row['nights']:>6}  {duration:<12} {efficiency:<11} {bedtime:<13} {stages}")
+    
+    print()
+    print(f"  sleep debt ({SLEEP_DEBT_DAYS}d): {trends['debt_hours']:.1f}h (7 days ago: {trends['debt_hours_7d_ago']:.1f}h), need {trends['need_hours']:.1f}h/night")
+
+def _sleep_score(path):
+    return f"json_extract(s.record, '$.score.{path}')"
+
+def _recovery_score(path):
+    return f"json_extract(r.record, '$.score.{path}')"
+
+# (column, sql expression over sleeps s / recoveries r, numpy dtype)
+EXPORT_COLUMNS = [
+    ('sleep_id', "s.id", 'U36'),
+    ('start', "s.start", 'datetime64[ms]'),
+    ('end', "s.end", 'datetime64[ms]'),
+    ('timezone_offset', "json_extract(s.record, '$.timezone_offset')", 'U6'),
+    ('nap', "s.nap", 'bool'),
+    ('score_state', "s.score_state", 'U20'),
+    ('respiratory_rate', _sleep_score('respiratory_rate'), 'float64'),
+    ('sleep_performance_pct', _sleep_score('sleep_performance_percentage'), 'float64'),
+    ('sleep_consistency_pct', _sleep_score('sleep_consistency_percentage'), 'float64'),
+    ('sleep_efficiency_pct', _sleep_score('sleep_efficiency_percentage'), 'float64'),
+    ('in_bed_ms', _sleep_score('stage_summary.total_in_bed_time_milli'), 'float64'),
+    ('awake_ms', _sleep_score('stage_summary.total_awake_time_milli'), 'float64'),
+    ('no_data_ms', _sleep_score('stage_summary.total_no_data_time_milli'), 'float64'),
+    ('light_ms', _sleep_score('stage_summary.total_light_sleep_time_milli'), 'float64'),
+    ('deep_ms', _sleep_score('stage_summary.total_slow_wave_sleep_time_milli'), 'float64'),
+    ('rem_ms', _sleep_score('stage_summary.total_rem_sleep_time_milli'), 'float64'),
+    ('sleep_cycle_count', _sleep_score('stage_summary.sleep_cycle_count'), 'float64'),
+    ('disturbance_count', _sleep_score('stage_summary.disturbance_count'), 'float64'),
+    ('need_baseline_ms', _sleep_score('sleep_needed.baseline_milli'), 'float64'),
+    ('need_from_debt_ms', _sleep_score('sleep_needed.need_from_sleep_debt_milli'), 'float64'),
+    ('need_from_strain_ms', _sleep_score('sleep_needed.need_from_recent_strain_milli'), 'float64'),
+    ('cycle_id', "r.cycle_id", 'float64'),
+    ('recovery_score', _recovery_score('recovery_score'), 'float64'),
+    ('resting_heart_rate', _recovery_score('resting_heart_rate'), 'float64'),
+    ('hrv_rmssd_ms', _recovery_score('hrv_rmssd_milli'), 'float64'),
+    ('spo2_pct', _recovery_score('spo2_percentage'), 'float64'),
+    ('skin_temp_c', _recovery_score('skin_temp_celsius'), 'float64'),
+]
+EXPORT_BATCH_ROWS = 5000
+
+def export_query(since=None):
+    """(sql, params) joining each sleep with its recovery, oldest first."""
+    columns = ",\n            ".join(f"{sql} AS {name}" for name, sql, _ in EXPORT_COLUMNS)
+    where = "s.end IS NOT NULL" + (" AND s.start >= ?" if since else "")
+    sql = f"""
+        SELECT
+            {columns}
+        FROM sleeps s
+        LEFT JOIN recoveries r ON r.sleep_id = s.id
+        WHERE {where}
+        ORDER BY s.start
+    """
+    return sql, [format_api_time(since)] if since else []
+
+def export_count(conn, since=None):
+    """number of rows the export would write."""
+    sql, params = export_query(since)
+    return conn.execute(f"SELECT COUNT(*) FROM ({sql})", params).fetchone()[0]
+
+def iter_export_batches(conn, since=None, batch_rows=EXPORT_BATCH_ROWS):
+    """yield lists of export rows, at most batch_rows at a time."""
+    sql, params = export_query(since)
+    cursor = conn.execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(batch_rows)
+        if not rows:
+            return
+        yield rows
+
+def batch_arrays(np, rows):
+    """one numpy array per export column for a batch of rows."""
+    arrays = {}
+    for i, (name, _, dtype) in enumerate(EXPORT_COLUMNS):
+        values = [row[i] for row in rows]
+        if dtype.startswith('datetime64'):
+            values = [v.rstrip('Z') if v else None for v in values]
+        elif dtype.startswith('U'):
+            values = ['' if v is None else str(v) for v in values]
+        elif dtype == 'bool':
+            values = [bool(v) for v in values]
+        arrays[name] = np.array(values, dtype=dtype)
+    return arrays
+
+def export_csv(conn, path, since=None):
+    """stream the export table to csv. returns row count."""
+    import csv
+    count = 0
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([name for name, _, _ in EXPORT_COLUMNS])
+        for rows in iter_export_batches(conn, since):
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+def export_parquet(conn, path, since=None):
+    """stream the export table to parquet, one row group per batch. returns row count."""
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    writer = None
+    count = 0
+    try:
+        for rows in iter_export_batches(conn, since):
+            arrays = batch_arrays(np, rows)
+            table = pa.table({name: pa.array(values, from_pandas=True) for name, values in arrays.items()})
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression='zstd')
+            writer.write_table(table)
+            count += len(rows)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+def export_npz(conn, path, since=None):
+    """
+    stream the export table to an npz of per-column arrays. returns row count.
+
+    each column is filled into an on-disk .npy memmap batch by batch, then the
+    files are zipped into the npz, so only one batch is ever held in memory.
+    """
+    import shutil
+    import tempfile
+    import zipfile
+    import numpy as np
+    
+    total = export_count(conn, since)
+    
+    tmp_dir = Path(tempfile.mkdtemp(prefix=".export-", dir=path.parent))
+    try:
+        columns = {
+            name: np.lib.format.open_memmap(tmp_dir / f"{name}.npy", mode='w+', dtype=dtype, shape=(total,))
+            for name, _, dtype in EXPORT_COLUMNS
+        }
+        offset = 0
+        for rows in iter_export_batches(conn, since):
+            # the count query and this scan can disagree if a sync lands in between
+            rows = rows[:total - offset]
+            for name, values in batch_arrays(np, rows).items():
+                columns[name][offset:offset + len(rows)] = values
+            offset += len(rows)
+            if offset >= total:
+                break
+        for column in columns.values():
+            column.flush()
+        del columns
+        
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+            for name, _, _ in EXPORT_COLUMNS:
+                zf.write(tmp_dir / f"{name}.npy", f"{name}.npy")
+        os.replace(tmp_path, path)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return offset
+
+EXPORT_WRITERS = {'csv': export_csv, 'parquet': export_parquet, 'npz': export_npz}
+
+def export_summary(conn, since=None):
+    """compact aggregate facts over the export table, computed in sqlite."""
+    sql, params = export_query(since)
+    row = conn.execute(f"""
+        SELECT
+            COUNT(*),
+            MIN(start), MAX(start),
+            AVG((julianday(end) - julianday(start)) * 24),
+            AVG(sleep_efficiency_pct),
+            AVG(sleep_performance_pct),
+            AVG(recovery_score),
+            AVG(hrv_rmssd_ms),
+            AVG(resting_heart_rate),
+            COUNT(recovery_score)
+        FROM ({sql})
+        WHERE nap = 0
+    """, params).fetchone()
+    keys = ('nights', 'first', 'last', 'duration_hours', 'efficiency_pct', 'performance_pct',
+            'recovery_score', 'hrv_ms', 'resting_hr', 'recoveries')
+    return dict(zip(keys, row))
+
+def format_export_summary(summary, export_path):
+    """summary facts as short markdown lines for the memory system."""
+    def fmt(value, spec, unit=""):
+        return "n/a" if value is None else f"{value:{spec}}{unit}"
+    
+    return "\n".join([
+        f"- whoop history: {summary['nights']} nights, {summary['first'][:10]} to {summary['last'][:10]}",
+        f"- average sleep: {fmt(summary['duration_hours'], '.1f', 'h')} in bed, "
+        f"{fmt(summary['efficiency_pct'], '.0f', '%')} efficiency, {fmt(summary['performance_pct'], '.0f', '%')} performance",
+        f"- average recovery: {fmt(summary['recovery_score'], '.0f', '%')} over {summary['recoveries']} days, "
+        f"hrv {fmt(summary['hrv_ms'], '.0f', 'ms')}, resting hr {fmt(summary['resting_hr'], '.0f', 'bpm')}",
+        f"- full table: {export_path}",
+    ])
+
+def cmd_export(args):
+    """export cached sleep, stage and recovery data as one wide table."""
+    since = None
+    if args.since:
+        try:
+            since = datetime.strptime(args.since, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+        except ValueError:
+            print(f"error: --since must be YYYY-MM-DD, got {args.since}")
+            return
+    
+    path = Path(args.out) if args.out else EXPORT_DIR / f"whoop-{datetime.now().strftime('%Y-%m-%d')}.{args.format}"
+    
+    conn = open_cache()
+    try:
+        # check before the writer creates the file, so an empty cache leaves nothing behind
+        if not export_count(conn, since):
+            print("no cached sleep data to export. run: python whoop.py sync (or backfill --since DATE)")
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        started = time.monotonic()
+        try:
+            count = EXPORT_WRITERS[args.format](conn, path, since)
+        except ImportError as e:
+            print(f"error: {args.format} export needs {e.name} (pip install {e.name})")
+            return
+        elapsed = time.monotonic() - started
+        summary = export_summary(conn, since) if args.memory_summary and count else None
+    finally:
+        conn.close()
+    
+    size_kb = path.stat().st_size / 1024
+    print(f"✓ exported {count} row(s) × {len(EXPORT_COLUMNS)} columns to {path} ({size_kb:.0f}KB, {elapsed:.2f}s)")
+    
+    if summary:
+        import subprocess
+        content = format_export_summary(summary, path)
+        result = subprocess.run([
+            sys.executable, str(MEMORY_SCRIPT), "create",
+            "--type", "facts",
+            "--name", f"whoop sleep summary {datetime.now().strftime('%Y-%m-%d')}",
+            "--content", content,
+            "--tags", "whoop,sleep,recovery,health",
+        ], capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"memory summary failed: {result.stderr.strip() or result.stdout.strip()}")
+        else:
+            print(result.stdout.strip())
 
 def cmd_auth(args):
     """authenticate with whoop via oauth."""
-    if not CLIENT_ID or not CLIENT_SECRET:
-        print("error: WHOOP_CLIENT_ID and WHOOP_CLIENT_SECRET must be set in environment")
-        print("add them to Settings > Developers > Secrets")
+    import requests
+    import webbrowser
+    from http.server import HTTPServer
+    
+    client_id, client_secret = get_client().credentials()
+    if not client_id or not client_secret:
+        print(f"error: client_id and client_secret must be set in {CREDS_PATH}")
         return
     
     # start local server for callback
+    OAuthCallbackHandler = make_callback_handler()
     server = HTTPServer(('localhost', 8080), OAuthCallbackHandler)
     
     # build auth url
     auth_url = (
         f"{AUTH_URL}?"
-        f"client_id={CLIENT_ID}&"
+        f"client_id={client_id}&"
         f"redirect_uri={REDIRECT_URI}&"
         f"response_type=code&"
         f"scope=offline read:sleep read:recovery"
@@ -149,13 +1104,17 @@ def cmd_auth(args):
         return
     
     # exchange code for tokens
-    response = requests.post(TOKEN_URL, data={
-        'grant_type': 'authorization_code',
-        'code': OAuthCallbackHandler.auth_code,
-        'client_id': CLIENT_ID,
-        'client_secret': CLIENT_SECRET,
-        'redirect_uri': REDIRECT_URI
-    })
+    try:
+        response = get_client().http_request('POST', TOKEN_URL, retry_statuses={429}, idempotent=False, data={
+            'grant_type': 'authorization_code',
+            'code': OAuthCallbackHandler.auth_code,
+            'client_id': client_id,
+            'client_secret': client_secret,
+            'redirect_uri': REDIRECT_URI
+        })
+    except requests.RequestException as e:
+        print(f"token exchange failed: {e}")
+        return
     
     if response.status_code != 200:
         print(f"token exchange failed: {response.text}")
@@ -170,8 +1129,10 @@ def cmd_auth(args):
 def cmd_status(args):
     """check authentication status."""
     tokens = load_tokens()
+    account = f" as user {WHOOP_USER}" if WHOOP_USER else ""
     if not tokens:
-        print("not authenticated. run: python whoop.py auth")
+        user_flag = f"--user {WHOOP_USER} " if WHOOP_USER else ""
+        print(f"not authenticated. run: python whoop.py {user_flag}auth")
         return
     
     expires_at = datetime.fromtimestamp(tokens.get('expires_at', 0))
@@ -181,106 +1142,579 @@ def cmd_status(args):
         time_left = expires_at - datetime.now()
         hours = int(time_left.total_seconds() // 3600)
         minutes = int((time_left.total_seconds() % 3600) // 60)
-        print(f"✓ authenticated - token expires in {hours}h {minutes}m")
+        print(f"✓ authenticated{account} - token expires in {hours}h {minutes}m")
 
-def cmd_sleep(args):
-    """get recent sleep data."""
-    end = datetime.now()
-    start = end - timedelta(days=args.days)
+def sync_all_users(workers, verbose=False):
+    """
+    sync every authenticated account, `workers` at a time.
+
+    each account syncs in its own whoop.py process: tokens, cache and rate
+    limit are per account, and a slow or throttled account only holds up
+    its own worker. returns the number of accounts that failed.
+    """
+    import subprocess
+    from concurrent.futures import ThreadPoolExecutor
     
-    params = {
-        'start': start.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
-        'end': end.strftime('%Y-%m-%dT%H:%M:%S.000Z')
-    }
+    users = accounts(WHOOP_HOME)
+    if not users:
+        print("no authenticated accounts. run: python whoop.py [--user ID] auth")
+        return 1
     
-    data = make_api_request('/developer/v2/activity/sleep', params)
-    if not data:
+    def sync_one(user):
+        argv = [sys.executable, os.path.abspath(__file__)]
+        argv += ["--verbose"] if verbose else []
+        argv += ["--user", user] if user else []
+        started = time.monotonic()
+        result = subprocess.run([*argv, "sync"], capture_output=True, text=True)
+        return user, result, time.monotonic() - started
+    
+    started = time.monotonic()
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(users)))) as pool:
+        for user, result, elapsed in pool.map(sync_one, users):
+            label = user or "default"
+            for line in result.stdout.splitlines():
+                print(f"[{label}] {line}")
+            for line in result.stderr.splitlines():
+                print(f"[{label}] {line}", file=sys.stderr)
+            if result.returncode != 0:
+                failed += 1
+                print(f"[{label}] ✗ sync failed ({elapsed:.1f}s)")
+    
+    print(f"✓ synced {len(users) - failed}/{len(users)} account(s) in {time.monotonic() - started:.1f}s")
+    return failed
+
+def cmd_sync(args):
+    """sync new sleep and recovery records into the local cache."""
+    if args.all_users:
+        if sync_all_users(args.workers, args.verbose):
+            sys.exit(1)
         return
     
-    records = data.get('records', [])
-    if not records:
-        print(f"no sleep data found for last {args.days} days")
+    conn = open_cache()
+    try:
+        for kind, sync in (("sleep", sync_sleeps), ("recovery", sync_recoveries)):
+            result = sync(conn)
+            if result is None:
+                sys.exit(1)
+            fetched, new = result
+            print(f"✓ synced {fetched} {kind} record(s), {new} new")
+    finally:
+        conn.close()
+
+def cmd_backfill(args):
+    """backfill full sleep and recovery history into the local cache."""
+    try:
+        since = datetime.strptime(args.since, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    except ValueError:
+        print(f"error: --since must be YYYY-MM-DD, got {args.since}")
         return
     
-    print(f"🛌 sleep data (last {args.days} days):\n")
-    for sleep in records:
-        start_time = datetime.fromisoformat(sleep['start'].replace('Z', '+00:00'))
-        end_time = datetime.fromisoformat(sleep['end'].replace('Z', '+00:00'))
-        duration = (end_time - start_time).total_seconds() / 3600
-        
-        score = sleep.get('score', {})
-        sleep_efficiency = score.get('sleep_efficiency_percentage', 0)
+    kinds = list(RECORD_KINDS) if args.kind == "all" else [args.kind]
+    conn = open_cache()
+    try:
+        for kind in kinds:
+            started = time.monotonic()
+            
+            def progress(fetched):
+                elapsed = time.monotonic() - started
+                rate = fetched / elapsed if elapsed > 0 else 0.0
+                print(f"\r  {kind}: {fetched} records ({rate:.1f}/s)", end="", flush=True)
+            
+            try:
+                result = backfill_records(conn, kind, since, progress=progress)
+            except KeyboardInterrupt:
+                result = None
+            print()
+            if result is None:
+                print("backfill interrupted; re-run the same command to resume")
+                return
+            
+            fetched, new, resumed = result
+            elapsed = time.monotonic() - started
+            rate = fetched / elapsed if elapsed > 0 else 0.0
+            note = " (resumed)" if resumed else ""
+            print(f"✓ backfilled {fetched} {kind} record(s), {new} new, in {elapsed:.1f}s ({rate:.1f} records/s){note}")
+    finally:
+        conn.close()
+
+def cmd_sleep(args):
+    """get recent sleep data from the local cache."""
+    conn = open_cache()
+    try:
+        # first use has nothing cached yet, so sync even without --refresh
+        if args.refresh or get_sync_state(conn, "sleep_synced_at") is None:
+            if sync_sleeps(conn, max(args.days, SYNC_INITIAL_DAYS)) is None:
+                return
         
-        print(f"  {start_time.strftime('%Y-%m-%d %H:%M')} - {end_time.strftime('%H:%M')}")
-        print(f"    duration: {duration:.1f}h")
-        print(f"    efficiency: {sleep_efficiency}%")
-        print(f"    id: {sleep['id']}")
-        print()
+        since = datetime.now(timezone.utc) - timedelta(days=args.days)
+        records = [r for r in cached_sleeps(conn, since) if r.get('end')]
+        synced_at = get_sync_state(conn, "sleep_synced_at")
+        oldest = conn.execute("SELECT MIN(start) FROM sleeps").fetchone()[0]
+    finally:
+        conn.close()
+    
+    # incremental syncs only move forward, so a longer window than the cache holds needs a backfill
+    missing = oldest is not None and parse_api_time(oldest) > since + timedelta(days=2)
+    if not records:
+        print(f"no sleep data found for last {args.days} days")
+    else:
+        print(f"🛌 sleep data (last {args.days} days, synced {synced_at}):\n")
+        for sleep in records:
+            print_sleep(sleep)
+    if missing:
+        print(f"\nnote: the cache has no sleeps before {oldest[:10]}. "
+              f"for older history run: python whoop.py backfill --since {since.strftime('%Y-%m-%d')}")
 
-def cmd_is_sleeping(args):
-    """check if currently sleeping."""
-    # get sleep from last 24 hours
-    end = datetime.now()
-    start = end - timedelta(hours=24)
-    
-    params = {
-        'start': start.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
-        'end': end.strftime('%Y-%m-%dT%H:%M:%S.000Z')
-    }
+def parse_timestamp(value):
+    """argparse type: an iso timestamp or "now". naive times are local."""
+    if value == "now":
+        return datetime.now().astimezone()
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an iso timestamp: {value}")
+    return moment if moment.tzinfo else moment.astimezone()
+
+def print_interval(interval, tz):
+    """print one index interval in timezone `tz`."""
+    start, end, sleep_id, nap = interval
+    start_time = datetime.fromtimestamp(start, tz)
+    label = " (nap)" if nap else ""
+    if end is None:
+        print(f"  {start_time.strftime('%Y-%m-%d %H:%M')} - ongoing{label}")
+    else:
+        end_time = datetime.fromtimestamp(end, tz)
+        print(f"  {start_time.strftime('%Y-%m-%d %H:%M')} - {end_time.strftime('%H:%M')}, {(end - start) / 3600:.1f}h{label}")
+    print(f"    id: {sleep_id}")
+
+def indexed_sleeps(args, latest):
+    """
+    the up-to-date sleep index, syncing first on --refresh or first use.
+    warns when `latest` is past the last sync. returns None if the sync failed.
+    """
+    conn = open_cache()
+    try:
+        if args.refresh or get_sync_state(conn, "sleep_synced_at") is None:
+            if sync_sleeps(conn) is None:
+                return None
+        synced_at = get_sync_state(conn, "sleep_synced_at")
+        index = load_sleep_index(conn)
+    finally:
+        conn.close()
     
-    data = make_api_request('/developer/v2/activity/sleep', params)
-    if not data:
+    if latest > parse_api_time(synced_at) + timedelta(minutes=1):
+        print(f"⚠ cache synced at {synced_at}, later sleeps may be missing (use --refresh)")
+    return index
+
+def cmd_asleep_at(args):
+    """check whether a cached sleep covers a point in time."""
+    moment = args.timestamp
+    index = indexed_sleeps(args, moment)
+    if index is None:
         return
     
-    records = data.get('records', [])
-    if not records:
-        print("no recent sleep data")
+    found = index.at(moment.timestamp())
+    when = moment.strftime('%Y-%m-%d %H:%M %Z')
+    if not found:
+        print(f"awake at {when}")
+        return False
+    print(f"✓ asleep at {when}")
+    for interval in found:
+        print_interval(interval, moment.tzinfo)
+    return True
+
+def cmd_overlaps(args):
+    """list cached sleeps overlapping a time range."""
+    if args.end < args.start:
+        print("end is before start")
+        return
+    index = indexed_sleeps(args, args.end)
+    if index is None:
         return
     
-    # check most recent sleep
-    latest = records[-1]
-    start_time = datetime.fromisoformat(latest['start'].replace('Z', '+00:00'))
-    end_time = datetime.fromisoformat(latest['end'].replace('Z', '+00:00'))
-    now = datetime.now(start_time.tzinfo)
-    
-    if start_time <= now <= end_time:
-        duration_hours = (now - start_time).total_seconds() / 3600
+    found = index.overlapping(args.start.timestamp(), args.end.timestamp())
+    span = f"{args.start.strftime('%Y-%m-%d %H:%M')} - {args.end.strftime('%Y-%m-%d %H:%M %Z')}"
+    if not found:
+        print(f"no sleeps overlap {span}")
+        return
+    print(f"🛌 {len(found)} sleep(s) overlap {span}:\n")
+    for interval in found:
+        print_interval(interval, args.start.tzinfo)
+
+def refresh_sleep_state():
+    """sync the cache, which rewrites the sleep state. returns the new state or None."""
+    conn = open_cache()
+    try:
+        result = sync_sleeps(conn)
+    finally:
+        conn.close()
+    return read_sleep_state() if result is not None else None
+
+def report_sleep_state(state):
+    """print whether the state says sleeping. returns the boolean."""
+    now = datetime.now(timezone.utc)
+    if state_is_sleeping(state, now):
+        duration_hours = (now - parse_api_time(state['start'])).total_seconds() / 3600
         print(f"✓ sleeping (started {duration_hours:.1f}h ago)")
-        print(f"  sleep_id: {latest['id']}")
+        print(f"  sleep_id: {state['sleep_id']}")
         return True
-    else:
-        hours_since = (now - end_time).total_seconds() / 3600
-        print(f"awake (last sleep ended {hours_since:.1f}h ago)")
+    
+    if not state or not state.get('end'):
+        print("no recent sleep data")
         return False
+    hours_since = (now - parse_api_time(state['end'])).total_seconds() / 3600
+    print(f"awake (last sleep ended {hours_since:.1f}h ago)")
+    return False
 
-def cmd_sleep_details(args):
-    """get detailed sleep stage breakdown."""
-    data = make_api_request(f'/v2/activity/sleep/{args.sleep_id}')
+def wait_for_sleep_state(want_sleeping, timeout):
+    """
+    block until the stored state matches `want_sleeping`, or timeout.
+
+    wakes on writes to the state file (sync, process-events) and at the stored
+    end time, never by polling the api. returns the final state or None.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    # watch before the first read so a write in between is not missed
+    watcher = FileWatcher(SLEEP_STATE_PATH)
+    try:
+        while True:
+            state = read_sleep_state()
+            now = datetime.now(timezone.utc)
+            if state_is_sleeping(state, now) == want_sleeping:
+                return state
+            
+            wait = None if deadline is None else deadline - time.monotonic()
+            if wait is not None and wait <= 0:
+                return None
+            if not want_sleeping and state and state.get('end'):
+                until_end = (parse_api_time(state['end']) - now).total_seconds() + 1
+                wait = until_end if wait is None else min(wait, until_end)
+            watcher.wait(wait)
+    finally:
+        watcher.close()
+
+def cmd_is_sleeping(args):
+    """check if currently sleeping, from the local sleep state."""
+    if args.wait_until_asleep or args.wait_until_awake:
+        state = wait_for_sleep_state(args.wait_until_asleep, args.timeout)
+        if state is None:
+            print("timed out waiting for sleep state")
+            sys.exit(2)
+        return report_sleep_state(state)
+    
+    state = read_sleep_state()
+    if state is None or time.time() - state.get('updated_at', 0) > args.max_age:
+        fresh = refresh_sleep_state()
+        if fresh is not None:
+            state = fresh
+        elif state is not None:
+            age_minutes = (time.time() - state.get('updated_at', 0)) / 60
+            print(f"⚠ live refresh failed, using state from {age_minutes:.0f}min ago")
+        else:
+            return
+    
+    return report_sleep_state(state)
+
+def cmd_sleep_event(args):
+    """apply a sleep.updated event: fetch the sleep, cache it, update the sleep state."""
+    data = make_api_request(f"{SLEEP_ENDPOINT}/{args.sleep_id}")
     if not data:
         return
     
-    start_time = datetime.fromisoformat(data['start'].replace('Z', '+00:00'))
-    end_time = datetime.fromisoformat(data['end'].replace('Z', '+00:00'))
+    conn = open_cache()
+    try:
+        with conn:
+            upsert_sleeps(conn, [data])
+        state = write_sleep_state(latest_cached_sleep(conn), "webhook")
+    finally:
+        conn.close()
+    
+    status = "sleeping" if state_is_sleeping(state) else "awake"
+    print(f"✓ sleep {args.sleep_id} cached, state: {status}")
+
+def open_events():
+    """open the webhook event queue. webhook-server.ts creates the same schema."""
+    import sqlite3
+    WHOOP_HOME.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(EVENTS_PATH, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sleep_id TEXT NOT NULL,
+            type TEXT NOT NULL,
+            trace_id TEXT UNIQUE,
+            received_at REAL NOT NULL,
+            processed_at REAL,
+            user_id TEXT
+        );
+        CREATE INDEX IF NOT EXISTS events_pending ON events(processed_at, sleep_id);
+        CREATE TABLE IF NOT EXISTS triggered (
+            sleep_id TEXT PRIMARY KEY,
+            triggered_at REAL NOT NULL,
+            events INTEGER NOT NULL,
+            lag REAL NOT NULL
+        );
+    """)
+    # queues created before accounts existed have no user_id column
+    if 'user_id' not in {row[1] for row in conn.execute("PRAGMA table_info(events)")}:
+        conn.execute("ALTER TABLE events ADD COLUMN user_id TEXT")
+    return conn
+
+def pending_events(events, debounce, now=None):
+    """
+    unprocessed events coalesced per sleep id, split into (ready, settling).
+
+    a sleep is ready once its newest event is older than `debounce`, so a
+    burst of sleep.updated events for one night is handled as one. each
+    entry is (user id, sleep id, event count, first received, last received,
+    max event id).
+    """
+    now = time.time() if now is None else now
+    rows = events.execute(
+        "SELECT user_id, sleep_id, COUNT(*), MIN(received_at), MAX(received_at), MAX(id) "
+        "FROM events WHERE processed_at IS NULL GROUP BY user_id, sleep_id ORDER BY MIN(id)"
+    ).fetchall()
+    ready = [row for row in rows if row[4] <= now - debounce]
+    settling = [row for row in rows if row[4] > now - debounce]
+    return ready, settling
+
+def event_account(user_id):
+    """the account a webhook user id belongs to: its own if authenticated, else the default."""
+    if user_id and (account_dir(WHOOP_HOME, user_id) / "tokens.json").exists():
+        return str(user_id)
+    return None
+
+def trigger_exploration(sleep_id):
+    """spawn the night exploration trigger for a sleep, detached."""
+    import subprocess
+    try:
+        subprocess.Popen(
+            ["bun", str(EXPLORATION_TRIGGER), sleep_id],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+    except OSError as e:
+        print(f"⚠ could not start exploration for {sleep_id}: {e}", file=sys.stderr)
+
+def process_account_events(events, rows, trigger, summary):
+    """
+    fetch one account's settled sleeps into its cache and mark their events.
+    returns the sleep ids to trigger, or None if the fetch failed.
+    """
+    try:
+        fetched = get_client().sleeps_by_id([row[1] for row in rows], workers=DETAILS_WORKERS)
+    except WhoopError as e:
+        report_api_error(e)
+        return None
+    summary['fetched'] += len(fetched)
+    
+    if fetched:
+        conn = open_cache()
+        try:
+            with conn:
+                upsert_sleeps(conn, [sleep.raw for sleep in fetched.values()])
+            write_sleep_state(latest_cached_sleep(conn), "webhook")
+        finally:
+            conn.close()
+    
+    now = time.time()
+    to_trigger = []
+    with events:
+        done = {row[0] for row in events.execute("SELECT sleep_id FROM triggered")}
+        for _, sleep_id, count, first_received, _, max_id in rows:
+            if trigger and sleep_id in fetched and sleep_id not in done:
+                events.execute(
+                    "INSERT INTO triggered (sleep_id, triggered_at, events, lag) VALUES (?, ?, ?, ?)",
+                    (sleep_id, now, count, now - first_received)
+                )
+                to_trigger.append(sleep_id)
+                done.add(sleep_id)
+            lags = events.execute(
+                "SELECT ? - received_at FROM events WHERE sleep_id = ? AND id <= ? AND processed_at IS NULL",
+                (now, sleep_id, max_id)
+            ).fetchall()
+            summary['lags'].extend(lag for (lag,) in lags)
+            events.execute(
+                "UPDATE events SET processed_at = ? WHERE sleep_id = ? AND id <= ? AND processed_at IS NULL",
+                (now, sleep_id, max_id)
+            )
+    return to_trigger
+
+def process_events(events, debounce=EVENT_DEBOUNCE, trigger=True, only_account=False):
+    """
+    drain settled events: fetch their sleeps into each account's cache,
+    refresh its sleep state, and trigger exploration once per sleep.
+
+    events are routed to accounts by the webhook's user id; `only_account`
+    (a user id, or None for the default account) restricts the run to one.
+    events only leave the queue after a successful fetch, so an api outage
+    leaves them for the next run. the triggered table is committed before
+    anything is spawned, which makes exploration at-most-once per sleep.
+    returns a summary dict; 'failed' counts sleeps whose fetch failed.
+    """
+    ready, settling = pending_events(events, debounce)
+    by_account = {}
+    for row in ready:
+        by_account.setdefault(event_account(row[0]), []).append(row)
+    if only_account is not False:
+        by_account = {only_account: by_account.get(only_account, [])}
+    
+    summary = {'events': 0, 'sleeps': 0, 'settling': len(settling), 'fetched': 0,
+               'failed': 0, 'triggered': [], 'lags': []}
+    current = WHOOP_USER
+    try:
+        for account, rows in by_account.items():
+            if not rows:
+                continue
+            summary['events'] += sum(row[2] for row in rows)
+            summary['sleeps'] += len(rows)
+            use_account(account)
+            to_trigger = process_account_events(events, rows, trigger, summary)
+            if to_trigger is None:
+                summary['failed'] += len(rows)
+            else:
+                summary['triggered'] += to_trigger
+    finally:
+        use_account(current)
+    
+    for sleep_id in summary['triggered']:
+        trigger_exploration(sleep_id)
+    return summary
+
+def format_lag(lags):
+    """p50/max processing lag of a batch, in seconds."""
+    lags = sorted(lags)
+    if not lags:
+        return "no lag data"
+    return f"lag p50 {lags[len(lags) // 2]:.0f}s max {lags[-1]:.0f}s"
+
+def cmd_process_events(args):
+    """consume the webhook event queue."""
+    import fcntl
+    WHOOP_HOME.mkdir(parents=True, exist_ok=True)
+    with open(EVENTS_LOCK_PATH, 'a') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            print("another process-events run holds the queue, skipping")
+            return
+        
+        events = open_events()
+        try:
+            summary = process_events(events, args.debounce, trigger=not args.no_trigger,
+                                     only_account=WHOOP_USER if args.user else False)
+        finally:
+            events.close()
+    
+    if summary['sleeps']:
+        print(
+            f"✓ {summary['events']} event(s) for {summary['sleeps']} sleep(s), "
+            f"{summary['fetched']} fetched, {len(summary['triggered'])} exploration(s) triggered, "
+            f"{format_lag(summary['lags'])}"
+        )
+    else:
+        print("no settled events")
+    if summary['settling']:
+        print(f"  {summary['settling']} sleep(s) still settling (<{args.debounce:.0f}s since last event)")
+    if summary['failed']:
+        print(f"✗ {summary['failed']} sleep(s) left queued after failed fetches")
+        sys.exit(1)
+
+def cached_scored_sleeps(conn, sleep_ids):
+    """{id: record} for ids whose cached record is already scored."""
+    placeholders = ",".join("?" * len(sleep_ids))
+    rows = conn.execute(
+        f"SELECT id, record FROM sleeps WHERE score_state = 'SCORED' AND id IN ({placeholders})",
+        list(sleep_ids)
+    )
+    return {row[0]: json.loads(row[1]) for row in rows}
+
+def fetch_sleep_details(conn, sleep_ids, workers=DETAILS_WORKERS):
+    """
+    sleep records by id, fetching only what the cache can't answer.
+
+    scored sleeps never change, so a cached scored record is final and is
+    served without touching the network. anything else is fetched on a
+    bounded thread pool over the shared session and written back.
+    returns {id: record} for every id that resolved.
+    """
+    found = cached_scored_sleeps(conn, sleep_ids)
+    missing = [sleep_id for sleep_id in dict.fromkeys(sleep_ids) if sleep_id not in found]
+    if not missing:
+        return found
+    
+    try:
+        fetched = [s.raw for s in get_client().sleeps_by_id(missing, workers=workers).values()]
+    except WhoopError as e:
+        report_api_error(e)
+        return found
+    
+    with conn:
+        upsert_sleeps(conn, fetched)
+    found.update((r['id'], r) for r in fetched)
+    return found
+
+def print_sleep_details(data):
+    """print one sleep's times, efficiency and stage breakdown."""
+    start_time = parse_api_time(data['start'])
+    end_time = parse_api_time(data['end'])
     duration = (end_time - start_time).total_seconds() / 3600
     
-    score = data.get('score', {})
+    score = data.get('score') or {}
     
     print(f"🛌 sleep details:\n")
+    print(f"  id: {data['id']}")
     print(f"  date: {start_time.strftime('%Y-%m-%d')}")
     print(f"  time: {start_time.strftime('%H:%M')} - {end_time.strftime('%H:%M')}")
     print(f"  duration: {duration:.1f}h")
     print(f"  efficiency: {score.get('sleep_efficiency_percentage', 0)}%")
+    if data.get('score_state') != 'SCORED':
+        print(f"  score state: {data.get('score_state', 'unknown').lower()}")
     print()
     
     if 'stage_summary' in score:
         stages = score['stage_summary']
         print("  stage breakdown:")
         for stage_name, stage_data in stages.items():
-            minutes = stage_data.get('total_in_bed_time_milli', 0) / 60000
-            print(f"    {stage_name}: {minutes:.0f}min")
+            minutes = stage_data / 60000 if stage_name.endswith('_milli') else None
+            if minutes is not None:
+                print(f"    {stage_name.removeprefix('total_').removesuffix('_time_milli')}: {minutes:.0f}min")
+        print()
+
+def cmd_sleep_details(args):
+    """get detailed sleep stage breakdown for one or more sleeps."""
+    conn = open_cache()
+    try:
+        sleep_ids = list(args.sleep_ids)
+        if args.all_in_range:
+            get_client().priority = PRIORITY_BULK
+            if get_sync_state(conn, "sleep_synced_at") is None and sync_sleeps(conn, max(args.days, SYNC_INITIAL_DAYS)) is None:
+                return
+            since = datetime.now(timezone.utc) - timedelta(days=args.days)
+            sleep_ids += [r['id'] for r in cached_sleeps(conn, since) if r.get('end')]
+        if not sleep_ids:
+            print("no sleep ids given (pass ids or --all-in-range)")
+            return
+        
+        found = fetch_sleep_details(conn, sleep_ids, workers=args.workers)
+    finally:
+        conn.close()
+    
+    records = sorted(found.values(), key=lambda r: r['start'])
+    for data in records:
+        if data.get('end'):
+            print_sleep_details(data)
+    
+    for sleep_id in dict.fromkeys(sleep_ids):
+        if sleep_id not in found:
+            print(f"sleep {sleep_id} not found")
 
 def main():
     parser = argparse.ArgumentParser(description="whoop cli - sleep tracking")
+    parser.add_argument("--verbose", "-v", action="store_true", help="print http request/retry/latency summary")
+    parser.add_argument("--user", default=os.environ.get("WHOOP_USER"), help="whoop user id of the account to use (default: WHOOP_USER, else the default account)")
     subparsers = parser.add_subparsers(dest="command", help="command")
     
     # auth command
@@ -294,15 +1728,76 @@ def main():
     # sleep command
     sleep_parser = subparsers.add_parser("sleep", help="get recent sleep data")
     sleep_parser.add_argument("--days", type=int, default=7, help="days of history (default: 7)")
+    sleep_parser.add_argument("--refresh", action="store_true", help="sync with the api before reading the cache")
     sleep_parser.set_defaults(func=cmd_sleep)
     
+    # trends command
+    trends_parser = subparsers.add_parser("trends", help="rolling sleep statistics from the local cache")
+    trends_parser.add_argument("--need", type=float, help="nightly sleep need in hours (default: whoop baseline, else 8)")
+    trends_parser.add_argument("--naps", action="store_true", help="include naps")
+    trends_parser.add_argument("--json", action="store_true", help="print raw statistics as json")
+    trends_parser.set_defaults(func=cmd_trends)
+    
+    # export command
+    export_parser = subparsers.add_parser("export", help="export cached sleep, stage and recovery data")
+    export_parser.add_argument("--format", choices=list(EXPORT_WRITERS), default="parquet", help="output format (default: parquet)")
+    export_parser.add_argument("--out", help="output path (default: exports/whoop-DATE.FORMAT under the whoop home)")
+    export_parser.add_argument("--since", help="only sleeps starting on or after this date (YYYY-MM-DD)")
+    export_parser.add_argument("--memory-summary", action="store_true", help="also store a compact fact summary via memory.py create")
+    export_parser.set_defaults(func=cmd_export)
+    
+    # sync command
+    sync_parser = subparsers.add_parser("sync", help="sync new sleep and recovery records into the local cache")
+    sync_parser.add_argument("--all-users", action="store_true", help="sync every authenticated account concurrently")
+    sync_parser.add_argument("--workers", type=int, default=SYNC_USER_WORKERS, help=f"accounts synced at once with --all-users (default: {SYNC_USER_WORKERS})")
+    sync_parser.set_defaults(func=cmd_sync, priority=PRIORITY_BULK)
+    
+    # backfill command
+    backfill_parser = subparsers.add_parser("backfill", help="pull full sleep history into the local cache")
+    backfill_parser.add_argument("--since", required=True, help="start date (YYYY-MM-DD)")
+    backfill_parser.add_argument("--kind", choices=["all", *RECORD_KINDS], default="all", help="record kind (default: all)")
+    backfill_parser.set_defaults(func=cmd_backfill, priority=PRIORITY_BULK)
+    
     # is-sleeping command
     is_sleeping_parser = subparsers.add_parser("is-sleeping", help="check if currently sleeping")
+    is_sleeping_parser.add_argument("--max-age", type=float, default=SLEEP_STATE_MAX_AGE,
+                                    help=f"seconds before cached state is refreshed live (default: {SLEEP_STATE_MAX_AGE})")
+    wait_group = is_sleeping_parser.add_mutually_exclusive_group()
+    wait_group.add_argument("--wait-until-asleep", action="store_true", help="block until the sleep state says sleeping")
+    wait_group.add_argument("--wait-until-awake", action="store_true", help="block until the sleep state says awake")
+    is_sleeping_parser.add_argument("--timeout", type=float, help="give up waiting after this many seconds (exit 2)")
     is_sleeping_parser.set_defaults(func=cmd_is_sleeping)
     
+    # asleep-at command
+    asleep_parser = subparsers.add_parser("asleep-at", help="check if a cached sleep covers a point in time")
+    asleep_parser.add_argument("timestamp", type=parse_timestamp, help="iso timestamp (local if no offset) or 'now'")
+    asleep_parser.add_argument("--refresh", action="store_true", help="sync with the api first")
+    asleep_parser.set_defaults(func=cmd_asleep_at)
+    
+    # overlaps command
+    overlaps_parser = subparsers.add_parser("overlaps", help="list cached sleeps overlapping a time range")
+    overlaps_parser.add_argument("start", type=parse_timestamp, help="iso timestamp (local if no offset)")
+    overlaps_parser.add_argument("end", type=parse_timestamp, help="iso timestamp (local if no offset) or 'now'")
+    overlaps_parser.add_argument("--refresh", action="store_true", help="sync with the api first")
+    overlaps_parser.set_defaults(func=cmd_overlaps)
+    
+    # sleep-event command
+    event_parser = subparsers.add_parser("sleep-event", help="apply a sleep.updated webhook event")
+    event_parser.add_argument("sleep_id", help="sleep id (uuid)")
+    event_parser.set_defaults(func=cmd_sleep_event)
+    
+    # process-events command
+    events_parser = subparsers.add_parser("process-events", help="consume queued webhook events")
+    events_parser.add_argument("--debounce", type=float, default=EVENT_DEBOUNCE, help=f"seconds a sleep's events must be quiet (default: {EVENT_DEBOUNCE})")
+    events_parser.add_argument("--no-trigger", action="store_true", help="cache and mark events without triggering exploration")
+    events_parser.set_defaults(func=cmd_process_events)
+    
     # sleep-details command
     details_parser = subparsers.add_parser("sleep-details", help="get sleep stage details")
-    details_parser.add_argument("sleep_id", help="sleep id (uuid)")
+    details_parser.add_argument("sleep_ids", nargs="*", metavar="sleep_id", help="sleep id(s) (uuid)")
+    details_parser.add_argument("--all-in-range", action="store_true", help="every cached sleep in the last --days")
+    details_parser.add_argument("--days", type=int, default=7, help="range for --all-in-range (default: 7)")
+    details_parser.add_argument("--workers", type=int, default=DETAILS_WORKERS, help=f"concurrent fetches (default: {DETAILS_WORKERS})")
     details_parser.set_defaults(func=cmd_sleep_details)
     
     args = parser.parse_args()
@@ -311,7 +1806,16 @@ def main():
         parser.print_help()
         return
     
-    args.func(args)
+    use_account(args.user)
+    # bulk jobs leave part of the shared rate budget to interactive commands
+    if getattr(args, 'priority', None):
+        get_client().priority = args.priority
+    
+    try:
+        args.func(args)
+    finally:
+        if args.verbose:
+            print_http_stats()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,686 @@
+#!/usr/bin/env python3
+"""
+whoop client - importable whoop api access for other skills
+
+WhoopClient holds the http, token and paging logic behind whoop.py and
+returns typed records instead of printing. AsyncWhoopClient runs the same
+calls on worker threads, so coroutines fan out over one connection pool and
+one token.
+
+    from whoop_client import WhoopClient
+    with WhoopClient() as whoop:
+        for sleep in whoop.sleeps(days=7):
+            print(sleep.start, sleep.duration_hours)
+"""
+
+# requests is imported on first use to keep `import whoop_client` (and
+# whoop.py, which builds on it) cheap for polled commands.
+import fcntl
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_BASE_URL = "https://api.prod.whoop.com"
+DEFAULT_HOME = "/home/.z/whoop"
+
+SLEEP_ENDPOINT = "/developer/v2/activity/sleep"
+RECOVERY_ENDPOINT = "/developer/v2/recovery"
+PAGE_LIMIT = 25  # api maximum
+SCOPE = "offline read:sleep read:recovery"
+
+TOKEN_REFRESH_MARGIN = 300  # refresh this many seconds before expiry
+
+HTTP_TIMEOUT = (5, 30)  # connect, read seconds
+HTTP_MAX_RETRIES = 5
+HTTP_BACKOFF_BASE = 0.5
+HTTP_BACKOFF_MAX = 30.0
+HTTP_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+RATE_LIMIT = 100  # requests per window until the api advertises its own limit
+RATE_WINDOW = 60.0
+RATE_BULK_RESERVE = 0.1  # share of the bucket bulk requests leave for interactive ones
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BULK = "bulk"
+
+class WhoopError(Exception):
+    """an api call failed. `status` is the http status when there was a response."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+class AuthError(WhoopError):
+    """no usable tokens or credentials, or the token endpoint refused a refresh."""
+
+def format_api_time(dt):
+    """format a datetime as the api's utc timestamp."""
+    return dt.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+def parse_api_time(value):
+    """parse an api timestamp into an aware datetime."""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+@dataclass(frozen=True)
+class Sleep:
+    """one sleep record. stage times are milliseconds keyed by stage name."""
+    id: str
+    start: datetime
+    end: Optional[datetime]
+    nap: bool
+    score_state: Optional[str]
+    timezone_offset: Optional[str] = None
+    efficiency: Optional[float] = None
+    performance: Optional[float] = None
+    respiratory_rate: Optional[float] = None
+    stages: Dict[str, int] = field(default_factory=dict)
+    raw: dict = field(default_factory=dict, repr=False, compare=False)
+
+    @classmethod
+    def from_api(cls, record):
+        score = record.get('score') or {}
+        summary = score.get('stage_summary') or {}
+        stages = {
+            key.removeprefix('total_').removesuffix('_time_milli'): value
+            for key, value in summary.items() if key.endswith('_milli')
+        }
+        return cls(
+            id=record['id'],
+            start=parse_api_time(record['start']),
+            end=parse_api_time(record['end']) if record.get('end') else None,
+            nap=bool(record.get('nap')),
+            score_state=record.get('score_state'),
+            timezone_offset=record.get('timezone_offset'),
+            efficiency=score.get('sleep_efficiency_percentage'),
+            performance=score.get('sleep_performance_percentage'),
+            respiratory_rate=score.get('respiratory_rate'),
+            stages=stages,
+            raw=record,
+        )
+
+    @property
+    def scored(self):
+        return self.score_state == 'SCORED'
+
+    @property
+    def duration_hours(self):
+        """hours in bed; None while the sleep is ongoing."""
+        return (self.end - self.start).total_seconds() / 3600 if self.end else None
+
+    @property
+    def asleep_hours(self):
+        """light + deep + rem hours, when scored."""
+        asleep = sum(self.stages.get(k, 0) for k in ('light_sleep', 'slow_wave_sleep', 'rem_sleep'))
+        return asleep / 3_600_000 if asleep else None
+
+    def contains(self, moment):
+        """true if `moment` falls within this sleep. a sleep without an end is ongoing."""
+        return self.start <= moment and (self.end is None or moment <= self.end)
+
+@dataclass(frozen=True)
+class Recovery:
+    """one recovery record, tied to the cycle and sleep it scores."""
+    cycle_id: int
+    sleep_id: Optional[str]
+    created_at: Optional[datetime]
+    score_state: Optional[str]
+    recovery_score: Optional[float] = None
+    resting_heart_rate: Optional[float] = None
+    hrv_rmssd_ms: Optional[float] = None
+    spo2_pct: Optional[float] = None
+    skin_temp_c: Optional[float] = None
+    raw: dict = field(default_factory=dict, repr=False, compare=False)
+
+    @classmethod
+    def from_api(cls, record):
+        score = record.get('score') or {}
+        return cls(
+            cycle_id=record['cycle_id'],
+            sleep_id=record.get('sleep_id'),
+            created_at=parse_api_time(record['created_at']) if record.get('created_at') else None,
+            score_state=record.get('score_state'),
+            recovery_score=score.get('recovery_score'),
+            resting_heart_rate=score.get('resting_heart_rate'),
+            hrv_rmssd_ms=score.get('hrv_rmssd_milli'),
+            spo2_pct=score.get('spo2_percentage'),
+            skin_temp_c=score.get('skin_temp_celsius'),
+            raw=record,
+        )
+
+def retry_delay(attempt, response=None):
+    """seconds to wait before retry `attempt`, honoring Retry-After when sent."""
+    import random
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after:
+        try:
+            wait = float(retry_after)
+        except ValueError:
+            from email.utils import parsedate_to_datetime
+            try:
+                wait = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                wait = None
+        if wait is not None:
+            return max(0.0, wait) + random.uniform(0, HTTP_BACKOFF_BASE)
+
+    # full jitter: spreads concurrent clients out instead of retrying in lockstep
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+
+def account_dir(home, user_id=None):
+    """
+    state directory for one whoop account: tokens, cache, rate limit.
+    the default account (no user id) lives in the home itself, as before
+    accounts existed; others under home/users/<user id>.
+    """
+    home = Path(home)
+    return home / "users" / str(user_id) if user_id else home
+
+def accounts(home=None):
+    """authenticated accounts under `home`: None for the default account, then user ids."""
+    home = Path(home or os.environ.get("WHOOP_HOME", DEFAULT_HOME))
+    found = [None] if (home / "tokens.json").exists() else []
+    users = home / "users"
+    if users.is_dir():
+        found += sorted(p.name for p in users.iterdir() if (p / "tokens.json").exists())
+    return found
+
+def parse_rate_limit(value):
+    """
+    (limit, window seconds) for the shortest window in an X-RateLimit-Limit
+    header like "100, 100;window=60, 10000;window=86400", or None.
+    """
+    best = None
+    for part in value.split(','):
+        fields = [f.strip() for f in part.split(';')]
+        window = None
+        for f in fields[1:]:
+            key, _, val = f.partition('=')
+            if key == 'window':
+                try:
+                    window = float(val)
+                except ValueError:
+                    pass
+        try:
+            limit = int(fields[0])
+        except ValueError:
+            continue
+        if window and limit > 0 and (best is None or window < best[1]):
+            best = (limit, window)
+    return best
+
+class RateLimiter:
+    """
+    token bucket shared by every process using the same whoop home.
+
+    the bucket lives in a small json file updated under an fcntl lock, so a
+    backfill, the webhook consumer and a polled is-sleeping all draw from
+    one budget. it refills at the limit the api last advertised, and while
+    the api's current window is known (X-RateLimit-Remaining/-Reset) no more
+    than its remaining requests are handed out. bulk requests stop while
+    `reserve` of the limit is left, which keeps interactive requests moving
+    during long jobs. a 429 blocks everyone until the api's reset.
+    """
+
+    def __init__(self, path, limit=RATE_LIMIT, window=RATE_WINDOW, reserve=RATE_BULK_RESERVE):
+        self.path = Path(path)
+        self.limit = limit
+        self.window = window
+        self.reserve = reserve
+
+    def _transact(self, update):
+        """run update(state, now) on the refilled state under the lock, then save it."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        with os.fdopen(fd, 'r+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                state = json.loads(f.read() or '{}')
+            except ValueError:
+                state = {}
+            now = time.time()
+            limit = state.setdefault('limit', self.limit)
+            window = state.setdefault('window', self.window)
+            elapsed = max(0.0, now - state.get('updated', now))
+            state['tokens'] = min(limit, state.get('tokens', limit) + elapsed * limit / window)
+            state['updated'] = now
+            if now >= state.get('reset_at', 0):
+                state.pop('remaining', None)
+                state.pop('reset_at', None)
+            result = update(state, now)
+            f.seek(0)
+            f.truncate()
+            json.dump(state, f)
+        return result
+
+    def acquire(self, priority=PRIORITY_INTERACTIVE):
+        """take one token, sleeping until one is free. returns seconds waited."""
+        import random
+
+        def take(state, now):
+            blocked = state.get('blocked_until', 0) - now
+            if blocked > 0:
+                return blocked
+            floor = 1 + (self.reserve * state['limit'] if priority == PRIORITY_BULK else 0)
+            remaining = state.get('remaining')
+            if remaining is not None and remaining < floor:
+                return state['reset_at'] - now
+            if state['tokens'] < floor:
+                return (floor - state['tokens']) * state['window'] / state['limit']
+            state['tokens'] -= 1
+            if remaining is not None:
+                state['remaining'] = remaining - 1
+            return 0
+
+        waited = 0.0
+        while True:
+            wait = self._transact(take)
+            if wait <= 0:
+                return waited
+            # small jitter so processes woken together don't all hit the lock at once
+            wait += random.uniform(0, 0.05)
+            time.sleep(wait)
+            waited += wait
+
+    def observe(self, response):
+        """adapt the bucket to the rate-limit headers (and 429s) of a response."""
+        headers = response.headers
+        limit = headers.get('X-RateLimit-Limit')
+        throttled = response.status_code == 429
+        try:
+            remaining = int(headers['X-RateLimit-Remaining'])
+            # whole seconds, likely truncated: round up so we never beat the api's clock
+            reset = float(headers['X-RateLimit-Reset']) + 1
+        except (KeyError, ValueError):
+            remaining = reset = None
+        if not (limit or remaining is not None or throttled):
+            return
+
+        def update(state, now):
+            parsed = parse_rate_limit(limit) if limit else None
+            if parsed:
+                state['limit'], state['window'] = parsed
+            if remaining is not None:
+                reset_at = now + reset
+                if 'reset_at' in state and reset_at <= state['reset_at'] + 1:
+                    # same window: responses can arrive out of order, keep the lower count
+                    state['remaining'] = min(state['remaining'], remaining)
+                else:
+                    state['remaining'], state['reset_at'] = remaining, reset_at
+            if throttled:
+                try:
+                    wait = reset or float(headers.get('Retry-After') or 1)
+                except ValueError:
+                    wait = 1.0
+                state['tokens'] = 0.0
+                state['blocked_until'] = max(state.get('blocked_until', 0), now + wait)
+
+        self._transact(update)
+
+class WhoopClient:
+    """
+    whoop api client sharing one keep-alive session and one access token.
+
+    safe to use from several threads: session setup, token refresh and stats
+    are locked, and token refresh is also serialized across processes with
+    an fcntl lock next to the token file. api requests draw from a
+    RateLimiter shared by all processes on the same account, at `priority`;
+    WHOOP_RATE_LIMIT=0 turns it off.
+
+    `user_id` picks an account's tokens and rate limit under home/users/;
+    client credentials are shared by every account in the home.
+    """
+
+    def __init__(self, home=None, base_url=None, token_path=None, max_connections=16,
+                 priority=PRIORITY_INTERACTIVE, rate_limit=None, user_id=None):
+        self.home = Path(home or os.environ.get("WHOOP_HOME", DEFAULT_HOME))
+        self.user_id = user_id
+        self.account_dir = account_dir(self.home, user_id)
+        self.base_url = base_url or os.environ.get("WHOOP_BASE_URL", DEFAULT_BASE_URL)
+        self.token_url = f"{self.base_url}/oauth/oauth2/token"
+        self.token_path = Path(token_path) if token_path else self.account_dir / "tokens.json"
+        self.token_lock_path = self.token_path.with_suffix(".lock")
+        self.creds_path = self.home / "credentials.json"
+        self.max_connections = max_connections
+        self.priority = priority
+        if rate_limit is None:
+            rate_limit = os.environ.get("WHOOP_RATE_LIMIT", "1") != "0"
+        self.limiter = RateLimiter(self.account_dir / "rate-limit.json") if rate_limit else None
+        self.stats = {'requests': 0, 'retries': 0, 'errors': 0, 'latencies': [], 'rate_wait': 0.0}
+        self._session = None
+        self._credentials = None
+        self._access_token = None  # (token, expires_at)
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()  # flock is per open file, so threads serialize here first
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    # credentials and tokens
+
+    def credentials(self):
+        """(client_id, client_secret), read on first use. missing file gives (None, None)."""
+        if self._credentials is None:
+            try:
+                with open(self.creds_path) as f:
+                    creds = json.load(f)
+            except FileNotFoundError:
+                creds = {}
+            self._credentials = (creds.get("client_id"), creds.get("client_secret"))
+        return self._credentials
+
+    def load_tokens(self):
+        """stored tokens, or None before auth."""
+        if not self.token_path.exists():
+            return None
+        with open(self.token_path) as f:
+            return json.load(f)
+
+    def save_tokens(self, tokens):
+        """save tokens atomically (temp file + rename, mode 600)."""
+        self.token_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.token_path.with_name(f".{self.token_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(tokens, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.token_path)
+
+    def _cached_token(self):
+        if self._access_token and time.time() < self._access_token[1] - TOKEN_REFRESH_MARGIN:
+            return self._access_token[0]
+        return None
+
+    def _accept_tokens(self, tokens):
+        if tokens and time.time() < tokens.get('expires_at', 0) - TOKEN_REFRESH_MARGIN:
+            self._access_token = (tokens['access_token'], tokens['expires_at'])
+            return tokens['access_token']
+        return None
+
+    def access_token(self):
+        """
+        a valid access token, refreshing it if expired.
+
+        the token file is re-read once the locks are held: whoever waited
+        behind another refresh picks up its result instead of posting a
+        refresh token that was just rotated away.
+        """
+        token = self._cached_token()
+        if token:
+            return token
+
+        tokens = self.load_tokens()
+        if not tokens:
+            raise AuthError("no tokens found. run: python whoop.py auth")
+        token = self._accept_tokens(tokens)
+        if token:
+            return token
+
+        self.token_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._refresh_lock, open(self.token_lock_path, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            token = self._cached_token() or self._accept_tokens(self.load_tokens())
+            if token:
+                return token
+            return self._refresh(self.load_tokens())
+
+    def _refresh(self, tokens):
+        """post the refresh; caller must hold the token locks."""
+        import requests
+
+        client_id, client_secret = self.credentials()
+        if not client_id or not client_secret:
+            raise AuthError(f"client credentials missing from {self.creds_path}")
+
+        # only 429 is retried: the refresh token may rotate, so a retried
+        # post after a server error could present a spent token
+        try:
+            response = self.http_request('POST', self.token_url, retry_statuses={429}, idempotent=False, data={
+                'grant_type': 'refresh_token',
+                'refresh_token': tokens['refresh_token'],
+                'client_id': client_id,
+                'client_secret': client_secret,
+                'scope': SCOPE
+            })
+        except requests.RequestException as e:
+            raise AuthError(f"failed to refresh token: {e}") from e
+
+        if response.status_code != 200:
+            raise AuthError(f"failed to refresh token: {response.text}", response.status_code)
+
+        new_tokens = response.json()
+        tokens.update({
+            'access_token': new_tokens['access_token'],
+            'refresh_token': new_tokens.get('refresh_token', tokens['refresh_token']),
+            'expires_at': time.time() + new_tokens['expires_in']
+        })
+        self.save_tokens(tokens)
+        self._access_token = (tokens['access_token'], tokens['expires_at'])
+        return tokens['access_token']
+
+    # http
+
+    def session(self):
+        """the shared keep-alive session, created on first use."""
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                self._session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_connections)
+                self._session.mount("https://", adapter)
+                self._session.mount("http://", adapter)
+            return self._session
+
+    def _count(self, key, value=1):
+        with self._lock:
+            if key == 'latencies':
+                self.stats[key].append(value)
+            else:
+                self.stats[key] += value
+
+    def http_request(self, method, url, retry_statuses=HTTP_RETRY_STATUSES, idempotent=True,
+                     priority=None, **kwargs):
+        """
+        send a request on the shared session with timeouts and retries.
+
+        retries statuses in `retry_statuses` with jittered exponential backoff.
+        non-idempotent requests only retry failed connects, never read
+        timeouts, since the server may already have acted on them. with a
+        `priority`, every attempt first takes a rate limiter token.
+        """
+        import requests
+        kwargs.setdefault('timeout', HTTP_TIMEOUT)
+        session = self.session()
+        limiter = self.limiter if priority else None
+
+        for attempt in range(HTTP_MAX_RETRIES + 1):
+            if limiter:
+                self._count('rate_wait', limiter.acquire(priority))
+            started = time.monotonic()
+            self._count('requests')
+            try:
+                response = session.request(method, url, **kwargs)
+            except requests.RequestException as e:
+                self._count('latencies', time.monotonic() - started)
+                if idempotent:
+                    retryable = isinstance(e, (requests.ConnectionError, requests.Timeout))
+                else:
+                    retryable = isinstance(e, requests.ConnectTimeout)
+                if not retryable or attempt == HTTP_MAX_RETRIES:
+                    self._count('errors')
+                    raise
+                self._count('retries')
+                time.sleep(retry_delay(attempt))
+                continue
+
+            self._count('latencies', time.monotonic() - started)
+            if limiter:
+                limiter.observe(response)
+            if response.status_code in retry_statuses and attempt < HTTP_MAX_RETRIES:
+                self._count('retries')
+                time.sleep(retry_delay(attempt, response))
+                continue
+            return response
+
+    def request(self, endpoint, params=None):
+        """authenticated GET of `endpoint`, returning the decoded json."""
+        import requests
+
+        headers = {'Authorization': f'Bearer {self.access_token()}'}
+        try:
+            response = self.http_request('GET', f"{self.base_url}{endpoint}", priority=self.priority,
+                                         headers=headers, params=params)
+        except requests.RequestException as e:
+            raise WhoopError(str(e)) from e
+
+        if response.status_code != 200:
+            raise WhoopError(f"{response.status_code} - {response.text}", response.status_code)
+        return response.json()
+
+    def iter_pages(self, endpoint, start, end, next_token=None) -> Iterator[Tuple[List[dict], Optional[str]]]:
+        """yield (records, next_token) for each page of `endpoint` between start and end."""
+        while True:
+            params = {
+                'start': format_api_time(start),
+                'end': format_api_time(end),
+                'limit': PAGE_LIMIT
+            }
+            if next_token:
+                params['nextToken'] = next_token
+
+            data = self.request(endpoint, params)
+            next_token = data.get('next_token')
+            yield data.get('records', []), next_token
+            if not next_token:
+                return
+
+    # records
+
+    def _window(self, start, end, days):
+        end = end or datetime.now(timezone.utc)
+        if start is None:
+            start = end - timedelta(days=days)
+        return start, end
+
+    def sleeps(self, start=None, end=None, days=7) -> List[Sleep]:
+        """sleeps starting in [start, end), newest first. defaults to the last `days`."""
+        start, end = self._window(start, end, days)
+        return [Sleep.from_api(r) for page, _ in self.iter_pages(SLEEP_ENDPOINT, start, end) for r in page]
+
+    def recoveries(self, start=None, end=None, days=7) -> List[Recovery]:
+        """recoveries created in [start, end), newest first. defaults to the last `days`."""
+        start, end = self._window(start, end, days)
+        return [Recovery.from_api(r) for page, _ in self.iter_pages(RECOVERY_ENDPOINT, start, end) for r in page]
+
+    def sleep(self, sleep_id) -> Sleep:
+        """one sleep by id."""
+        return Sleep.from_api(self.request(f"{SLEEP_ENDPOINT}/{sleep_id}"))
+
+    def sleeps_by_id(self, sleep_ids: Iterable[str], workers=8) -> Dict[str, Sleep]:
+        """
+        fetch many sleeps concurrently on a bounded thread pool.
+
+        ids the api doesn't know (404) are left out; other failures raise.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        sleep_ids = list(dict.fromkeys(sleep_ids))
+        if not sleep_ids:
+            return {}
+        # settle token and session on this thread so workers only read them
+        self.access_token()
+        self.session()
+
+        def fetch(sleep_id):
+            try:
+                return self.sleep(sleep_id)
+            except WhoopError as e:
+                if e.status == 404:
+                    return None
+                raise
+
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(sleep_ids)))) as pool:
+            return {s.id: s for s in pool.map(fetch, sleep_ids) if s}
+
+    def current_sleep(self) -> Optional[Sleep]:
+        """the sleep in progress right now, or None."""
+        now = datetime.now(timezone.utc)
+        recent = self.sleeps(start=now - timedelta(hours=24), end=now)
+        latest = max(recent, key=lambda s: s.start, default=None)
+        return latest if latest and latest.contains(now) else None
+
+    def is_sleeping(self) -> bool:
+        return self.current_sleep() is not None
+
+class AsyncWhoopClient:
+    """
+    asyncio interface over WhoopClient.
+
+    each call runs in a worker thread via asyncio.to_thread, bounded by a
+    semaphore, so gathered coroutines share the client's pool and token.
+    """
+
+    def __init__(self, client=None, max_concurrency=8, **client_options):
+        import asyncio
+        self.client = client or WhoopClient(max_connections=max(16, max_concurrency), **client_options)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.client.close()
+
+    async def _call(self, fn, *args, **kwargs):
+        import asyncio
+        async with self._semaphore:
+            return await asyncio.to_thread(fn, *args, **kwargs)
+
+    async def request(self, endpoint, params=None):
+        return await self._call(self.client.request, endpoint, params)
+
+    async def sleeps(self, start=None, end=None, days=7) -> List[Sleep]:
+        return await self._call(self.client.sleeps, start, end, days)
+
+    async def recoveries(self, start=None, end=None, days=7) -> List[Recovery]:
+        return await self._call(self.client.recoveries, start, end, days)
+
+    async def sleep(self, sleep_id) -> Sleep:
+        return await self._call(self.client.sleep, sleep_id)
+
+    async def sleeps_by_id(self, sleep_ids: Iterable[str]) -> Dict[str, Sleep]:
+        """fetch many sleeps concurrently; unknown ids are left out."""
+        import asyncio
+
+        async def fetch(sleep_id):
+            try:
+                return await self.sleep(sleep_id)
+            except WhoopError as e:
+                if e.status == 404:
+                    return None
+                raise
+
+        # settle the token once instead of letting every coroutine race for it
+        await self._call(self.client.access_token)
+        results = await asyncio.gather(*(fetch(i) for i in dict.fromkeys(sleep_ids)))
+        return {s.id: s for s in results if s}
+
+    async def current_sleep(self) -> Optional[Sleep]:
+        return await self._call(self.client.current_sleep)
+
+    async def is_sleeping(self) -> bool:
+        return await self._call(self.client.is_sleeping)